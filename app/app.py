@@ -1,30 +1,87 @@
-from quart import Quart, websocket, render_template, jsonify
-from backend.ws_client import run_nano_ws_listener, get_election_details, aggregate_election_overview, get_election_overview
-from backend.rpc_client import update_online_reps, get_block_info
+from quart import Quart, Response, websocket, render_template, jsonify, request
+from quart.json.provider import DefaultJSONProvider
+from backend.ws_client import run_nano_ws_listeners, get_election_details, aggregate_election_overview, get_election_overview, run_lifecycle_sweeper, leader_lease, \
+    restore_state, snapshot_state, run_state_snapshots, flush_pending_elections, \
+    get_overview_version, get_overview_page, get_rep_votes, search_elections, index_block_info
+from backend.rpc_client import run_refresh_scheduler, get_online_reps, get_block_info, get_reps_version
+from backend.http_cache import (ResponseCache, RenderedResponse, election_version, make_etag, variant_etag,
+                                http_request_seconds, http_response_bytes, http_compression_saved_bytes)
 from backend.data_processor import election_formatter
+from backend.codec import dumps_str, loads
+from backend.metrics import registry, broadcast_fanout_seconds, connected_clients
+from backend.supervisor import supervisor, loop_lag_sampler, heartbeat, ON_FAILURE
+from backend.executor import cpu_executor, CPU_OFFLOAD_MIN_VOTES
 from os import getenv
+from time import perf_counter
 import asyncio
-import json
+import hashlib
 import logging
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Quart")
 
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """jsonify and friends go through backend.codec like the cache and broadcast."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_str(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+
 app = Quart(__name__)
+app.json = CodecJSONProvider(app)
 
 clients = []
-quorum = {}
-online_reps = {}
 previous_data_hash = None
 
+OVERVIEW_PAGE_LIMIT = 50
+OVERVIEW_MAX_PAGE_LIMIT = 500
+REP_VOTES_PAGE_LIMIT = 100
+REP_VOTES_MAX_PAGE_LIMIT = 1000
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+# The overview changes every aggregation tick, proxies may serve a page for this long
+OVERVIEW_MAX_AGE = int(getenv("OVERVIEW_MAX_AGE", 1))
+# Rendered detail pages of confirmed elections, by election version and reps version
+DETAIL_CACHE_TTL = int(getenv("DETAIL_CACHE_TTL", 30))
+DETAIL_CACHE_ENTRIES = int(getenv("DETAIL_CACHE_ENTRIES", 2000))
+# /healthz fails while the event loop lags more than this many seconds
+HEALTH_MAX_LOOP_LAG = float(getenv("HEALTH_MAX_LOOP_LAG", 2))
+# Most seconds a supervised loop may go without a heartbeat before it is restarted
+PIPELINE_DEADLINE = int(getenv("PIPELINE_DEADLINE", 60))
+
+detail_cache = ResponseCache(max_entries=DETAIL_CACHE_ENTRIES, ttl=DETAIL_CACHE_TTL)
+
 
 @app.before_serving
 async def startup():
-    app.add_background_task(aggregate_election_overview)
-    app.add_background_task(refresh_quorum)
-    app.add_background_task(broadcast)
-    asyncio.create_task(run_nano_ws_listener())
+    await restore_state()
+    await cpu_executor.start()
+    loop_lag_sampler.start()
+    supervisor.start("leader_lease", leader_lease.run, deadline=PIPELINE_DEADLINE)
+    supervisor.start("aggregate", aggregate_election_overview, deadline=PIPELINE_DEADLINE)
+    supervisor.start("refresh", run_refresh_scheduler, deadline=PIPELINE_DEADLINE * 2)
+    supervisor.start("broadcast", broadcast, deadline=PIPELINE_DEADLINE)
+    supervisor.start("lifecycle", run_lifecycle_sweeper, deadline=PIPELINE_DEADLINE * 2, critical=False)
+    # Returns right away when snapshots are off
+    supervisor.start("snapshots", run_state_snapshots, restart=ON_FAILURE, critical=False)
+    # Listeners reconnect on their own and may legitimately be quiet, so no deadline
+    supervisor.start("listeners", run_nano_ws_listeners)
+
+
+@app.after_serving
+async def shutdown():
+    await supervisor.stop()
+    loop_lag_sampler.stop()
+    await flush_pending_elections()
+    await snapshot_state()
+    # Hand over ingest to another instance right away instead of waiting for the lease to expire
+    await leader_lease.release()
+    cpu_executor.shutdown()
 
 
 async def get_election_data(hash):
@@ -44,12 +101,16 @@ async def get_data_for_broadcast():
 
 async def send_data_to_clients(clients_to_send, data):
     """Send data to specified clients."""
+    # Encoded once for all clients
+    payload = dumps_str({"elections": data})
     for client in list(clients_to_send):  # Iterate over a copy of the specified clients list
         try:
-            await client.send(json.dumps({"elections": data}))
+            await client.send(payload)
         except Exception as e:
             logging.error("Error sending message: %s", e)
-            clients.remove(client)
+            if client in clients:
+                clients.remove(client)
+                connected_clients.set(len(clients))
 
 
 async def broadcast():
@@ -58,22 +119,19 @@ async def broadcast():
         data_hash, data = await get_data_for_broadcast()
         if clients and data_hash != previous_data_hash:
             previous_data_hash = data_hash
+            start = perf_counter()
             await send_data_to_clients(clients, data)
+            broadcast_fanout_seconds.observe(perf_counter() - start)
 
+        heartbeat()
         await asyncio.sleep(0.5)
 
 
-async def refresh_quorum():
-    global quorum, online_reps
-    while True:
-        online_reps, quorum = await update_online_reps()
-        await asyncio.sleep(60)
-
-
 @app.websocket('/ws')
 async def ws():
     current_client = websocket._get_current_object()
     clients.append(current_client)
+    connected_clients.set(len(clients))
     logger.info("New client connected: %s", current_client)
     try:
         _, data = await get_data_for_broadcast()  # Get the current data
@@ -90,10 +148,122 @@ async def ws():
         logger.error("WebSocket error: %s", e)
     finally:
         # Clean up when a client disconnects
-        clients.remove(current_client)
+        if current_client in clients:
+            clients.remove(current_client)
+        connected_clients.set(len(clients))
         logger.info("Client disconnected: %s", current_client)
 
 
+@app.route('/metrics')
+async def metrics():
+    return registry.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+@app.route('/healthz')
+async def healthz():
+    """Liveness of the background pipeline and the event loop, 503 when orchestration should act."""
+    event_loop = loop_lag_sampler.describe()
+    healthy = supervisor.healthy and loop_lag_sampler.current_lag < HEALTH_MAX_LOOP_LAG
+    return jsonify({
+        "status": "ok" if healthy else "unhealthy",
+        "leader": leader_lease.is_leader,
+        "tasks": supervisor.describe(),
+        "event_loop": event_loop,
+    }), 200 if healthy else 503
+
+
+@app.route('/api/overview')
+async def api_overview():
+    status = request.args.get("status", "confirmed")
+    if status not in ("confirmed", "unconfirmed"):
+        return jsonify({"error": "status must be confirmed or unconfirmed"}), 400
+    try:
+        limit = min(int(request.args.get("limit", OVERVIEW_PAGE_LIMIT)), OVERVIEW_MAX_PAGE_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    cursor = request.args.get("cursor")
+
+    # The ETag only depends on the overview version and the page requested, so
+    # revalidations are answered before the cache is read
+    version = get_overview_version()
+    headers = {"Cache-Control": f"public, max-age={OVERVIEW_MAX_AGE}"}
+    if version:
+        page_key = f"{version}:{status}:{limit}:{cursor or ''}"
+        headers["ETag"] = '"' + hashlib.sha1(page_key.encode()).hexdigest() + '"'
+        if request.if_none_match.contains(headers["ETag"].strip('"')):
+            return "", 304, headers
+
+    try:
+        page, next_cursor = await get_overview_page(status, limit, cursor)
+    except KeyError:
+        return jsonify({"error": "cursor is no longer in the overview, start from the first page"}), 410
+    return jsonify({
+        "status": status,
+        "version": version,
+        "elections": [{"hash": block_hash, **entry} for block_hash, entry in page],
+        "next_cursor": next_cursor,
+    }), 200, headers
+
+
+async def leader_only():
+    """
+    503 naming the leader for endpoints answered from indexes that only the
+    leader fills at ingest, None on the leader.
+    """
+    if leader_lease.is_leader:
+        return None
+    try:
+        leader = await leader_lease.current_leader()
+    except Exception:
+        leader = None
+    return jsonify({"error": "Only the leader instance keeps this index, ask it instead", "leader": leader}), 503, \
+        {"Retry-After": str(leader_lease.ttl)}
+
+
+@app.route('/api/rep/<account>/votes')
+async def api_rep_votes(account):
+    """The representative's recent votes newest first, paged with `before`."""
+    try:
+        limit = min(int(request.args.get("limit", REP_VOTES_PAGE_LIMIT)), REP_VOTES_MAX_PAGE_LIMIT)
+        before = request.args.get("before")
+        before = int(before) if before else None
+    except ValueError:
+        return jsonify({"error": "limit and before must be integers"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    if account.startswith("xrb_"):
+        account = "nano_" + account[4:]
+
+    not_leader = await leader_only()
+    if not_leader is not None:
+        return not_leader
+    page = get_rep_votes(account, limit, before)
+    if page is None:
+        return jsonify({"error": "No recent votes from this representative"}), 404
+    return jsonify({"account": account, **page}), 200, {"Cache-Control": "no-cache"}
+
+
+@app.route('/api/search')
+async def api_search():
+    """Elections by block hash prefix or by account, answered from the in-memory search index."""
+    try:
+        limit = min(int(request.args.get("limit", SEARCH_LIMIT)), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    query = request.args.get("q", "")
+    result = search_elections(query, limit)
+    if result is None:
+        return jsonify({"error": "q must be a block hash prefix or a nano_ account"}), 400
+    not_leader = await leader_only()
+    if not_leader is not None:
+        return not_leader
+    return jsonify({"query": query, **result}), 200, {"Cache-Control": "no-cache"}
+
+
 @app.route('/')
 async def index():
     return await render_template('index.html')
@@ -105,28 +275,75 @@ async def raw(hash):
     return election_data
 
 
-@app.route('/election_details/', defaults={'hash': None})
-@app.route('/election_details/<hash>')
-async def get_election(hash):
+async def serve_election_detail(endpoint, hash, render, require_data=False):
+    """
+    Format, render and compress an election detail response. Confirmed
+    elections are cached per election and reps version, so repeat requests
+    skip the RPC, formatter and rendering and revalidate with their ETag.
+    """
+    start = perf_counter()
     election_data = await get_election_data(hash)
-    block_info = await get_block_info(hash)
-
-    response = election_formatter(block_info, election_data, online_reps)
-
     # If hash is provided and no data is found, return a not found response
-    if hash and not election_data:
+    if require_data and hash and not election_data:
         return jsonify({"error": "Election data not found"}), 404
-    return await render_template('election_detail.html', election_data=response, block_explorer=getenv("BLOCK_EXPLORER"))
+
+    cacheable = bool(hash) and bool(election_data.get("is_confirmed"))
+    key = etag = entry = None
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if cacheable:
+        key = (endpoint, hash, election_version(election_data), get_reps_version())
+        etag = make_etag(*key)
+        headers["Cache-Control"] = f"public, max-age={DETAIL_CACHE_TTL}"
+        for encoding in ("identity", "gzip", "br"):
+            if request.if_none_match.contains(variant_etag(etag, encoding).strip('"')):
+                headers["ETag"] = variant_etag(etag, encoding)
+                http_request_seconds.labels(endpoint, "not_modified").observe(perf_counter() - start)
+                return "", 304, headers
+        entry = detail_cache.get(key)
+
+    result = "hit" if entry else "miss" if cacheable else "bypass"
+    if entry is None:
+        block_info = await get_block_info(hash)
+        index_block_info(block_info)
+        votes = election_data.get("votes", {})
+        size = len(votes.get("detail") or votes.get("summary") or ())
+        response = await cpu_executor.run(election_formatter, block_info, election_data, await get_online_reps(),
+                                          size=size, min_size=CPU_OFFLOAD_MIN_VOTES)
+        body, content_type = await render(response)
+        entry = RenderedResponse(body, content_type)
+        if cacheable:
+            detail_cache.put(key, entry)
+
+    encoding, body = entry.encode(request.accept_encodings)
+    if cacheable:
+        headers["ETag"] = variant_etag(etag, encoding)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+        http_compression_saved_bytes.labels(endpoint).inc(len(entry.body) - len(body))
+    http_response_bytes.labels(endpoint, encoding).inc(len(body))
+    http_request_seconds.labels(endpoint, result).observe(perf_counter() - start)
+    return Response(body, content_type=entry.content_type, headers=headers)
+
+
+async def render_election_page(response):
+    page = await render_template('election_detail.html', election_data=response, block_explorer=getenv("BLOCK_EXPLORER"))
+    return page.encode(), "text/html; charset=utf-8"
+
+
+async def render_election_json(response):
+    return app.json.dumps(response).encode(), "application/json"
+
+
+@app.route('/election_details/', defaults={'hash': None})
+@app.route('/election_details/<hash>')
+async def get_election(hash):
+    return await serve_election_detail("election_details", hash, render_election_page, require_data=True)
 
 
 @app.route('/api/election_details/', defaults={'hash': None})
 @app.route('/api/election_details/<hash>')
 async def api_get_election(hash):
-    election_data = await get_election_data(hash)
-    block_info = await get_block_info(hash)
-
-    response = election_formatter(block_info, election_data, online_reps)
-    return response
+    return await serve_election_detail("api_election_details", hash, render_election_json)
 
 
 if __name__ == '__main__':
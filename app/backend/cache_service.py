@@ -1,9 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from copy import deepcopy
+from typing import Any, Dict, Optional, Tuple
+from aiomcache.client import acquire
 import aiomcache
-import orjson  # orjson is faster than the built-in json
-import json  # fallback for 128bit integers
-from typing import Any
+import struct
+from time import perf_counter, time_ns
+from backend import codec
+from backend.record_format import encode_record, decode_record, is_binary
+from backend.metrics import registry, cache_operation_seconds, cache_lookups
 
 
 class CacheInterface(ABC):
@@ -15,10 +19,19 @@ class CacheInterface(ABC):
     async def set(self, key: str, value: Any) -> None:
         pass
 
+    @abstractmethod
+    async def add(self, key: str, value: Any, expire: int = 0) -> bool:
+        """Store value only if key does not exist yet, return whether it was stored."""
+        pass
+
     @abstractmethod
     async def drop(self, key: str) -> None:
         pass
 
+    @abstractmethod
+    async def touch(self, key: str, expire: int) -> bool:
+        pass
+
     @abstractmethod
     async def get_multi(self, keys: list) -> Dict[str, Any]:
         pass
@@ -31,74 +44,384 @@ class CacheInterface(ABC):
     async def drop_multi(self, keys: list) -> None:
         pass
 
+    @abstractmethod
+    async def gets_multi(self, keys: list) -> Dict[str, Tuple[Any, Any]]:
+        """Return {key: (value, cas_token)} for the keys that exist."""
+        pass
+
+    @abstractmethod
+    async def cas(self, key: str, value: Any, token: Any, expire: int = 0) -> bool:
+        """Store value only if key is unchanged since token was read, return whether it was stored."""
+        pass
+
+    @abstractmethod
+    async def append(self, key: str, items: list, expire: int = 0) -> int:
+        """
+        Append items to the segment log under key, creating it if missing, and
+        return the bytes appended, 0 if the log refused them. Logs read back as lists.
+        """
+        pass
+
 
 class InMemoryCache(CacheInterface):
     def __init__(self):
         self.store = {}
+        # Every write bumps the key's version, which doubles as its CAS token
+        self.versions = {}
+        self._version = 0
+
+    def _write(self, key, value):
+        self._version += 1
+        # Like memcached, later changes to the written value don't reach the stored one
+        self.store[key] = deepcopy(value)
+        self.versions[key] = self._version
 
     async def get(self, key):
-        return self.store.get(key, None)
+        # Copies, so readers folding segments into a record don't change the stored one
+        return deepcopy(self.store.get(key, None))
+
+    async def set(self, key, value, expire=0):
+        self._write(key, value)
 
-    async def set(self, key, value):
-        self.store[key] = value
+    async def add(self, key, value, expire=0):
+        if key in self.store:
+            return False
+        self._write(key, value)
+        return True
 
     async def get_multi(self, keys):
-        return {key: self.store[key] for key in keys if key in self.store}
+        return {key: deepcopy(self.store[key]) for key in keys if key in self.store}
 
-    async def set_multi(self, mapping):
+    async def set_multi(self, mapping, expire=0):
         for key, value in mapping.items():
-            self.store[key] = value
+            self._write(key, value)
+
+    async def gets_multi(self, keys):
+        # Copies emulate memcached, where callers mutate a decoded value and
+        # the stored one stays untouched until the CAS succeeds
+        return {key: (deepcopy(self.store[key]), self.versions[key])
+                for key in keys if key in self.store}
+
+    async def cas(self, key, value, token, expire=0):
+        if self.versions.get(key) != token:
+            return False
+        self._write(key, value)
+        return True
+
+    async def append(self, key, items, expire=0):
+        self._write(key, self.store.get(key, []) + items)
+        return len(codec.dumps(items))
 
     async def drop(self, key):
         self.store.pop(key, None)
+        self.versions.pop(key, None)
+
+    async def touch(self, key, expire):
+        return key in self.store
 
     async def drop_multi(self, keys):
         for key in keys:
             await self.drop(key)
 
 
+# memcached's default item size limit is 1 MB, including key and item overhead
+MAX_ITEM_BYTES = 1000 * 1000
+# Values above MAX_ITEM_BYTES are stored as numbered chunks behind a manifest
+CHUNK_MAGIC = b"NEC"
+# Keys per get command for multi-gets
+MULTI_GET_BATCH = 100
+# Segment logs: the magic, then frames of a uint32 length and an encoded item
+SEGMENT_MAGIC = b"NES"
+FRAME_LENGTH = struct.Struct("<I")
+# Segments are small and written far more often than whole records, so they are compressed sooner
+SEGMENT_COMPRESS_MIN_BYTES = 512
+
+cache_chunked_writes = registry.counter(
+    "cache_chunked_writes_total", "Values too large for one item, written as chunks", ("prefix",))
+cache_chunks_written = registry.counter(
+    "cache_chunks_written_total", "Chunk items written for chunked values", ("prefix",))
+cache_chunk_misses = registry.counter(
+    "cache_chunk_misses_total", "Chunked reads that found a chunk missing", ("prefix",))
+cache_appended_bytes = registry.counter(
+    "cache_appended_bytes_total", "Bytes appended to segment logs", ("prefix",))
+
+
+class CasClient(aiomcache.Client):
+    """aiomcache's client with a multi-key gets, it only has one for a single key."""
+
+    @acquire
+    async def gets_multi(self, conn, *keys: bytes) -> Tuple[Tuple[Optional[bytes], Optional[int]], ...]:
+        values, tokens = await self._multi_get(conn, *keys, with_cas=True)
+        return tuple((values.get(key), tokens.get(key)) for key in keys)
+
+
 class MemcacheCache(CacheInterface):
-    def __init__(self, host: str = 'localhost', port: int = 11211, prefix=""):
-        self.client = aiomcache.Client(host, port)
+    """
+    Memcached backed cache.
+
+    Values larger than `max_item_bytes` are split into chunk keys named after
+    the value's key and a per-write generation, plus a manifest under the key
+    itself. Chunks are written before the manifest, so readers always see one
+    complete generation. A reader that loses a race with a replacement (its
+    chunks already deleted) reads the manifest again.
+
+    Segment logs are grown with memcached's append, each item a length
+    prefixed frame, and read back as a list of the items.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 11211, prefix="",
+                 binary_records: bool = False, compress_min_bytes: int = 16384,
+                 max_item_bytes: int = MAX_ITEM_BYTES):
+        self.client = CasClient(host, port)
         self.prefix = prefix
+        # Election records go into the compact binary format, see backend.record_format.
+        # Reads accept both that and JSON regardless of this setting.
+        self.binary_records = binary_records
+        self.compress_min_bytes = compress_min_bytes
+        self.max_item_bytes = max_item_bytes
+        # Chunk keys of the chunked values this instance wrote last, dropped on replacement
+        self._chunks: Dict[str, list] = {}
+        self._hit = cache_lookups.labels(prefix, "hit")
+        self._miss = cache_lookups.labels(prefix, "miss")
+        self._chunked_writes = cache_chunked_writes.labels(prefix)
+        self._chunks_written = cache_chunks_written.labels(prefix)
+        self._chunk_misses = cache_chunk_misses.labels(prefix)
+        self._appended_bytes = cache_appended_bytes.labels(prefix)
+        self._latency = {operation: cache_operation_seconds.labels(prefix, operation)
+                         for operation in ("get", "set", "add", "drop", "touch", "cas", "append",
+                                           "get_multi", "gets_multi", "set_multi", "drop_multi")}
 
     def json_dumps(self, obj: Any) -> bytes:
-        try:
-            return orjson.dumps(obj)
-        except TypeError as e:
-            if str(e) == 'Integer exceeds 64-bit range':
-                return json.dumps(obj).encode('utf-8')
-            raise e
+        if self.binary_records:
+            return encode_record(obj, self.compress_min_bytes)
+        return codec.dumps(obj)
+
+    def loads(self, value: bytes) -> Any:
+        if value[:3] == SEGMENT_MAGIC:
+            return self._decode_segments(value)
+        return decode_record(value) if is_binary(value) else codec.loads(value)
+
+    def _encode_segments(self, items: list) -> bytes:
+        frames = []
+        for item in items:
+            data = encode_record(item, SEGMENT_COMPRESS_MIN_BYTES) if self.binary_records else codec.dumps(item)
+            frames.append(FRAME_LENGTH.pack(len(data)))
+            frames.append(data)
+        return b"".join(frames)
+
+    def _decode_segments(self, value: bytes) -> list:
+        items = []
+        offset = len(SEGMENT_MAGIC)
+        while offset < len(value):
+            (length,) = FRAME_LENGTH.unpack_from(value, offset)
+            offset += FRAME_LENGTH.size
+            items.append(decode_record(value[offset:offset + length]))
+            offset += length
+        return items
 
     def _prefixed_key(self, key: str) -> bytes:
         """Apply prefix to key and return as bytes."""
         return f"{self.prefix}{key}".encode()
 
-    async def get(self, key: str) -> Any:
-        value = await self.client.get(self._prefixed_key(key))
-        if value is not None:
-            return orjson.loads(value)
+    def _chunk_keys(self, key: str, generation: str, count: int) -> list:
+        return [f"{self.prefix}{key}:{generation}:{number}".encode() for number in range(count)]
+
+    async def _encode(self, key: str, value: Any, expire: int) -> Tuple[bytes, list]:
+        """Serialize `value`, writing its chunks first if it's too large for one item."""
+        data = self.json_dumps(value)
+        if len(data) <= self.max_item_bytes:
+            return data, []
+        size = self.max_item_bytes
+        generation = f"{time_ns():x}"
+        chunk_keys = self._chunk_keys(key, generation, -(-len(data) // size))
+        for number, chunk_key in enumerate(chunk_keys):
+            await self.client.set(chunk_key, data[number * size:(number + 1) * size], exptime=expire)
+        self._chunked_writes.inc()
+        self._chunks_written.inc(len(chunk_keys))
+        manifest = codec.dumps({"generation": generation, "chunks": len(chunk_keys), "bytes": len(data)})
+        return CHUNK_MAGIC + manifest, chunk_keys
+
+    async def _written(self, key: str, chunk_keys: list, stored: bool = True) -> None:
+        """Clean up the chunks a write made obsolete: the replaced ones, or its own if it failed."""
+        if not stored:
+            obsolete = chunk_keys
+        else:
+            obsolete = self._chunks.pop(key, [])
+            if chunk_keys:
+                self._chunks[key] = chunk_keys
+        for chunk_key in obsolete:
+            await self.client.delete(chunk_key)
+
+    def _manifest_chunk_keys(self, key: str, value: bytes) -> list:
+        if value is None or value[:3] != CHUNK_MAGIC:
+            return []
+        manifest = codec.loads(value[3:])
+        return self._chunk_keys(key, manifest["generation"], manifest["chunks"])
+
+    async def _multi_get(self, raw_keys: list) -> list:
+        values = []
+        for offset in range(0, len(raw_keys), MULTI_GET_BATCH):
+            values.extend(await self.client.multi_get(*raw_keys[offset:offset + MULTI_GET_BATCH]))
+        return values
+
+    async def _multi_gets(self, raw_keys: list) -> list:
+        pairs = []
+        for offset in range(0, len(raw_keys), MULTI_GET_BATCH):
+            pairs.extend(await self.client.gets_multi(*raw_keys[offset:offset + MULTI_GET_BATCH]))
+        return pairs
+
+    async def _assemble(self, key: str, value: bytes) -> Any:
+        """Decode a stored value, fetching its chunks in one multi-get if it's a manifest."""
+        if value[:3] != CHUNK_MAGIC:
+            return self.loads(value)
+        chunks = await self._multi_get(self._manifest_chunk_keys(key, value))
+        if any(chunk is None for chunk in chunks):
+            self._chunk_misses.inc()
+            return None
+        return self.loads(b"".join(chunks))
+
+    async def _get(self, key: str) -> Any:
+        # A second attempt covers a replacement between reading the manifest and its chunks
+        for _ in range(2):
+            value = await self.client.get(self._prefixed_key(key))
+            if value is None:
+                break
+            decoded = await self._assemble(key, value)
+            if decoded is not None:
+                self._hit.inc()
+                return decoded
+        self._miss.inc()
         return None
 
+    async def _set(self, key: str, value: Any, expire: int = 0):
+        data, chunk_keys = await self._encode(key, value, expire)
+        await self.client.set(self._prefixed_key(key), data, exptime=expire)
+        await self._written(key, chunk_keys)
+
+    async def _gets(self, key: str):
+        for _ in range(2):
+            value, token = await self.client.gets(self._prefixed_key(key))
+            if value is None:
+                break
+            decoded = await self._assemble(key, value)
+            if decoded is not None:
+                self._hit.inc()
+                return decoded, token
+        self._miss.inc()
+        return None, None
+
+    async def _delete(self, key: str, value: bytes):
+        # Chunks go with their manifest, whoever wrote them
+        await self.client.delete(self._prefixed_key(key))
+        self._chunks.pop(key, None)
+        for chunk_key in self._manifest_chunk_keys(key, value):
+            await self.client.delete(chunk_key)
+
+    async def get(self, key: str) -> Any:
+        start = perf_counter()
+        value = await self._get(key)
+        self._latency["get"].observe(perf_counter() - start)
+        return value
+
     async def set(self, key: str, value: Any, expire: int = 0):
-        await self.client.set(self._prefixed_key(key), self.json_dumps(value), exptime=expire)
+        start = perf_counter()
+        await self._set(key, value, expire)
+        self._latency["set"].observe(perf_counter() - start)
+
+    async def add(self, key: str, value: Any, expire: int = 0) -> bool:
+        start = perf_counter()
+        data, chunk_keys = await self._encode(key, value, expire)
+        added = await self.client.add(self._prefixed_key(key), data, exptime=expire)
+        await self._written(key, chunk_keys, added)
+        self._latency["add"].observe(perf_counter() - start)
+        return added
 
     async def drop(self, key: str):
-        await self.client.delete(self._prefixed_key(key))
+        start = perf_counter()
+        await self._delete(key, await self.client.get(self._prefixed_key(key)))
+        self._latency["drop"].observe(perf_counter() - start)
+
+    async def touch(self, key: str, expire: int) -> bool:
+        start = perf_counter()
+        touched = await self.client.touch(self._prefixed_key(key), expire)
+        if touched:
+            value = await self.client.get(self._prefixed_key(key))
+            for chunk_key in self._manifest_chunk_keys(key, value):
+                await self.client.touch(chunk_key, expire)
+        self._latency["touch"].observe(perf_counter() - start)
+        return touched
 
     async def get_multi(self, keys: list[str]) -> dict:
+        start = perf_counter()
         results = {}
-        for key in keys:
-            value = await self.get(key)  # This already uses the prefixed key
-            if value is not None:
-                results[key] = value
+        values = await self._multi_get([self._prefixed_key(key) for key in keys])
+        for key, value in zip(keys, values):
+            if value is None:
+                self._miss.inc()
+                continue
+            decoded = await self._assemble(key, value)
+            if decoded is None:
+                # Replaced while we read it, fetch the new generation
+                decoded = await self._get(key)
+            else:
+                self._hit.inc()
+            if decoded is not None:
+                results[key] = decoded
+        self._latency["get_multi"].observe(perf_counter() - start)
         return results
 
     async def set_multi(self, mapping: dict, expire: int = 0):
+        start = perf_counter()
         for key, value in mapping.items():
             # This already uses the prefixed key
-            await self.set(key, value, expire)
+            await self._set(key, value, expire)
+        self._latency["set_multi"].observe(perf_counter() - start)
+
+    async def gets_multi(self, keys: list[str]) -> dict:
+        start = perf_counter()
+        results = {}
+        pairs = await self._multi_gets([self._prefixed_key(key) for key in keys])
+        for key, (value, token) in zip(keys, pairs):
+            if value is None:
+                self._miss.inc()
+                continue
+            decoded = await self._assemble(key, value)
+            if decoded is None:
+                # Replaced while we read it, fetch the new generation and its token
+                decoded, token = await self._gets(key)
+            else:
+                self._hit.inc()
+            if decoded is not None:
+                results[key] = (decoded, token)
+        self._latency["gets_multi"].observe(perf_counter() - start)
+        return results
+
+    async def cas(self, key: str, value: Any, token: Any, expire: int = 0) -> bool:
+        start = perf_counter()
+        data, chunk_keys = await self._encode(key, value, expire)
+        stored = await self.client.cas(self._prefixed_key(key), data, token, exptime=expire)
+        await self._written(key, chunk_keys, stored)
+        self._latency["cas"].observe(perf_counter() - start)
+        return stored
+
+    async def append(self, key: str, items: list, expire: int = 0) -> int:
+        start = perf_counter()
+        data = self._encode_segments(items)
+        raw_key = self._prefixed_key(key)
+        # append needs an existing item, add creates the log unless another writer just did
+        stored = await self.client.append(raw_key, data, exptime=expire)
+        if not stored:
+            stored = await self.client.add(raw_key, SEGMENT_MAGIC + data, exptime=expire) \
+                or await self.client.append(raw_key, data, exptime=expire)
+        self._latency["append"].observe(perf_counter() - start)
+        if not stored:
+            return 0
+        self._appended_bytes.inc(len(data))
+        return len(data)
 
     async def drop_multi(self, keys: list[str]):
-        for key in keys:
-            await self.drop(key)  # This already uses the prefixed key
+        start = perf_counter()
+        values = await self._multi_get([self._prefixed_key(key) for key in keys])
+        for key, value in zip(keys, values):
+            await self._delete(key, value)
+        self._latency["drop_multi"].observe(perf_counter() - start)
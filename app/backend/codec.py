@@ -0,0 +1,58 @@
+# One JSON codec for the cache, the websocket broadcast, the HTTP API and the
+# overview hash. Raw weights go up to ~1.3e38 and don't fit orjson's 64-bit
+# integers, so they are only ints while summed and compared and are stored in
+# anything serialized as decimal strings (weight_str / weight_int). The stdlib
+# fallback stays as a safety net and is counted, it showing up is a bug.
+from backend.metrics import registry
+from typing import Any, Tuple, Union
+import orjson  # orjson is faster than the built-in json
+import json  # fallback for 128bit integers
+
+codec_fallbacks = registry.counter(
+    "codec_fallback_total", "Payloads that needed the slow stdlib json encoder")
+
+
+def dumps(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj)
+    except TypeError as e:
+        if str(e) == 'Integer exceeds 64-bit range':
+            codec_fallbacks.inc()
+            return json.dumps(obj).encode('utf-8')
+        raise e
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode('utf-8')
+
+
+def dumps_sorted(obj: Any) -> bytes:
+    """Key-order independent encoding, for hashing."""
+    data, fallbacks = dumps_sorted_uncounted(obj)
+    codec_fallbacks.inc(fallbacks)
+    return data
+
+
+def dumps_sorted_uncounted(obj: Any) -> Tuple[bytes, int]:
+    """
+    dumps_sorted for CPU pool jobs, which can't touch metrics: returns the
+    fallbacks it needed for the caller to count on the event loop.
+    """
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS), 0
+    except TypeError as e:
+        if str(e) == 'Integer exceeds 64-bit range':
+            return json.dumps(obj, sort_keys=True).encode('utf-8'), 1
+        raise e
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return orjson.loads(data)
+
+
+def weight_str(weight: Union[int, str, None]) -> str:
+    return str(weight or 0)
+
+
+def weight_int(weight: Union[int, str, None]) -> int:
+    return int(weight or 0)
@@ -1,4 +1,8 @@
-from backend.rpc_client import get_online_reps, get_quorum
+from backend.rpc_client import get_online_reps, get_quorum, get_reps_version
+from backend.elections import summarise_sources
+from backend.tally import tally_weights
+from backend.codec import weight_str
+from backend.executor import cpu_executor, CPU_OFFLOAD_MIN_VOTES, CPU_BATCH_VOTES
 from known import known
 from datetime import datetime
 import json
@@ -26,6 +30,66 @@ def election_formatter(block_data, election_data, online_reps):
     confirmation_duration = first_confirmed - \
         first_seen if election_data.get("is_confirmed") else None
 
+    if election_data.get("compacted"):
+        sources = election_data["votes"].get("sources", {})
+        (first_normal_vote_time, first_final_vote_time, last_normal_vote_time,
+         last_final_vote_time, reps_summary) = _summary_from_compacted(election_data)
+    else:
+        sources = summarise_sources(election_data.get("votes", {}).get("detail", []))
+        (first_normal_vote_time, first_final_vote_time, last_normal_vote_time,
+         last_final_vote_time, reps_summary) = _summary_from_detail(election_data)
+
+    for account, rep in reps_summary.items():
+        rep["weight"] = weight_str(online_reps.get(account, {}).get("votingweight"))
+        rep["weight_percent"] = online_reps.get(
+            account, {}).get("weight_percent", 0)
+        rep["node_version_telemetry"] = online_reps.get(
+            account, {}).get("node_version_telemetry", "N/A")
+
+    for account, details in online_reps.items():
+        if account not in reps_summary:
+            reps_summary[account] = {
+                "normal_votes": 0,
+                "final_votes": 0,
+                "normal_delay": -1,
+                "final_delay": -1,
+                "account_formatted": known.get(account) or account,
+                "weight": weight_str(details.get("votingweight")),
+                "weight_percent": details.get("weight_percent", 0),
+                "node_version_telemetry": details.get("node_version_telemetry", "N/A")
+            }
+
+    now = int(datetime.now().timestamp() * 1000)
+    last_activity_seconds = (
+        now - (last_final_vote_time or last_normal_vote_time)) // 1000 if (last_final_vote_time or last_normal_vote_time) else "No recent activity"
+    return {
+        "blocks": blocks if blocks else {},
+        "first_seen": first_seen,
+        "confirmation_seen": first_confirmed,
+        "confirmation_duration": confirmation_duration,
+        "first_normal_vote_time": first_normal_vote_time,
+        "first_final_vote_time": first_final_vote_time,
+        "last_normal_vote_time": last_normal_vote_time,
+        "last_final_vote_time": last_final_vote_time,
+        "last_activity": last_activity_seconds,
+        "sources": sources,
+        "summary": reps_summary
+    }
+
+
+def _summary_from_compacted(election_data):
+    votes = election_data["votes"]
+    fields = votes.get("summary_fields", [])
+    reps_summary = {}
+    for account, values in votes.get("summary", {}).items():
+        rep = dict(zip(fields, values))
+        rep["account_formatted"] = known.get(account) or account
+        reps_summary[account] = rep
+    return (votes.get("first_normal_vote_time"), votes.get("first_final_vote_time"),
+            votes.get("last_normal_vote_time"), votes.get("last_final_vote_time"), reps_summary)
+
+
+def _summary_from_detail(election_data):
     votes_detail = election_data.get("votes", {}).get("detail", [])
 
     # Guard against empty detail with if-else statements for time calculations
@@ -38,10 +102,14 @@ def election_formatter(block_data, election_data, online_reps):
                         for vote in votes_detail if vote.get("type") == "normal"]
         final_times = [int(vote["time"])
                        for vote in votes_detail if vote.get("type") == "final"]
+        normal_last_times = [int(vote.get("last_time", vote["time"]))
+                             for vote in votes_detail if vote.get("type") == "normal"]
+        final_last_times = [int(vote.get("last_time", vote["time"]))
+                            for vote in votes_detail if vote.get("type") == "final"]
         first_normal_vote_time = min(normal_times) if normal_times else None
         first_final_vote_time = min(final_times) if final_times else None
-        last_normal_vote_time = max(normal_times) if normal_times else None
-        last_final_vote_time = max(final_times) if final_times else None
+        last_normal_vote_time = max(normal_last_times) if normal_last_times else None
+        last_final_vote_time = max(final_last_times) if final_last_times else None
 
     reps_summary = {}
     for vote in votes_detail:
@@ -53,68 +121,49 @@ def election_formatter(block_data, election_data, online_reps):
 
         vote_time = int(vote.get("time", "0"))
         if vote.get("type") == "normal" and first_normal_vote_time is not None:
-            reps_summary[account]["normal_votes"] += 1
+            reps_summary[account]["normal_votes"] += vote.get("count", 1)
             reps_summary[account]["normal_delay"].append(
                 vote_time - first_normal_vote_time)
         elif vote.get("type") == "final" and first_final_vote_time is not None:
-            reps_summary[account]["final_votes"] += 1
+            reps_summary[account]["final_votes"] += vote.get("count", 1)
             reps_summary[account]["final_delay"].append(
                 vote_time - first_final_vote_time)
 
-    # Calculating average delays
-    for account, rep in reps_summary.items():
+    # Calculating minimal delays
+    for rep in reps_summary.values():
         rep["normal_delay"] = min(
             rep["normal_delay"]) if rep["normal_delay"] else -1
         rep["final_delay"] = min(
             rep["final_delay"]) if rep["final_delay"] else -1
-        rep["weight"] = online_reps.get(account, {}).get("votingweight", 0)
-        rep["weight_percent"] = online_reps.get(
-            account, {}).get("weight_percent", 0)
-        rep["node_version_telemetry"] = online_reps.get(
-            account, {}).get("node_version_telemetry", "N/A")
 
-    for account, details in online_reps.items():
-        if account not in reps_summary:
-            reps_summary[account] = {
-                "normal_votes": 0,
-                "final_votes": 0,
-                "normal_delay": -1,
-                "final_delay": -1,
-                "account_formatted": known.get(account) or account,
-                "weight": details.get("votingweight", 0),
-                "weight_percent": details.get("weight_percent", 0),
-                "node_version_telemetry": details.get("node_version_telemetry", "N/A")
-            }
-
-    now = int(datetime.now().timestamp() * 1000)
-    last_activity_seconds = (
-        now - (last_final_vote_time or last_normal_vote_time)) // 1000 if (last_final_vote_time or last_normal_vote_time) else "No recent activity"
-    return {
-        "blocks": blocks if blocks else {},
-        "first_seen": first_seen,
-        "confirmation_seen": first_confirmed,
-        "confirmation_duration": confirmation_duration,
-        "first_normal_vote_time": first_normal_vote_time,
-        "first_final_vote_time": first_final_vote_time,
-        "last_normal_vote_time": last_normal_vote_time,
-        "last_final_vote_time": last_final_vote_time,
-        "last_activity": last_activity_seconds,
-        "summary": reps_summary
-    }
+    return (first_normal_vote_time, first_final_vote_time,
+            last_normal_vote_time, last_final_vote_time, reps_summary)
 
 
 async def process_data_for_send(data, include_top_voters=5):
-    data_to_send = {}
     online_reps = await get_online_reps()
     quorum = await get_quorum()
     quorum_delta = int(quorum.get("quorum_delta", "1"))
+    return await cpu_executor.map_batches(build_overview_entries, data, online_reps, quorum_delta,
+                                          get_reps_version(), include_top_voters,
+                                          size_of=election_votes, batch_size=CPU_BATCH_VOTES,
+                                          min_size=CPU_OFFLOAD_MIN_VOTES)
 
-    for block_hash, election in data.items():
-        # Initialize data structure
 
+def election_votes(election):
+    return len(election.get("votes", {}).get("detail", ()))
+
+
+def build_overview_entries(data, online_reps, quorum_delta, weight_snapshot, include_top_voters=5):
+    """Overview entries of the merged elections, pure so it can run in a worker process."""
+    data_to_send = {}
+    tallies = tally_weights(data, online_reps)
+
+    for block_hash, election in data.items():
+        normal_weight, final_weight = tallies[block_hash]
         data_to_send[block_hash] = {
-            "normal_weight": 0,
-            "final_weight": 0,
+            "normal_weight": weight_str(normal_weight),
+            "final_weight": weight_str(final_weight),
             "is_active": election.get("is_active", False),
             "is_stopped": election.get("is_stopped", False),
             "is_confirmed": election.get("is_confirmed", False),
@@ -122,31 +171,12 @@ async def process_data_for_send(data, include_top_voters=5):
             "final_votes": election.get("votes", {}).get("final", 0),
             "first_seen":  election["first_seen"],
             "first_confirmed":  election["first_confirmed"],
-            "first_final_voters": []
+            "first_final_voters": [],
+            "weight_snapshot": weight_snapshot
         }
 
-        seen_accounts_normal = set()
-        seen_accounts_final = set()
-        final_voters = []
-
-        # Process votes in a single pass
-
-        for vote in election["votes"]["detail"]:
-            account = vote["account"]
-            current_weight = online_reps.get(
-                account, {}).get("votingweight") or 0
-            vote_type = vote["type"]
-
-            # Handle normal votes
-            if vote_type == "normal" and account not in seen_accounts_normal:
-                data_to_send[block_hash]["normal_weight"] += current_weight
-                seen_accounts_normal.add(account)
-            # Handle final votes
-            elif vote_type == "final":
-                if account not in seen_accounts_final:
-                    data_to_send[block_hash]["final_weight"] += current_weight
-                    seen_accounts_final.add(account)
-                final_voters.append(vote)
+        final_voters = [vote for vote in election["votes"].get("detail", [])
+                        if vote["type"] == "final"]
 
         # Sort and select top final voters after processing all votes
         final_voters_sorted = sorted(final_voters, key=lambda x: x["time"])
@@ -156,8 +186,34 @@ async def process_data_for_send(data, include_top_voters=5):
         ]
         data_to_send[block_hash]["first_final_voters"] = first_final_voter_aliases
         data_to_send[block_hash]["normal_weight_percent"] = (
-            data_to_send[block_hash]["normal_weight"] / quorum_delta) * 100
+            normal_weight / quorum_delta) * 100
         data_to_send[block_hash]["final_weight_percent"] = (
-            data_to_send[block_hash]["final_weight"] / quorum_delta) * 100
+            final_weight / quorum_delta) * 100
 
     return data_to_send
+
+
+async def retally_overview(overview, elections):
+    """
+    Recompute the weights of existing overview entries against the current
+    online weights in one batched pass, tagging them with the new snapshot.
+    """
+    online_reps = await get_online_reps()
+    quorum = await get_quorum()
+    quorum_delta = int(quorum.get("quorum_delta", "1"))
+    weight_snapshot = get_reps_version()
+
+    retallied = {}
+    # Sealed records only keep a per-rep summary, their weights are final
+    live = {block_hash: election for block_hash, election in elections.items() if not election.get("compacted")}
+    for block_hash, (normal_weight, final_weight) in tally_weights(live, online_reps).items():
+        if block_hash not in overview:
+            continue
+        entry = dict(overview[block_hash])
+        entry["normal_weight"] = weight_str(normal_weight)
+        entry["final_weight"] = weight_str(final_weight)
+        entry["normal_weight_percent"] = (normal_weight / quorum_delta) * 100
+        entry["final_weight_percent"] = (final_weight / quorum_delta) * 100
+        entry["weight_snapshot"] = weight_snapshot
+        retallied[block_hash] = entry
+    return retallied
@@ -1,23 +1,438 @@
 from backend.cache_service import CacheInterface
+from backend.metrics import registry
+from asyncio import gather, sleep as aio_sleep
+from collections import OrderedDict
+from copy import deepcopy
+import logging
+import random
+
+logger = logging.getLogger("Quart")
+
+merge_attempts = registry.histogram(
+    "election_merge_attempts", "CAS attempts needed to store an election merge",
+    buckets=(1, 2, 3, 4, 5, 8))
+merge_conflicts = registry.counter(
+    "election_merge_conflicts_total", "Election merges that lost a CAS race", ("outcome",))
+segment_appends = registry.counter(
+    "election_segment_appends_total", "Election deltas appended to a segment log instead of rewriting the record")
+segment_append_failures = registry.counter(
+    "election_segment_append_failures_total", "Segment appends that failed and fell back to rewriting the header")
+segment_compactions = registry.counter(
+    "election_segment_compactions_total", "Segment logs folded back into their election header", ("outcome",))
+
+# Positions in a compacted per-rep summary entry
+SUMMARY_FIELDS = ["normal_votes", "final_votes", "normal_delay", "final_delay"]
+
+
+def summarise_sources(detail):
+    """Per source node: first normal/final vote seen and how many votes it saw before any other node."""
+    sources = {}
+    for vote in detail:
+        arrivals = vote.get("sources")
+        if not arrivals:
+            continue
+        first_key = f"first_{vote['type']}_vote_time"
+        for source, arrival in arrivals.items():
+            summary = sources.setdefault(source, {
+                "first_normal_vote_time": None, "first_final_vote_time": None, "votes": 0, "first_to_see": 0})
+            summary["votes"] += 1
+            if summary[first_key] is None or arrival < summary[first_key]:
+                summary[first_key] = arrival
+        sources[min(arrivals, key=arrivals.get)]["first_to_see"] += 1
+    return sources
+
+
+def compact_election(election):
+    """
+    Rewrite a finished election into a per-representative summary.
+
+    Only what election_formatter needs is kept: each rep's vote counts and the
+    delay of its first normal/final vote, plus the first/last vote times of
+    the election. The raw vote list is dropped.
+    """
+    if election.get("compacted"):
+        return election
+
+    votes = election.get("votes", {})
+    detail = votes.get("detail", [])
+    first = {"normal": None, "final": None}
+    last = {"normal": None, "final": None}
+    for vote in detail:
+        vote_type = vote["type"]
+        vote_time = int(vote["time"])
+        last_time = int(vote.get("last_time", vote_time))
+        if first[vote_type] is None or vote_time < first[vote_type]:
+            first[vote_type] = vote_time
+        if last[vote_type] is None or last_time > last[vote_type]:
+            last[vote_type] = last_time
+
+    summary = {}
+    for vote in detail:
+        vote_type = vote["type"]
+        entry = summary.setdefault(vote["account"], [0, 0, -1, -1])
+        offset = 0 if vote_type == "normal" else 1
+        entry[offset] += vote.get("count", 1)
+        delay = int(vote["time"]) - first[vote_type]
+        if entry[offset + 2] == -1 or delay < entry[offset + 2]:
+            entry[offset + 2] = delay
+
+    compacted = {key: value for key, value in election.items() if key != "votes"}
+    compacted["compacted"] = True
+    compacted["votes"] = {
+        "normal": votes.get("normal", 0),
+        "final": votes.get("final", 0),
+        "first_normal_vote_time": first["normal"],
+        "first_final_vote_time": first["final"],
+        "last_normal_vote_time": last["normal"],
+        "last_final_vote_time": last["final"],
+        "summary_fields": SUMMARY_FIELDS,
+        "summary": summary,
+        "sources": summarise_sources(detail),
+    }
+    return compacted
+
+
+def segment_key(block_hash: str, generation: int) -> str:
+    return f"{block_hash}:s{generation}"
+
+
+def new_segments():
+    """Segment state of a header: the current log, where its unfolded part starts, and the previous log."""
+    return {"generation": 0, "offset": 0, "retired": None}
+
+
+def segment_logs(block_hash, state):
+    """(key, first unfolded frame) of the segment logs an election header points to, oldest first."""
+    logs = [(segment_key(block_hash, state["generation"]), state["offset"])]
+    if state.get("retired"):
+        generation, offset = state["retired"]
+        logs.insert(0, (segment_key(block_hash, generation), offset))
+    return logs
+
+
+def shard_of(block_hash: str, shards: int) -> int:
+    """Stable shard index of a block hash, used to split ingest and merges."""
+    return int(block_hash[-8:], 16) % shards if shards > 1 else 0
 
 
 class ElectionHandler:
-    def __init__(self, cache: CacheInterface):
+    """
+    Merges the aggregated deltas into the stored election records.
+
+    With `segments` enabled, a record is a header plus segment logs: each
+    tick appends its delta to the log instead of rewriting the record, and
+    readers fold the logs into the header (see `load`). Once a header has
+    `compact_after` unfolded segments, or its log grew past `compact_bytes`
+    (memcached refuses appends past its item size limit), the merge rewrites
+    it with them folded in and starts a new log. The previous log stays
+    readable from the folded position until the next compaction deletes
+    it, so a writer that appended to it right before the switch isn't
+    lost. An append that fails anyway is merged into the header with CAS
+    and starts a new log the same way.
+
+    Only the leader merges, so the assembled records of the last
+    `cached_records` elections it merged are kept in `recent` with their log
+    state. Their next deltas are appended without reading anything back;
+    compactions, failed appends and elections not in `recent` read the
+    header and its logs as above. Call `forget` for elections written by
+    something else (sealing) and when another instance may have merged.
+    """
+
+    def __init__(self, cache: CacheInterface, max_retries: int = 5, shards: int = 1,
+                 segments: bool = False, compact_after: int = 32, compact_bytes: int = 512 * 1024,
+                 cached_records: int = 2000):
         self.cache = cache
+        self.max_retries = max_retries
+        self.shards = shards
+        self.segments = segments
+        self.compact_after = compact_after
+        self.compact_bytes = compact_bytes
+        self.cached_records = cached_records
+        # block_hash -> [assembled record, segment state, unfolded segments], least recently merged first
+        self.recent = OrderedDict()
+        # block_hash -> (log generation, bytes appended to it by this instance), oldest first
+        self.log_bytes = OrderedDict()
+        self.max_tracked_logs = 100000
+        # Deltas whose merge kept losing CAS races, retried on the next call
+        self.carry_over = {}
+        # block_hash -> number of lost CAS races, most recent last
+        self.conflicts = OrderedDict()
+        self.max_tracked_conflicts = 1000
+
+    async def merge_elections(self, delta, expire=0):
+        """
+        Merge delta into the stored elections and return the merged ones.
+        Sealed (compacted) records don't take votes and are left out.
+        """
+        if self.carry_over:
+            carried, self.carry_over = self.carry_over, {}
+            self._process_merge(carried, delta)
+            delta = carried
+
+        merge = self._merge_with_segments if self.segments else self._merge_with_cas
+        if self.shards <= 1 or len(delta) < self.shards:
+            return await merge(delta, expire)
+
+        partitions = [{} for _ in range(self.shards)]
+        for block_hash, delta_details in delta.items():
+            partitions[shard_of(block_hash, self.shards)][block_hash] = delta_details
+        merged = {}
+        for result in await gather(*(merge(partition, expire)
+                                     for partition in partitions if partition)):
+            merged.update(result)
+        return merged
+
+    async def _merge_with_cas(self, delta, expire):
+        """
+        Merge delta into the stored elections with gets/cas so concurrent
+        writers never overwrite each other's votes. Keys that lose a race are
+        re-read and merged again, up to max_retries times.
+        """
+        merged = {}
+        pending = delta
+        for attempt in range(1, self.max_retries + 2):
+            stored = await self.cache.gets_multi(list(pending.keys()))
+            current_electins = {key: value for key, (value, _) in stored.items()}
+            self._process_merge(current_electins, pending)
+
+            lost = {}
+            for block_hash, election in current_electins.items():
+                if election.get("compacted"):
+                    # Sealed and compacted records are final, _process_merge left them
+                    # unchanged and there is nothing to re-tally or track
+                    continue
+                if block_hash in stored:
+                    written = await self.cache.cas(block_hash, election, stored[block_hash][1], expire=expire)
+                else:
+                    written = await self.cache.add(block_hash, election, expire=expire)
+                if written:
+                    merged[block_hash] = election
+                    merge_attempts.observe(attempt)
+                else:
+                    lost[block_hash] = pending[block_hash]
+                    self._record_conflict(block_hash)
+
+            if not lost:
+                return merged
+            merge_conflicts.labels("retried").inc(len(lost))
+            pending = lost
+            await aio_sleep(random.uniform(0, 0.005 * attempt))
+
+        merge_conflicts.labels("carried_over").inc(len(pending))
+        logger.warning(f"{len(pending)} election merges kept conflicting, retrying next tick")
+        self.carry_over.update(pending)
+        return merged
+
+    async def _unfolded(self, headers):
+        """block_hash -> (segments not folded into the header yet, length of the current log)."""
+        wanted = {block_hash: segment_logs(block_hash, header["segments"])
+                  for block_hash, header in headers.items()
+                  if header.get("segments") and not header.get("compacted")}
+        stored = await self.cache.get_multi([key for logs in wanted.values() for key, _ in logs])
+        unfolded = {}
+        for block_hash, logs in wanted.items():
+            frames = []
+            for key, offset in logs:
+                frames.extend(stored.get(key, [])[offset:])
+            unfolded[block_hash] = (frames, len(stored.get(logs[-1][0], [])))
+        return unfolded
+
+    async def load(self, block_hashes, logs=None):
+        """
+        Read elections with their segments folded in. If `logs` is given, it
+        receives the segment log keys of each election.
+        """
+        headers = await self.cache.get_multi(list(block_hashes))
+        unfolded = await self._unfolded(headers)
+        for block_hash, header in headers.items():
+            state = header.pop("segments", None)
+            if state and logs is not None:
+                logs[block_hash] = [key for key, _ in segment_logs(block_hash, state)]
+            for frame in unfolded.get(block_hash, ((), 0))[0]:
+                self._process_merge(headers, {block_hash: frame})
+        return headers
+
+    def forget(self, block_hashes=None) -> None:
+        """Drop elections, or all of them, from `recent` so their next merge reads them back."""
+        if block_hashes is None:
+            self.recent.clear()
+            return
+        for block_hash in block_hashes:
+            self.recent.pop(block_hash, None)
+
+    def _remember(self, block_hash, record, state, unfolded) -> None:
+        if not self.cached_records:
+            return
+        self.recent.pop(block_hash, None)
+        self.recent[block_hash] = [record, state, unfolded]
+        if len(self.recent) > self.cached_records:
+            self.recent.popitem(last=False)
+
+    def _due_for_compaction(self, block_hash, state, unfolded) -> bool:
+        generation, size = self.log_bytes.get(block_hash, (None, 0))
+        return unfolded >= self.compact_after or (generation == state["generation"] and size >= self.compact_bytes)
+
+    async def _append_recent(self, delta, merged, expire):
+        """Append the deltas of elections in `recent` that don't need compacting, return the others."""
+        rest = {}
+        for block_hash, delta_details in delta.items():
+            recent = self.recent.get(block_hash)
+            if recent is None or self._due_for_compaction(block_hash, *recent[1:]):
+                rest[block_hash] = delta_details
+                continue
+            record, state, _ = recent
+            delta_details.get("votes", {}).pop("_index", None)
+            if not await self._append(block_hash, state, delta_details, expire):
+                # The full merge falls back to rewriting the header
+                self.forget([block_hash])
+                rest[block_hash] = delta_details
+                continue
+            if self.recent.get(block_hash) is recent:
+                recent[2] += 1
+                self.recent.move_to_end(block_hash)
+            self._process_merge({block_hash: record}, {block_hash: delta_details})
+            merged[block_hash] = record
+        return rest
+
+    async def _merge_with_segments(self, delta, expire):
+        """
+        Append each delta to its election's segment log, so a tick writes
+        its new votes only. New elections are created with add; a lost add
+        means another writer created the header first, and the delta is
+        appended to that one instead.
+        """
+        merged = {}
+        pending = await self._append_recent(delta, merged, expire)
+        for _ in range(2):
+            if not pending:
+                return merged
+            stored = await self.cache.gets_multi(list(pending.keys()))
+            headers = {block_hash: header for block_hash, (header, _) in stored.items()}
+            unfolded = await self._unfolded(headers)
 
-    async def merge_elections(self, delta):
-        # Fetch relevant keys from the cache
-        relevant_keys = delta.keys()
-        current_electins = await self.cache.get_multi(relevant_keys)
-        self._process_merge(current_electins, delta)
-        await self.cache.set_multi(current_electins)
+            lost = {}
+            for block_hash, delta_details in pending.items():
+                delta_details.get("votes", {}).pop("_index", None)
+                if block_hash not in stored:
+                    header = {**delta_details, "segments": new_segments()}
+                    if await self.cache.add(block_hash, header, expire=expire):
+                        merged[block_hash] = delta_details
+                        self._remember(block_hash, delta_details, new_segments(), 0)
+                    else:
+                        lost[block_hash] = delta_details
+                    continue
 
-        return current_electins
+                header = headers[block_hash]
+                if header.get("compacted"):
+                    # Sealed and compacted records are final and stay out of the result
+                    self.forget([block_hash])
+                    continue
+                token = stored[block_hash][1]
+                if "segments" not in header:
+                    # Written before segments were enabled, one last full rewrite starts its log
+                    self._process_merge(headers, {block_hash: delta_details})
+                    if await self.cache.cas(block_hash, {**header, "segments": new_segments()}, token,
+                                            expire=expire):
+                        merged[block_hash] = header
+                        self._remember(block_hash, header, new_segments(), 0)
+                    else:
+                        lost[block_hash] = delta_details
+                    continue
+
+                state = header.pop("segments")
+                frames, log_length = unfolded.get(block_hash, ((), 0))
+                for frame in frames:
+                    self._process_merge(headers, {block_hash: frame})
+
+                appended = await self._append(block_hash, state, delta_details, expire)
+                if not appended:
+                    # Fold everything into the header instead, the delta goes with it
+                    self._process_merge(headers, {block_hash: delta_details})
+                    compacted = await self._compact(block_hash, header, state, log_length, token, expire)
+                    if compacted:
+                        merged[block_hash] = header
+                        self._remember(block_hash, header, compacted, 0)
+                    else:
+                        lost[block_hash] = delta_details
+                    continue
+                compacted = None
+                if len(frames) >= self.compact_after or appended >= self.compact_bytes:
+                    compacted = await self._compact(block_hash, header, state, log_length, token, expire)
+                self._process_merge(headers, {block_hash: delta_details})
+                merged[block_hash] = header
+                if compacted:
+                    # This tick's delta sits in the retired log, past the folded part
+                    self._remember(block_hash, header, compacted, 1)
+                elif len(frames) >= self.compact_after or appended >= self.compact_bytes:
+                    # Another writer changed the header
+                    self.forget([block_hash])
+                else:
+                    self._remember(block_hash, header, state, len(frames) + 1)
+
+            if not lost:
+                return merged
+            merge_conflicts.labels("retried").inc(len(lost))
+            pending = lost
+
+        merge_conflicts.labels("carried_over").inc(len(pending))
+        self.carry_over.update(pending)
+        return merged
+
+    async def _append(self, block_hash, state, delta_details, expire):
+        """Append a delta to the election's current log, return the log's size in bytes so far or 0 if it failed."""
+        generation = state["generation"]
+        try:
+            appended = await self.cache.append(segment_key(block_hash, generation), [delta_details],
+                                               expire=expire)
+        except Exception as exc:
+            logger.warning(f"Appending to the segment log of {block_hash} failed: {exc}")
+            appended = 0
+        if not appended:
+            segment_append_failures.inc()
+            return 0
+        segment_appends.inc()
+        tracked_generation, size = self.log_bytes.pop(block_hash, (generation, 0))
+        # Logs of other writers or from before a restart are only known by what we appended
+        size = size + appended if tracked_generation == generation else appended
+        self.log_bytes[block_hash] = (generation, size)
+        if len(self.log_bytes) > self.max_tracked_logs:
+            self.log_bytes.popitem(last=False)
+        return size
+
+    async def _compact(self, block_hash, header, state, log_length, token, expire):
+        """
+        Rewrite the header with the segments read so far folded in and switch
+        to a new log. Returns the new segment state, None if the CAS failed.
+        """
+        compacted = deepcopy(header)
+        compacted["segments"] = new_state = {"generation": state["generation"] + 1, "offset": 0,
+                                             "retired": [state["generation"], log_length]}
+        if not await self.cache.cas(block_hash, compacted, token, expire=expire):
+            # Another writer changed the header, it compacts or we retry next time
+            segment_compactions.labels("conflict").inc()
+            return None
+        segment_compactions.labels("compacted").inc()
+        self.log_bytes.pop(block_hash, None)
+        if state.get("retired"):
+            # Folded in completely by now
+            await self.cache.drop(segment_key(block_hash, state["retired"][0]))
+        return new_state
+
+    def _record_conflict(self, block_hash):
+        self.conflicts[block_hash] = self.conflicts.pop(block_hash, 0) + 1
+        if len(self.conflicts) > self.max_tracked_conflicts:
+            self.conflicts.popitem(last=False)
 
     def _process_merge(self, current_electins, delta):
         for block_hash, delta_details in delta.items():
+            # Drop the ingest-side lookup of (account, vote type) -> vote
+            delta_details.get("votes", {}).pop("_index", None)
+
             if block_hash not in current_electins:
                 current_electins[block_hash] = delta_details
+            elif current_electins[block_hash].get("compacted"):
+                # Sealed and compacted records are final
+                continue
             else:
                 merge_details = current_electins[block_hash]
                 merge_details["first_confirmed"] = merge_details["first_confirmed"] or delta_details["first_confirmed"]
@@ -40,8 +455,8 @@ class ElectionHandler:
                     merge_details["votes"][vote_type] += delta_details.get(
                         "votes", {}).get(vote_type, 0)
 
-                merge_details["votes"]["detail"].extend(
-                    delta_details.get("votes", {}).get("detail", []))
+                self._merge_vote_detail(merge_details["votes"],
+                                        delta_details.get("votes", {}))
 
                 # Update the flags directly in merge_details
                 is_stopped = delta_details.get("is_stopped", False)
@@ -59,3 +474,44 @@ class ElectionHandler:
                 elif is_active:
                     merge_details["is_stopped"] = False
                     merge_details["is_active"] = True
+
+    def _merge_vote_detail(self, votes, delta_votes):
+        """Fold new (account, vote type) entries into the stored ones, keeping one entry per pair."""
+        detail = votes["detail"]
+        incoming = {"normal": {}, "final": {}}
+        for vote in delta_votes.get("detail", []):
+            incoming[vote["type"]][vote["account"]] = vote
+
+        needs_sort = False
+        for existing in detail:
+            vote = incoming[existing["type"]].pop(existing["account"], None)
+            if vote is None:
+                continue
+            count = vote.get("count", 1)
+            if "sources" in vote and "sources" in existing:
+                sources = existing["sources"]
+                # The delta counted its first node's first copy and no other node's. Against the
+                # stored vote, a first copy only counts for nodes that had already sent it
+                count += sum(1 for source in vote["sources"] if source in sources) - 1
+                votes[existing["type"]] += count - vote.get("count", 1)
+            existing["count"] = existing.get("count", 1) + count
+            existing["last_time"] = max(existing.get("last_time", existing["time"]),
+                                        vote.get("last_time", vote["time"]))
+            if "sources" in vote:
+                sources = existing.setdefault("sources", {})
+                for source, arrival in vote["sources"].items():
+                    sources[source] = min(sources.get(source, arrival), arrival)
+            if vote["time"] < existing["time"]:
+                existing["time"] = vote["time"]
+                needs_sort = True
+
+        for vote_type in ("normal", "final"):
+            for vote in incoming[vote_type].values():
+                if detail and detail[-1]["time"] > vote["time"]:
+                    needs_sort = True
+                detail.append(vote)
+        if needs_sort:
+            detail.sort(key=lambda x: x["time"])
+
+        if "raw" in delta_votes:
+            votes.setdefault("raw", []).extend(delta_votes["raw"])
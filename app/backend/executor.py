@@ -0,0 +1,128 @@
+from backend.metrics import registry
+from asyncio import gather, get_running_loop
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+from os import getenv, getpid
+import logging
+
+logger = logging.getLogger("Quart")
+
+# "inline" runs CPU-bound transforms on the event loop, "process" in worker
+# processes and "thread" in a thread pool (still sharing the GIL, only for
+# comparison). Inline is the default: the process pool cuts the longest
+# stalls, but pickling every large tick adds to the usual ones and worsened
+# the p99 timer lateness in benchmarks.ingest_jitter (12.9 -> 34.5 ms).
+CPU_EXECUTOR = getenv("CPU_EXECUTOR", "inline")
+CPU_WORKERS = int(getenv("CPU_WORKERS", 2))
+CPU_START_METHOD = getenv("CPU_START_METHOD", "spawn")
+# Smaller jobs run inline, shipping their inputs to a worker would cost more
+# than it saves. See benchmarks.ingest_jitter.
+CPU_OFFLOAD_MIN_VOTES = int(getenv("CPU_OFFLOAD_MIN_VOTES", 2000))
+CPU_OFFLOAD_MIN_ENTRIES = int(getenv("CPU_OFFLOAD_MIN_ENTRIES", 2000))
+# Pickling a job's input is one C call that holds the GIL, so large inputs are
+# split into batches of about this many votes, which also spreads them over the workers
+CPU_BATCH_VOTES = int(getenv("CPU_BATCH_VOTES", 10000))
+
+cpu_task_seconds = registry.histogram(
+    "cpu_task_seconds", "Time callers waited for a CPU-bound transform", ("task", "executor"))
+cpu_tasks_inflight = registry.gauge(
+    "cpu_tasks_inflight", "CPU-bound transforms submitted to the pool and not done yet")
+cpu_pool_restarts = registry.counter(
+    "cpu_pool_restarts_total", "Worker pools replaced after a worker died")
+
+
+class CpuExecutor:
+    """
+    Runs pure CPU-bound functions off the event loop.
+
+    Functions and their arguments must be picklable for the process pool:
+    module level functions over plain dicts, lists and numbers. They must
+    not touch metrics either, updates would be lost in a worker process and
+    made off the loop thread in a thread pool; they return what to count
+    and the caller counts it. The loop only waits on a future. The pool's
+    feeder thread pickles the arguments in one C call that holds the GIL,
+    so big inputs go through map_batches. If a worker dies, the pool is
+    replaced and the job runs inline.
+    """
+
+    def __init__(self, kind: str = "inline", workers: int = 2, start_method: str = "spawn"):
+        self.kind = kind
+        self.workers = workers
+        self.start_method = start_method
+        self._executor: Optional[Executor] = None
+        self._inflight = 0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context(self.start_method))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="cpu")
+        return self._executor
+
+    async def start(self) -> None:
+        """Start the workers now instead of on the first job, spawning them takes a moment."""
+        if self.kind == "inline":
+            return
+        loop = get_running_loop()
+        for _ in range(self.workers):
+            await loop.run_in_executor(self._pool(), getpid)
+
+    async def run(self, func: Callable[..., Any], *args, size: int = None, min_size: int = 0) -> Any:
+        """Call func(*args) in the pool, or inline for the inline executor or jobs below min_size."""
+        start = perf_counter()
+        if self.kind == "inline" or (size is not None and size < min_size):
+            result = func(*args)
+            cpu_task_seconds.labels(func.__name__, "inline").observe(perf_counter() - start)
+            return result
+
+        self._inflight += 1
+        cpu_tasks_inflight.set(self._inflight)
+        try:
+            result = await get_running_loop().run_in_executor(self._pool(), func, *args)
+        except BrokenProcessPool:
+            logger.warning(f"CPU worker pool broke while running {func.__name__}, replacing it")
+            cpu_pool_restarts.inc()
+            self._executor = None
+            result = func(*args)
+        finally:
+            self._inflight -= 1
+            cpu_tasks_inflight.set(self._inflight)
+        cpu_task_seconds.labels(func.__name__, self.kind).observe(perf_counter() - start)
+        return result
+
+    async def map_batches(self, func: Callable[..., Dict], mapping: Dict, *args,
+                          size_of: Callable[[Any], int], batch_size: int, min_size: int = 0) -> Dict:
+        """
+        func(mapping, *args) for a func that maps each entry independently,
+        run as batches of about `batch_size` (measured with size_of) in parallel.
+        """
+        batches, batch, batch_total, total = [], {}, 0, 0
+        for key, value in mapping.items():
+            batch[key] = value
+            size = size_of(value)
+            batch_total += size
+            total += size
+            if batch_total >= batch_size:
+                batches.append(batch)
+                batch, batch_total = {}, 0
+        if batch:
+            batches.append(batch)
+        if len(batches) <= 1 or self.kind == "inline" or total < min_size:
+            return await self.run(func, mapping, *args, size=total, min_size=min_size)
+
+        merged = {}
+        for result in await gather(*(self.run(func, batch, *args) for batch in batches)):
+            merged.update(result)
+        return merged
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+cpu_executor = CpuExecutor(CPU_EXECUTOR, CPU_WORKERS, CPU_START_METHOD)
@@ -1,9 +1,19 @@
+from backend.metrics import ws_messages, ws_source_messages
+
+
 class MessageCounter:
-    def __init__(self, logger):
+    def __init__(self, logger, source=None):
         self.count = 0
         self.logger = logger
+        self.source = source
+        self.source_counter = ws_source_messages.labels(source or "default")
 
-    def increment(self, log_interval=1000):
+    def increment(self, topic=None, log_interval=1000):
         self.count += 1
+        ws_messages.labels(topic or "unknown").inc()
+        self.source_counter.inc()
         if self.count % log_interval == 0:
-            self.logger.info(self.count)
+            if self.source:
+                self.logger.info(f"{self.source}: {self.count}")
+            else:
+                self.logger.info(self.count)
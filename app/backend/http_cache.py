@@ -0,0 +1,99 @@
+from backend.metrics import registry
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses fall back to gzip
+    brotli = None
+
+# Bodies smaller than this aren't worth the compression overhead
+MIN_COMPRESS_BYTES = 1024
+
+http_request_seconds = registry.histogram(
+    "http_request_seconds", "Latency of HTTP endpoints by response cache result", ("endpoint", "cache"))
+http_response_bytes = registry.counter(
+    "http_response_bytes_total", "Body bytes sent by encoding", ("endpoint", "encoding"))
+http_compression_saved_bytes = registry.counter(
+    "http_compression_saved_bytes_total", "Bytes saved by compressing response bodies", ("endpoint",))
+
+
+class RenderedResponse:
+    """A rendered body with its encodings, compressed on first request for each."""
+    __slots__ = ("body", "content_type", "created", "encoded")
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.created = monotonic()
+        self.encoded: Dict[str, bytes] = {"identity": body}
+
+    def encode(self, accepted) -> Tuple[str, bytes]:
+        """Pick the best encoding `accepted` allows (a werkzeug Accept of encodings)."""
+        if len(self.body) < MIN_COMPRESS_BYTES:
+            return "identity", self.body
+        if brotli is not None and accepted.quality("br") > 0:
+            encoding = "br"
+        elif accepted.quality("gzip") > 0:
+            encoding = "gzip"
+        else:
+            return "identity", self.body
+
+        body = self.encoded.get(encoding)
+        if body is None:
+            if encoding == "br":
+                body = brotli.compress(self.body, quality=5)
+            else:
+                body = gzip.compress(self.body, compresslevel=6)
+            self.encoded[encoding] = body
+        return encoding, body
+
+
+class ResponseCache:
+    """
+    LRU of rendered responses keyed by whatever identifies their content.
+
+    Entries also expire after `ttl` seconds so time-relative fields of a
+    cached page, like seconds since the last vote, don't go stale for long.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl: int = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Any, RenderedResponse]" = OrderedDict()
+
+    def get(self, key) -> Optional[RenderedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if monotonic() - entry.created > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: RenderedResponse) -> RenderedResponse:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+
+def election_version(election: Dict[str, Any]) -> Tuple:
+    """Changes whenever a merge changed what the detail pages show."""
+    votes = election.get("votes", {})
+    return (votes.get("normal"), votes.get("final"), election.get("first_confirmed"),
+            election.get("is_confirmed"), election.get("compacted", False))
+
+
+def make_etag(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Strong ETag of one encoding of a response, each encoding is a separate representation."""
+    return f'"{etag}"' if encoding == "identity" else f'"{etag}-{encoding}"'
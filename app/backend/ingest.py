@@ -0,0 +1,211 @@
+from backend.metrics import registry
+from backend import rpc_client
+from asyncio import Event, sleep as aio_sleep
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger("Quart")
+
+FINAL_VOTE_TIMESTAMP = "18446744073709551615"
+EVENT_TOPICS = ("started_election", "stopped_election", "confirmation")
+
+ingest_queue_depth = registry.gauge(
+    "ingest_queue_depth", "Messages waiting to be processed", ("queue",))
+ingest_overloaded = registry.gauge(
+    "ingest_overloaded", "1 while the vote queue is over its overload depth")
+ingest_shed = registry.counter(
+    "ingest_shed_total", "Votes dropped under overload", ("reason",))
+ingest_lost = registry.counter(
+    "ingest_votes_lost_total", "Votes shed before any copy got in, or failing to process, their weight is missing until a rebroadcast gets in",
+    ("reason",))
+ingest_deferred = registry.counter(
+    "ingest_deferred_total", "Votes of low-weight reps moved behind all other traffic")
+
+
+class PriorityIngest:
+    """
+    Queues node messages between the websocket listeners and `process`.
+
+    Election events (started, stopped, confirmation) always go first, they
+    drive the overview's state flags. Votes are processed in order while the
+    vote queue stays under `overload_depth`. Past it, the node is sending
+    more than we keep up with and votes are shed, cheapest first:
+
+    - a rebroadcast of a (rep, block, vote type) already ingested doesn't
+      change any weight, only every `repeat_sample`-th one is kept,
+    - votes of reps under `defer_weight_percent` of online weight wait in
+      a separate queue that is only drained when nothing else is pending,
+      and is dropped from when it overflows,
+    - once `max_queue` votes are pending, new votes are dropped.
+
+    Every shed vote is counted by reason, and the ones that weren't a
+    rebroadcast are also counted as lost. A lost vote's keys are forgotten,
+    so the next rebroadcast of it is queued and its weight still counts.
+    A vote that fails to process is logged and lost the same way, the rest
+    of its batch is still processed.
+    """
+
+    def __init__(self, process: Callable[[Dict[str, Any], Optional[str]], Awaitable[None]], lock,
+                 max_queue: int = 100000, overload_depth: int = 5000, batch_size: int = 500,
+                 repeat_sample: int = 10, defer_weight_percent: float = 0.1,
+                 max_deferred: int = 20000, max_seen: int = 500000):
+        self.process = process
+        self.lock = lock
+        self.max_queue = max_queue
+        self.overload_depth = overload_depth
+        self.batch_size = batch_size
+        self.repeat_sample = repeat_sample
+        self.defer_weight_percent = defer_weight_percent
+        self.max_deferred = max_deferred
+        self.max_seen = max_seen
+
+        self.events = deque()
+        self.votes = deque()
+        self.deferred = deque()
+        # (account, block_hash, vote type) -> times seen, oldest first
+        self.seen: "OrderedDict[tuple, int]" = OrderedDict()
+        self._low_weight = set()
+        self._low_weight_version = None
+        self._ready = Event()
+
+        self._shed_repeat = ingest_shed.labels("repeat")
+        self._shed_deferred = ingest_shed.labels("deferred_overflow")
+        self._shed_full = ingest_shed.labels("queue_full")
+        self._lost_deferred = ingest_lost.labels("deferred_overflow")
+        self._lost_full = ingest_lost.labels("queue_full")
+        self._lost_failed = ingest_lost.labels("failed")
+
+    @property
+    def overloaded(self) -> bool:
+        return len(self.votes) >= self.overload_depth
+
+    def submit(self, message: Dict[str, Any], source: str = None) -> None:
+        if message.get("topic") in EVENT_TOPICS:
+            self.events.append((message, source))
+        elif message.get("topic") == "vote":
+            self._submit_vote(message, source)
+        else:
+            return
+        self._ready.set()
+
+    def _submit_vote(self, message, source):
+        keys = self._vote_keys(message)
+        if not self.overloaded:
+            self._remember(keys)
+            self.votes.append((message, source))
+            return
+
+        repeat = self._is_repeat(keys)
+        if repeat:
+            self._remember(keys)
+            if self.seen[keys[0]] % self.repeat_sample != 0:
+                self._shed_repeat.inc()
+                return
+        if len(self.votes) >= self.max_queue:
+            self._shed_full.inc()
+            if not repeat:
+                self._lost_full.inc()
+            return
+        if not repeat:
+            self._remember(keys)
+        if self._is_low_weight(message["message"].get("account")):
+            if len(self.deferred) >= self.max_deferred:
+                self._drop_deferred()
+            self.deferred.append((message, source, repeat))
+            ingest_deferred.inc()
+            return
+        self.votes.append((message, source))
+
+    def _drop_deferred(self):
+        message, _, repeat = self.deferred.popleft()
+        self._shed_deferred.inc()
+        if not repeat:
+            self._lost_deferred.inc()
+            self._forget(self._vote_keys(message))
+
+    def _vote_keys(self, message):
+        msg = message["message"]
+        vote_type = "final" if msg.get("timestamp") == FINAL_VOTE_TIMESTAMP else "normal"
+        return [(msg.get("account"), block_hash, vote_type) for block_hash in msg.get("blocks", ())]
+
+    def _remember(self, keys):
+        for key in keys:
+            self.seen[key] = self.seen.pop(key, 0) + 1
+        while len(self.seen) > self.max_seen:
+            self.seen.popitem(last=False)
+
+    def _forget(self, keys):
+        for key in keys:
+            self.seen.pop(key, None)
+
+    def _is_repeat(self, keys) -> bool:
+        """Tell whether every vote in the message was already ingested, shedding it loses no weight."""
+        return bool(keys) and all(key in self.seen for key in keys)
+
+    def _is_low_weight(self, account) -> bool:
+        online_reps = rpc_client.online_reps
+        if not online_reps:
+            # Nothing to rank by until the first weights refresh
+            return False
+        version = rpc_client.get_reps_version()
+        if version != self._low_weight_version:
+            self._low_weight = {rep_account for rep_account, rep in online_reps.items()
+                                if (rep.get("weight_percent") or 0) < self.defer_weight_percent}
+            self._low_weight_version = version
+        # Reps that aren't online carry no weight at all
+        return account in self._low_weight or account not in online_reps
+
+    def _next_batch(self):
+        batch = []
+        while self.events and len(batch) < self.batch_size:
+            batch.append(self.events.popleft())
+        while self.votes and len(batch) < self.batch_size:
+            batch.append(self.votes.popleft())
+        if not batch:
+            while self.deferred and len(batch) < self.batch_size:
+                message, source, _ = self.deferred.popleft()
+                batch.append((message, source))
+        return batch
+
+    def _update_gauges(self):
+        ingest_queue_depth.labels("events").set(len(self.events))
+        ingest_queue_depth.labels("votes").set(len(self.votes))
+        ingest_queue_depth.labels("deferred").set(len(self.deferred))
+        ingest_overloaded.set(1 if self.overloaded else 0)
+
+    def _fail(self, message, exc):
+        logger.warning(f"Ingesting a {message.get('topic')} message failed: {exc}")
+        if message.get("topic") == "vote":
+            self._lost_failed.inc()
+            self._forget(self._vote_keys(message))
+
+    async def process_batch(self) -> int:
+        batch = self._next_batch()
+        if batch:
+            async with self.lock:
+                for message, source in batch:
+                    try:
+                        await self.process(message, source)
+                    except Exception as exc:
+                        self._fail(message, exc)
+        self._update_gauges()
+        return len(batch)
+
+    async def run(self) -> None:
+        while True:
+            await self._ready.wait()
+            try:
+                processed = await self.process_batch()
+            except Exception as exc:
+                logger.warning(f"Ingesting a message batch failed: {exc}")
+                processed = 1
+            if not processed:
+                self._ready.clear()
+            # Let the listeners and the aggregator in between batches
+            await aio_sleep(0)
+
+    async def drain(self) -> None:
+        """Process everything queued, including deferred votes."""
+        while await self.process_batch():
+            pass
@@ -0,0 +1,94 @@
+from backend.cache_service import CacheInterface
+from backend.metrics import registry
+from backend.supervisor import heartbeat
+from asyncio import Event, sleep as aio_sleep
+from os import getpid
+from socket import gethostname
+import logging
+
+logger = logging.getLogger("Quart")
+
+is_leader_gauge = registry.gauge(
+    "leader", "1 if this instance holds the ingest leadership lease")
+leader_transitions = registry.counter(
+    "leader_transitions_total", "Leadership changes of this instance", ("event",))
+
+
+def default_instance_id() -> str:
+    return f"{gethostname()}-{getpid()}"
+
+
+class LeaderLease:
+    """
+    Single-writer lease over the shared cache.
+
+    The lease is a key holding the owner's instance id with a short expiry.
+    It is taken with an atomic add and renewed with compare-and-swap by its
+    owner well before it expires. When the leader dies the key expires and
+    another instance takes over within `ttl` seconds; a graceful shutdown
+    releases it immediately.
+    """
+
+    def __init__(self, cache: CacheInterface, key: str = "leader",
+                 ttl: int = 6, instance_id: str = None):
+        self.cache = cache
+        self.key = key
+        self.ttl = ttl
+        self.renew_interval = max(1, ttl / 3)
+        self.instance_id = instance_id or default_instance_id()
+        self._leader = Event()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.is_set()
+
+    async def current_leader(self) -> str:
+        """Instance id of the lease owner, None while nobody holds it."""
+        if self.is_leader:
+            return self.instance_id
+        return await self.cache.get(self.key)
+
+    async def wait_for_leadership(self) -> None:
+        await self._leader.wait()
+
+    async def _try_acquire(self) -> bool:
+        return await self.cache.add(self.key, self.instance_id, expire=self.ttl)
+
+    async def _renew(self) -> bool:
+        owner, token = (await self.cache.gets_multi([self.key])).get(self.key, (None, None))
+        if owner != self.instance_id:
+            return False
+        # Fails if another instance took the lease between our read and write
+        return await self.cache.cas(self.key, self.instance_id, token, expire=self.ttl)
+
+    def _set_leader(self, leader: bool) -> None:
+        if leader == self.is_leader:
+            return
+        if leader:
+            self._leader.set()
+            logger.info(f"Instance {self.instance_id} acquired the leader lease")
+        else:
+            self._leader.clear()
+            logger.warning(f"Instance {self.instance_id} lost the leader lease")
+        is_leader_gauge.set(1 if leader else 0)
+        leader_transitions.labels("acquired" if leader else "lost").inc()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if self.is_leader:
+                    self._set_leader(await self._renew())
+                else:
+                    self._set_leader(await self._try_acquire())
+            except Exception as exc:
+                # Without the cache we can't prove we still own the lease
+                logger.warning(f"Leader lease check failed: {exc}")
+                self._set_leader(False)
+            heartbeat()
+            await aio_sleep(self.renew_interval)
+
+    async def release(self) -> None:
+        if self.is_leader:
+            self._set_leader(False)
+            if await self.cache.get(self.key) == self.instance_id:
+                await self.cache.drop(self.key)
@@ -0,0 +1,160 @@
+from backend.cache_service import CacheInterface
+from backend.elections import ElectionHandler, compact_election
+from backend.metrics import registry
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List
+
+ACTIVE = "active"
+FINALIZED = "finalized"
+SEALED = "sealed"
+
+late_votes_total = registry.counter(
+    "election_late_votes_total", "Votes that arrived after their election was sealed")
+elections_by_state = registry.gauge(
+    "elections_tracked", "Elections tracked by the lifecycle manager", ("state",))
+elections_sealed_total = registry.counter(
+    "elections_sealed_total", "Elections that left the late-vote window")
+elections_evicted_total = registry.counter(
+    "elections_evicted_total", "Sealed elections dropped after their retention period")
+
+
+def now_ms() -> int:
+    return int(datetime.now().timestamp() * 1000)
+
+
+class ElectionLifecycle:
+    """
+    Tracks every election through active -> finalized -> sealed.
+
+    Finalized elections still accept late votes for `late_vote_window` seconds.
+    Once sealed, the stored record is compacted into a per-rep summary, given
+    its retention expiry and never written again. Further votes only bump a
+    counter on a compact tombstone until the tombstone itself is evicted after
+    `retention` seconds or when more than `max_tombstones` are held.
+    """
+
+    def __init__(self, cache: CacheInterface,
+                 late_vote_window: int = 120,
+                 stale_after: int = 900,
+                 retention: int = 86400,
+                 max_tombstones: int = 500000,
+                 store: ElectionHandler = None):
+        self.cache = cache
+        # Reads records through the handler when they may have segment logs
+        self.store = store
+        self.late_vote_window = late_vote_window * 1000
+        self.stale_after = stale_after * 1000
+        self.retention = retention
+        self.max_tombstones = max_tombstones
+        # block_hash -> [state, last_activity_ms, finalized_at_ms]
+        self.elections: Dict[str, List[Any]] = {}
+        # block_hash -> [sealed_at_ms, late_votes], oldest first
+        self.tombstones: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    @property
+    def record_expire(self) -> int:
+        """Expiry for records written while the election is still open."""
+        return self.retention
+
+    def state(self, block_hash: str) -> str:
+        if block_hash in self.tombstones:
+            return SEALED
+        election = self.elections.get(block_hash)
+        return election[0] if election else None
+
+    def accept(self, block_hash: str) -> bool:
+        """Return False for messages targeting a sealed election and count them on its tombstone."""
+        tombstone = self.tombstones.get(block_hash)
+        if tombstone is None:
+            return True
+        tombstone[1] += 1
+        late_votes_total.inc()
+        return False
+
+    def track(self, updated_elections: Dict[str, Any], now: int = None) -> None:
+        now = now or now_ms()
+        for block_hash, election in updated_elections.items():
+            if block_hash in self.tombstones:
+                continue
+            tracked = self.elections.get(block_hash)
+            if tracked is None:
+                tracked = self.elections[block_hash] = [ACTIVE, now, None]
+            tracked[1] = now
+            if tracked[0] == ACTIVE and (election.get("is_confirmed") or election.get("is_stopped")):
+                tracked[0] = FINALIZED
+                tracked[2] = now
+
+    def describe(self, block_hash: str) -> Dict[str, Any]:
+        tombstone = self.tombstones.get(block_hash)
+        if tombstone is not None:
+            return {"state": SEALED, "sealed_at": tombstone[0], "late_votes": tombstone[1]}
+        election = self.elections.get(block_hash)
+        if election is None:
+            return {"state": None}
+        return {"state": election[0], "finalized_at": election[2]}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"elections": self.elections, "tombstones": list(self.tombstones.items())}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.elections.update(state.get("elections", {}))
+        for block_hash, tombstone in state.get("tombstones", []):
+            self.elections.pop(block_hash, None)
+            self.tombstones[block_hash] = tombstone
+
+    def _due_for_sealing(self, now: int) -> List[str]:
+        due = []
+        for block_hash, (state, last_activity, finalized_at) in self.elections.items():
+            if state == FINALIZED and now - finalized_at >= self.late_vote_window:
+                due.append(block_hash)
+            elif state == ACTIVE and now - last_activity >= self.stale_after:
+                due.append(block_hash)
+        return due
+
+    async def seal(self, block_hashes: List[str], now: int) -> None:
+        if not block_hashes:
+            return
+        for block_hash in block_hashes:
+            del self.elections[block_hash]
+            self.tombstones[block_hash] = [now, 0]
+
+        logs = {}
+        if self.store:
+            # Merges must see the compacted records, not what they last wrote
+            self.store.forget(block_hashes)
+            records = await self.store.load(block_hashes, logs)
+        else:
+            records = await self.cache.get_multi(block_hashes)
+        # Their encoded size is recorded by the cache as it writes them, see election_record_bytes
+        compacted = {block_hash: compact_election(record) for block_hash, record in records.items()}
+        await self.cache.set_multi(compacted, expire=self.retention)
+        # Folded into the compacted records
+        await self.cache.drop_multi([key for keys in logs.values() for key in keys])
+        elections_sealed_total.inc(len(block_hashes))
+
+    async def evict(self, now: int) -> None:
+        expired = []
+        retention_ms = self.retention * 1000
+        while self.tombstones:
+            block_hash, (sealed_at, _) = next(iter(self.tombstones.items()))
+            if now - sealed_at < retention_ms and len(self.tombstones) <= self.max_tombstones:
+                break
+            self.tombstones.popitem(last=False)
+            expired.append(block_hash)
+        if expired:
+            await self.cache.drop_multi(expired)
+            elections_evicted_total.inc(len(expired))
+
+    async def sweep(self, now: int = None) -> List[str]:
+        """Seal and evict what is due, return the elections sealed."""
+        now = now or now_ms()
+        sealed = self._due_for_sealing(now)
+        await self.seal(sealed, now)
+        await self.evict(now)
+
+        active = sum(1 for election in self.elections.values() if election[0] == ACTIVE)
+        elections_by_state.labels(ACTIVE).set(active)
+        elections_by_state.labels(FINALIZED).set(len(self.elections) - active)
+        elections_by_state.labels(SEALED).set(len(self.tombstones))
+        return sealed
@@ -0,0 +1,202 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Tuple
+
+# All metrics are updated from the event loop thread only, so plain attribute
+# updates are safe and no locking is needed in the hot path.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start)
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self.children[()] = self._new_child()
+
+    @abstractmethod
+    def _new_child(self):
+        pass
+
+    def labels(self, *labelvalues):
+        child = self.children.get(labelvalues)
+        if child is None:
+            child = self.children[labelvalues] = self._new_child()
+        return child
+
+    def __getattr__(self, attr):
+        # Unlabelled metrics forward inc/set/observe/time to their only child
+        if attr in ("inc", "dec", "set", "observe", "time", "value") and not self.labelnames:
+            return getattr(self.children[()], attr)
+        raise AttributeError(attr)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labelvalues, child in self.children.items():
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+    def _render_child(self, labelvalues, child):
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, labelvalues, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.metrics.get(name) or self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.metrics.get(name) or self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.get(name) or self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+ws_messages = registry.counter(
+    "nano_ws_messages_total", "Messages received from the node websocket", ("topic",))
+ws_source_messages = registry.counter(
+    "nano_ws_source_messages_total", "Messages received per node websocket", ("source",))
+aggregation_tick_seconds = registry.histogram(
+    "aggregation_tick_seconds", "Duration of a full aggregation tick")
+aggregation_stage_seconds = registry.histogram(
+    "aggregation_stage_seconds", "Duration of each aggregation stage", ("stage",))
+aggregation_delta_elections = registry.histogram(
+    "aggregation_delta_elections", "Elections updated per aggregation tick", buckets=SIZE_BUCKETS)
+aggregation_delta_votes = registry.histogram(
+    "aggregation_delta_votes", "Votes ingested per aggregation tick", buckets=SIZE_BUCKETS)
+cache_operation_seconds = registry.histogram(
+    "cache_operation_seconds", "Latency of cache operations", ("prefix", "operation"))
+cache_lookups = registry.counter(
+    "cache_lookups_total", "Cache key lookups by result", ("prefix", "result"))
+broadcast_fanout_seconds = registry.histogram(
+    "broadcast_fanout_seconds", "Time to send an overview update to all clients")
+connected_clients = registry.gauge(
+    "connected_clients", "Websocket clients currently connected")
+rpc_call_seconds = registry.histogram(
+    "rpc_call_seconds", "Latency of node RPC calls", ("method",))
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds", "Delay between a scheduled wakeup and the actual wakeup")
+event_loop_lag_current = registry.gauge(
+    "event_loop_lag_current_seconds", "Most recent event loop lag sample")
@@ -1,11 +1,46 @@
 
 from backend.cache_service import CacheInterface
-from typing import Any, Dict, Tuple
+from backend.codec import codec_fallbacks, dumps_sorted_uncounted, weight_int
+from backend.executor import cpu_executor, CPU_OFFLOAD_MIN_ENTRIES
+from typing import Any, Dict, List, Optional, Tuple
 import hashlib
-import json
 from datetime import datetime
 
 
+def sort_elections_by_key(elections: Dict[str, Any], key: str) -> Dict[str, Any]:
+    return dict(sorted(elections.items(), key=lambda x: x[1].get(key, 0), reverse=True))
+
+
+def sort_elections_by_weights(elections: Dict[str, Any]) -> Dict[str, Any]:
+    # Weights are decimal strings, see backend.codec
+    return dict(sorted(elections.items(),
+                       key=lambda x: (weight_int(x[1].get("normal_weight")),
+                                      weight_int(x[1].get("final_weight"))),
+                       reverse=True))
+
+
+def order_overview(overview: Dict[str, Any]) -> Tuple[str, List[str], List[str], int]:
+    """
+    Hash of the overview, its confirmed and unconfirmed keys in display
+    order, and the codec fallbacks the hash needed (counted by the caller).
+    """
+    confirmed_elections = {}
+    unconfirmed_elections = {}
+    for block_hash, details in overview.items():
+        if details.get("is_confirmed", False):
+            confirmed_elections[block_hash] = details
+        else:
+            unconfirmed_elections[block_hash] = details
+
+    # Hash the overview without the removed time metrics for a stable comparison.
+    encoded, fallbacks = dumps_sorted_uncounted(overview)
+    current_hash = hashlib.sha256(encoded).hexdigest()
+    return (current_hash,
+            list(sort_elections_by_key(confirmed_elections, 'first_seen')),
+            list(sort_elections_by_weights(unconfirmed_elections)),
+            fallbacks)
+
+
 class OverviewHandler:
     def __init__(self, cache: CacheInterface):
         self.cache = cache
@@ -17,14 +52,12 @@ class OverviewHandler:
         merged_overview = await self.retrieve_election_data()  # Assumes retrieval is adjusted to return the merged overview directly
         current_hash = await self.update_overview_data(
             merged_overview, updated_overview)
+        await self.cache_overview_hash(current_hash)
         return current_hash
 
     async def update_overview_data(self,
                                    merged_overview: Dict[str, Any],
                                    updated_overview: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
-        confirmed_elections = {}
-        unconfirmed_elections = {}
-
         # Update the merged overview directly if it's empty, else merge the updates.
         if not merged_overview:
             merged_overview = updated_overview
@@ -32,22 +65,12 @@ class OverviewHandler:
             for block_hash, delta_details in updated_overview.items():
                 merged_overview[block_hash] = delta_details
 
-        # Simplified loop: only categorize elections without adding time metrics.
-        for block_hash, details in merged_overview.items():
-            if details.get("is_confirmed", False):
-                confirmed_elections[block_hash] = details
-            else:
-                unconfirmed_elections[block_hash] = details
-
-        # Hash the overview without the removed time metrics for a stable comparison.
-        elections_str = json.dumps(merged_overview, sort_keys=True).encode()
-        current_hash = hashlib.sha256(elections_str).hexdigest()
-
-        # Sort confirmed and unconfirmed elections.
-        confirmed_sorted = self._sort_elections_by_key(
-            confirmed_elections, 'first_seen')
-        unconfirmed_sorted = self._sort_elections_by_multiple_keys(
-            unconfirmed_elections, 'normal_weight', 'final_weight')
+        # Hashing and sorting the whole overview is the expensive part
+        current_hash, confirmed_keys, unconfirmed_keys, fallbacks = await cpu_executor.run(
+            order_overview, merged_overview, size=len(merged_overview), min_size=CPU_OFFLOAD_MIN_ENTRIES)
+        codec_fallbacks.inc(fallbacks)
+        confirmed_sorted = {k: merged_overview[k] for k in confirmed_keys}
+        unconfirmed_sorted = {k: merged_overview[k] for k in unconfirmed_keys}
 
         # Extract updates for caching.
         updated_confirmed = {
@@ -61,9 +84,6 @@ class OverviewHandler:
 
         return current_hash
 
-    def _sort_elections_by_key(self, elections: Dict[str, Any], key: str) -> Dict[str, Any]:
-        return dict(sorted(elections.items(), key=lambda x: x[1].get(key, 0), reverse=True))
-
     def _sort_elections_by_multiple_keys(self, elections: Dict[str, Any], *keys: str) -> Dict[str, Any]:
         return dict(sorted(elections.items(),
                            key=lambda x: tuple(x[1].get(k, 0) for k in keys),
@@ -84,6 +104,43 @@ class OverviewHandler:
         await self.cache.set("confirmed_keys", list(confirmed_elections.keys()))
         await self.cache.set("unconfirmed_keys", list(unconfirmed_elections.keys()))
 
+    async def drop_unconfirmed(self, block_hashes) -> None:
+        """Take elections out of the unconfirmed index, once sealed they won't confirm anymore."""
+        unconfirmed_keys = await self.cache.get("unconfirmed_keys") or []
+        kept = [block_hash for block_hash in unconfirmed_keys if block_hash not in block_hashes]
+        if len(kept) != len(unconfirmed_keys):
+            await self.cache.set("unconfirmed_keys", kept)
+
+    async def cache_overview_hash(self, current_hash: str) -> None:
+        # Lets instances that don't aggregate detect overview changes
+        await self.cache.set("overview_hash", current_hash)
+
+    async def retrieve_overview_hash(self) -> str:
+        return await self.cache.get("overview_hash")
+
+    async def retrieve_unconfirmed_elections(self) -> Dict[str, Any]:
+        unconfirmed_keys = await self.cache.get("unconfirmed_keys") or []
+        return await self.cache.get_multi(unconfirmed_keys)
+
+    async def retrieve_page(self, status: str, limit: int,
+                            cursor: str = None) -> Tuple[List[Tuple[str, Any]], Optional[str]]:
+        """
+        One page of the sorted confirmed or unconfirmed index, starting after the
+        `cursor` block hash. Returns the (block_hash, entry) pairs and the next cursor.
+        """
+        keys = await self.cache.get(f"{status}_keys") or []
+        start = 0
+        if cursor:
+            try:
+                start = keys.index(cursor) + 1
+            except ValueError:
+                raise KeyError(cursor)
+        page_keys = keys[start:start + limit]
+        entries = await self.cache.get_multi(page_keys)
+        page = [(block_hash, entries[block_hash]) for block_hash in page_keys if block_hash in entries]
+        next_cursor = page_keys[-1] if start + limit < len(keys) and page_keys else None
+        return page, next_cursor
+
     async def retrieve_election_data(self,
                                      num_confirmed: int = None,
                                      num_unconfirmed: int = None) -> Dict[str, Any]:
@@ -0,0 +1,135 @@
+from backend import codec
+from backend.metrics import registry
+from time import perf_counter
+from typing import Any, Dict
+import struct
+import zlib
+
+# Binary election record layout, all integers little endian:
+#
+#   header   MAGIC, version (1 byte), flags (1 byte)
+#   payload  zlib compressed when FLAG_ZLIB is set
+#     counts     json length, accounts length, number of votes (3 x uint32)
+#     json       the record without votes.detail, via backend.codec
+#     accounts   distinct voting accounts, newline separated
+#     columns    account index (uint32), vote type (uint8), time (int64),
+#                count (uint32), last_time - time (int64), one column each
+#
+# Vote sources are rare (multi-node setups only) and travel in the json
+# part as [[vote index, sources], ...]. Anything not starting with MAGIC is
+# a legacy JSON record, both are read transparently.
+
+MAGIC = b"NEV"
+VERSION = 1
+FLAG_ZLIB = 1
+HEADER = struct.Struct("<3sBB")
+COUNTS = struct.Struct("<III")
+VOTE_TYPES = ("normal", "final")
+VOTE_FIELDS = {"type", "time", "account", "count", "last_time", "sources"}
+
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+record_bytes = registry.histogram(
+    "election_record_bytes", "Encoded size of election records written to the cache", ("format",),
+    buckets=BYTES_BUCKETS)
+record_codec_seconds = registry.histogram(
+    "election_record_codec_seconds", "Time to encode or decode an election record", ("operation", "format"))
+
+
+def is_binary(data: bytes) -> bool:
+    return data[:3] == MAGIC
+
+
+def _columnar(record: Dict[str, Any]) -> bool:
+    detail = record.get("votes", {}).get("detail") if isinstance(record, dict) else None
+    return isinstance(detail, list)
+
+
+def encode_record(record: Any, compress_min_bytes: int = 16384) -> bytes:
+    """Encode an election record, falling back to JSON for anything without vote detail."""
+    start = perf_counter()
+    if not _columnar(record):
+        data = codec.dumps(record)
+        record_bytes.labels("json").observe(len(data))
+        record_codec_seconds.labels("encode", "json").observe(perf_counter() - start)
+        return data
+
+    votes = record["votes"]
+    detail = votes["detail"]
+    if not all(VOTE_FIELDS.issuperset(vote) for vote in detail):
+        # Unknown vote fields can't go into the columns, keep the record as it is
+        data = codec.dumps(record)
+        record_bytes.labels("json").observe(len(data))
+        return data
+
+    # One pass per column is faster than appending to all of them in one loop
+    account_index = {}
+    accounts = [account_index.setdefault(vote["account"], len(account_index)) for vote in detail]
+    types = [vote["type"] == "final" for vote in detail]
+    times = [vote["time"] for vote in detail]
+    counts = [vote.get("count", 1) for vote in detail]
+    last_deltas = [vote.get("last_time", time) - time for vote, time in zip(detail, times)]
+    sources = [[number, vote["sources"]] for number, vote in enumerate(detail) if "sources" in vote]
+
+    rest = {**record, "votes": {key: value for key, value in votes.items() if key != "detail"}}
+    if sources:
+        rest["votes"]["detail_sources"] = sources
+    json_part = codec.dumps(rest)
+    accounts_part = "\n".join(account_index).encode()
+    count = len(detail)
+    payload = b"".join((
+        COUNTS.pack(len(json_part), len(accounts_part), count),
+        json_part,
+        accounts_part,
+        struct.pack(f"<{count}I", *accounts),
+        struct.pack(f"<{count}B", *types),
+        struct.pack(f"<{count}q", *times),
+        struct.pack(f"<{count}I", *counts),
+        struct.pack(f"<{count}q", *last_deltas),
+    ))
+
+    flags = 0
+    if len(payload) >= compress_min_bytes:
+        payload = zlib.compress(payload, 1)
+        flags |= FLAG_ZLIB
+    data = HEADER.pack(MAGIC, VERSION, flags) + payload
+    record_bytes.labels("binary").observe(len(data))
+    record_codec_seconds.labels("encode", "binary").observe(perf_counter() - start)
+    return data
+
+
+def decode_record(data: bytes) -> Any:
+    start = perf_counter()
+    if not is_binary(data):
+        record = codec.loads(data)
+        record_codec_seconds.labels("decode", "json").observe(perf_counter() - start)
+        return record
+
+    _, version, flags = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unsupported election record version {version}")
+    payload = data[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+
+    json_len, accounts_len, count = COUNTS.unpack_from(payload)
+    offset = COUNTS.size
+    record = codec.loads(payload[offset:offset + json_len])
+    offset += json_len
+    account_names = payload[offset:offset + accounts_len].decode().split("\n") if accounts_len else []
+    offset += accounts_len
+
+    columns = []
+    for code, size in (("I", 4), ("B", 1), ("q", 8), ("I", 4), ("q", 8)):
+        columns.append(struct.unpack_from(f"<{count}{code}", payload, offset))
+        offset += count * size
+
+    detail = [{"type": VOTE_TYPES[vote_type], "time": time, "account": account_names[account],
+               "count": vote_count, "last_time": time + last_delta}
+              for account, vote_type, time, vote_count, last_delta in zip(*columns)]
+    votes = record["votes"]
+    for number, vote_sources in votes.pop("detail_sources", ()):
+        detail[number]["sources"] = vote_sources
+    votes["detail"] = detail
+    record_codec_seconds.labels("decode", "binary").observe(perf_counter() - start)
+    return record
@@ -0,0 +1,109 @@
+from backend.metrics import registry
+from collections import OrderedDict
+from sys import intern
+from typing import Any, Dict, List, Optional, Tuple
+
+rep_votes_reps = registry.gauge(
+    "rep_votes_index_reps", "Representatives held in the recent votes index")
+
+
+class RepVoteRing:
+    """
+    The last `size` distinct (block hash, vote type) votes of one representative.
+
+    Entries are numbered in arrival order and stored at seq % size, so a page
+    starting anywhere in the window is read without scanning. Rebroadcasts of
+    a vote still in the window are ignored.
+    """
+
+    __slots__ = ("entries", "next_seq", "seen")
+
+    def __init__(self, size: int):
+        # (block_hash, vote_type, time, first vote time when recorded)
+        self.entries: List[Optional[Tuple[str, str, int, int]]] = [None] * size
+        self.next_seq = 0
+        self.seen = set()
+
+    @property
+    def last_time(self) -> int:
+        last = self.entries[(self.next_seq - 1) % len(self.entries)]
+        return last[2] if last is not None else 0
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(0, self.next_seq - len(self.entries))
+
+    def add(self, block_hash: str, vote_type: str, msg_time: int, first_time: int) -> None:
+        key = (block_hash, vote_type)
+        if key in self.seen:
+            return
+        slot = self.next_seq % len(self.entries)
+        evicted = self.entries[slot]
+        if evicted is not None:
+            self.seen.discard((evicted[0], evicted[1]))
+        self.entries[slot] = (block_hash, vote_type, msg_time, first_time)
+        self.seen.add(key)
+        self.next_seq += 1
+
+    def page(self, limit: int, before: int = None) -> Tuple[List[Tuple[int, Tuple[str, str, int, int]]], Optional[int]]:
+        """Up to `limit` entries newest first, older than sequence number `before`, and the next cursor."""
+        start = self.next_seq - 1 if before is None else min(before - 1, self.next_seq - 1)
+        stop = max(self.oldest_seq, start - limit + 1)
+        size = len(self.entries)
+        page = [(seq, self.entries[seq % size]) for seq in range(start, stop - 1, -1)]
+        next_cursor = stop if page and stop > self.oldest_seq else None
+        return page, next_cursor
+
+
+class RepVoteIndex:
+    """
+    Recent votes per representative, filled at ingest.
+
+    Keeps the last `per_rep` distinct votes of up to `max_reps`
+    representatives (the one that voted least recently is dropped first) and the
+    first vote time of up to `max_elections` elections, to report each vote's
+    delay behind the first voter. Lookups cost O(page size).
+    """
+
+    def __init__(self, per_rep: int = 1000, max_reps: int = 5000, max_elections: int = 200000):
+        self.per_rep = per_rep
+        self.max_reps = max_reps
+        self.max_elections = max_elections
+        self.reps: Dict[str, RepVoteRing] = {}
+        # block_hash -> earliest vote time seen, oldest election first
+        self.first_votes: "OrderedDict[str, int]" = OrderedDict()
+
+    def record(self, account: str, block_hash: str, vote_type: str, msg_time: int) -> None:
+        # Every vote message carries its own copy of the hash, share one per election
+        block_hash = intern(block_hash)
+        first = self.first_votes.get(block_hash)
+        if first is None or msg_time < first:
+            first = self.first_votes[block_hash] = msg_time
+            if len(self.first_votes) > self.max_elections:
+                self.first_votes.popitem(last=False)
+
+        ring = self.reps.get(account)
+        if ring is None:
+            if len(self.reps) >= self.max_reps:
+                self._evict_rep()
+            ring = self.reps[account] = RepVoteRing(self.per_rep)
+            rep_votes_reps.set(len(self.reps))
+        ring.add(block_hash, vote_type, msg_time, first)
+
+    def _evict_rep(self) -> None:
+        # Only runs past max_reps, not worth keeping the reps in LRU order on every vote
+        del self.reps[min(self.reps, key=lambda account: self.reps[account].last_time)]
+
+    def votes(self, account: str, limit: int, before: int = None) -> Optional[Dict[str, Any]]:
+        """A page of the representative's recent votes, None if it has none in the index."""
+        ring = self.reps.get(account)
+        if ring is None:
+            return None
+        page, next_cursor = ring.page(limit, before)
+        votes = []
+        for seq, (block_hash, vote_type, msg_time, first_time) in page:
+            # Earlier votes may have arrived after this one was recorded
+            first = self.first_votes.get(block_hash, first_time)
+            votes.append({"seq": seq, "hash": block_hash, "type": vote_type,
+                          "time": msg_time, "delay": msg_time - min(first, first_time)})
+        return {"votes": votes, "next_cursor": next_cursor, "total": ring.next_seq - ring.oldest_seq}
@@ -3,6 +3,9 @@ import json
 from nanorpc.client import NanoRpcTyped
 from asyncio import gather, Lock, sleep as aio_sleep
 from os import getenv
+from time import perf_counter
+from backend.metrics import rpc_call_seconds, registry
+from backend.supervisor import heartbeat
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -12,10 +15,28 @@ RPC_URL = getenv("RPC_URL")
 RPC_USERNAME = getenv("RPC_USERNAME")
 RPC_PASSWORD = getenv("RPC_PASSWORD")
 RPC_RECONNECT_DURATINO = 1  # duration until recconnect on failure
+# Each source is refreshed on its own cadence, in seconds
+REFRESH_QUORUM_INTERVAL = int(getenv("REFRESH_QUORUM_INTERVAL", 10))
+REFRESH_WEIGHTS_INTERVAL = int(getenv("REFRESH_WEIGHTS_INTERVAL", 60))
+REFRESH_TELEMETRY_INTERVAL = int(getenv("REFRESH_TELEMETRY_INTERVAL", 300))
+REFRESH_RETRY_INTERVAL = 5
 
 rpc = None
 online_reps = {}
 confirmation_quorum = {}
+# Latest partial results online_reps is built from
+representatives = {}
+extended_telemetry = {}
+# Bumped whenever online_reps changes, callbacks get the accounts whose weight moved
+reps_version = 0
+reps_change_listeners = []
+
+reps_refreshes = registry.counter(
+    "reps_refresh_total", "Refreshes of reps data by source and result", ("source", "result"))
+reps_weight_changes = registry.counter(
+    "reps_weight_changes_total", "Representatives whose online weight changed on refresh")
+reps_version_gauge = registry.gauge(
+    "reps_version", "Version of the online reps data, bumped on every real change")
 
 
 def get_nanorpc_client():
@@ -50,6 +71,14 @@ async def fetch_http(url, session, method='get', payload=None):
             return await response.json()
 
 
+async def timed_rpc(method, coro):
+    start = perf_counter()
+    try:
+        return await coro
+    finally:
+        rpc_call_seconds.labels(method).observe(perf_counter() - start)
+
+
 async def get_online_reps():
     return online_reps
 
@@ -58,15 +87,126 @@ async def get_quorum():
     return confirmation_quorum
 
 
+def get_reps_version():
+    return reps_version
+
+
+def on_reps_change(callback):
+    reps_change_listeners.append(callback)
+
+
 async def update_online_reps():
-    global online_reps, confirmation_quorum
+    """Refresh every source once, keeping the previous data of sources that fail."""
+    results = await gather(refresh_quorum(), refresh_weights(), refresh_telemetry(),
+                           return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(result)
+    return online_reps, confirmation_quorum
+
+
+async def refresh_quorum():
+    global confirmation_quorum
+    rpc = await get_rpc()
+    results = await execute_and_handle_errors({
+        "confirmation_quorum": timed_rpc("confirmation_quorum", rpc.confirmation_quorum())
+    })
+    quorum = results["confirmation_quorum"]
+    quorum.pop("peers", None)
+    confirmation_quorum = quorum
+
+
+async def refresh_weights():
+    global representatives
+    rpc = await get_rpc()
+    results = await execute_and_handle_errors({
+        "online_reps": timed_rpc("representatives_online", rpc.representatives_online(weight=True))
+    })
+    reps = results["online_reps"].get("representatives", {})
+    # Ensure representatives is a dictionary
+    if not isinstance(reps, dict):
+        raise ValueError(f"Unexpected representatives_online response: {reps}")
+    representatives = reps
+    rebuild_online_reps()
+
+
+async def refresh_telemetry():
+    global extended_telemetry
+    rpc = await get_rpc()
+    results = await execute_and_handle_errors({
+        "telemetry": timed_rpc("telemetry", rpc.telemetry(raw=True)),
+        "confirmation_quorum": timed_rpc("confirmation_quorum_peers", rpc.confirmation_quorum(peer_details=True))
+    })
+    extended_telemetry = extend_telemetry_with_account(
+        results["telemetry"].get("metrics") or [],
+        results["confirmation_quorum"].get("peers") or [])
+    rebuild_online_reps()
+
+
+def diff_weights(old_reps, new_reps):
+    """Accounts whose weight changed, appeared or disappeared: {account: (old, new)}."""
+    changed = {}
+    for account in old_reps.keys() | new_reps.keys():
+        old_weight = old_reps.get(account, {}).get("votingweight")
+        new_weight = new_reps.get(account, {}).get("votingweight")
+        if old_weight != new_weight:
+            changed[account] = (old_weight, new_weight)
+    return changed
+
+
+def rebuild_online_reps():
+    global online_reps, reps_version
+    new_reps = build_online_reps(representatives, extended_telemetry)
+    changed = diff_weights(online_reps, new_reps)
+    if not changed and new_reps == online_reps:
+        return {}
+
+    online_reps = new_reps
+    reps_version += 1
+    reps_version_gauge.set(reps_version)
+    reps_weight_changes.inc(len(changed))
+    if changed:
+        logger.info(f"Online weight changed for {len(changed)} reps")
+    for callback in reps_change_listeners:
+        callback(changed)
+    return changed
+
+
+def snapshot_reps():
+    return {"representatives": representatives,
+            "extended_telemetry": extended_telemetry,
+            "confirmation_quorum": confirmation_quorum}
+
+
+def restore_reps(state):
+    """Serve the last known reps and quorum until the first refresh of each source completes."""
+    global representatives, extended_telemetry, confirmation_quorum
+    representatives = state.get("representatives") or representatives
+    extended_telemetry = state.get("extended_telemetry") or extended_telemetry
+    confirmation_quorum = state.get("confirmation_quorum") or confirmation_quorum
+    rebuild_online_reps()
+
+
+async def run_refresh_scheduler():
+    await gather(
+        _run_refresh("quorum", refresh_quorum, REFRESH_QUORUM_INTERVAL),
+        _run_refresh("weights", refresh_weights, REFRESH_WEIGHTS_INTERVAL),
+        _run_refresh("telemetry", refresh_telemetry, REFRESH_TELEMETRY_INTERVAL))
+
+
+async def _run_refresh(source, refresh, interval):
     while True:
         try:
-            online_reps, confirmation_quorum = await fetch_online_reps()
-            return online_reps, confirmation_quorum
+            await refresh()
+            reps_refreshes.labels(source, "ok").inc()
+            delay = interval
         except Exception as exc:
-            logger.warn(exc)
-            await aio_sleep(1)
+            # The other sources and the previous data of this one stay in use
+            reps_refreshes.labels(source, "error").inc()
+            logger.warning(f"Refreshing {source} failed: {exc}")
+            delay = min(interval, REFRESH_RETRY_INTERVAL)
+        heartbeat()
+        await aio_sleep(delay)
 
 
 async def get_block_info(block_hash=None):
@@ -75,23 +215,11 @@ async def get_block_info(block_hash=None):
     rpc = await get_rpc()
     hashes = [block_hash]
 
-    response = await rpc.blocks_info(hashes, json_block="true", source="true", receive_hash="true")
+    response = await timed_rpc("blocks_info", rpc.blocks_info(
+        hashes, json_block="true", source="true", receive_hash="true"))
     return response
 
 
-async def fetch_online_reps():
-    rpc = await get_rpc()
-    tasks = {
-        "online_reps": rpc.representatives_online(weight=True),
-        "telemetry": rpc.telemetry(raw=True),
-        "confirmation_quorum": rpc.confirmation_quorum(peer_details=True)
-    }
-
-    results = await execute_and_handle_errors(tasks)
-
-    return await transform_reps_online_data(results)
-
-
 def extend_telemetry_with_account(telemetry_peers, confirmation_quorum_peers):
     # Prepare IP and port from telemetry data for matching
     telemetry_dict = {
@@ -118,19 +246,7 @@ def extend_telemetry_with_account(telemetry_peers, confirmation_quorum_peers):
     return merged_data
 
 
-async def transform_reps_online_data(data):
-    representatives = data["online_reps"].get("representatives", {})
-    confirmation_quorum = data["confirmation_quorum"]
-    confirmation_quorum_peers = confirmation_quorum.pop("peers")
-    telemetry_peers = data["telemetry"].get("metrics")
-
-    extended_telemetry = extend_telemetry_with_account(
-        telemetry_peers, confirmation_quorum_peers)
-
-    # Ensure representatives is a dictionary
-    if not isinstance(representatives, dict):
-        return []  # or handle the error as appropriate for your application
-
+def build_online_reps(representatives, extended_telemetry):
     # Calculate the total weight
     total_weight = sum(int(rep.get("weight", 0))
                        for rep in representatives.values())
@@ -158,7 +274,7 @@ async def transform_reps_online_data(data):
             "node_id": node_id
         }
 
-    return online_reps, confirmation_quorum
+    return online_reps
 
 
 async def execute_and_handle_errors(tasks, droppable_errors=None):
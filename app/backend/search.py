@@ -0,0 +1,196 @@
+from backend.metrics import registry
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import re
+
+HASH_PREFIX = re.compile(r"^[0-9A-Fa-f]{1,64}$")
+ACCOUNT = re.compile(r"^(nano|xrb)_[13][13456789abcdefghijkmnopqrstuwxyz]{59}$")
+
+search_entries = registry.gauge(
+    "search_index_entries", "Entries held by the search indexes", ("index",))
+search_evictions = registry.counter(
+    "search_index_evictions_total", "Oldest entries dropped to stay within the index bounds", ("index",))
+hash_evictions = search_evictions.labels("hash")
+account_evictions = search_evictions.labels("account")
+
+
+class HashPrefixIndex:
+    """
+    Block hashes in sorted order for prefix lookups, with the oldest dropped
+    past `max_entries`.
+
+    Hashes are kept as 32 raw bytes in sorted blocks of up to 2 * `load`
+    keys, with the first key of each block in `firsts` to find a block by
+    bisection. Inserts and evictions only move the keys of one block, so no
+    operation touches the whole index and none stalls the event loop.
+    """
+
+    def __init__(self, max_entries: int = 1000000, load: int = 1000):
+        self.max_entries = max_entries
+        self.load = load
+        self.blocks: List[List[bytes]] = []
+        self.firsts: List[bytes] = []
+        # Insertion order, for eviction
+        self.order = deque()
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _block(self, key: bytes) -> int:
+        return max(bisect_right(self.firsts, key) - 1, 0)
+
+    def add(self, block_hash: str) -> Optional[bytes]:
+        """Index a hex block hash, returns its key or None if it isn't a block hash."""
+        try:
+            key = bytes.fromhex(block_hash)
+        except (TypeError, ValueError):
+            return None
+        if len(key) != 32:
+            return None
+        if not self.blocks:
+            self.blocks.append([key])
+            self.firsts.append(key)
+        else:
+            number = self._block(key)
+            block = self.blocks[number]
+            position = bisect_left(block, key)
+            if position < len(block) and block[position] == key:
+                return block[position]
+            block.insert(position, key)
+            if position == 0:
+                self.firsts[number] = key
+            if len(block) > 2 * self.load:
+                self.blocks[number:number + 1] = [block[:self.load], block[self.load:]]
+                self.firsts.insert(number + 1, block[self.load])
+        self.order.append(key)
+        if len(self.order) > self.max_entries:
+            self._remove(self.order.popleft())
+            hash_evictions.inc()
+        return key
+
+    def _remove(self, key: bytes) -> None:
+        number = self._block(key)
+        block = self.blocks[number]
+        position = bisect_left(block, key)
+        if position == len(block) or block[position] != key:
+            return
+        del block[position]
+        if not block:
+            del self.blocks[number]
+            del self.firsts[number]
+        elif position == 0:
+            self.firsts[number] = block[0]
+
+    def search(self, prefix: str, limit: int) -> Tuple[List[str], int]:
+        """Up to `limit` hashes starting with the hex `prefix` in sorted order, and how many match."""
+        if not self.blocks:
+            return [], 0
+        padding = 64 - len(prefix)
+        low = bytes.fromhex(prefix + "0" * padding)
+        high = bytes.fromhex(prefix + "F" * padding)
+        first, last = self._block(low), self._block(high)
+        matches, total = [], 0
+        for number in range(first, last + 1):
+            block = self.blocks[number]
+            start = bisect_left(block, low) if number == first else 0
+            stop = bisect_right(block, high) if number == last else len(block)
+            total += stop - start
+            if len(matches) < limit:
+                matches.extend(block[start:min(stop, start + limit - len(matches))])
+        return [key.hex().upper() for key in matches], total
+
+
+class AccountIndex:
+    """
+    The last `per_account` elections involving each of up to `max_accounts`
+    accounts, the account least recently seen in a new election dropped
+    first. Elections are the hash index's 32 byte keys, shared with it.
+    """
+
+    def __init__(self, max_accounts: int = 200000, per_account: int = 100):
+        self.max_accounts = max_accounts
+        self.per_account = per_account
+        # Lists rather than bounded deques, a deque takes ~600 bytes even when nearly empty
+        self.accounts: "OrderedDict[str, List[bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def add(self, account: str, key: bytes) -> None:
+        if not account or key is None:
+            return
+        account = "nano_" + account[4:] if account.startswith("xrb_") else account
+        elections = self.accounts.get(account)
+        if elections is None:
+            elections = self.accounts[account] = []
+            if len(self.accounts) > self.max_accounts:
+                self.accounts.popitem(last=False)
+                account_evictions.inc()
+        elif key in elections:
+            return
+        else:
+            # Accounts with new elections are the last to be evicted
+            self.accounts.move_to_end(account)
+        elections.append(key)
+        if len(elections) > self.per_account:
+            del elections[0]
+
+    def search(self, account: str, limit: int) -> Tuple[List[str], int]:
+        """The account's most recent elections first, and how many are indexed."""
+        account = "nano_" + account[4:] if account.startswith("xrb_") else account
+        elections = self.accounts.get(account) or ()
+        return [key.hex().upper() for key in elections[:-limit - 1:-1]], len(elections)
+
+
+class SearchIndex:
+    """
+    Finds elections by block hash prefix or by account.
+
+    Fed incrementally: every election the aggregation merges goes into the
+    hash index, and block accounts come from confirmations and from block
+    info fetched for detail pages.
+    """
+
+    def __init__(self, max_elections: int = 1000000, max_accounts: int = 200000, per_account: int = 100):
+        self.hashes = HashPrefixIndex(max_entries=max_elections)
+        self.accounts = AccountIndex(max_accounts=max_accounts, per_account=per_account)
+
+    def add_elections(self, elections: Dict[str, Any]) -> None:
+        for block_hash, election in elections.items():
+            key = self.hashes.add(block_hash)
+            if election.get("block_account"):
+                self.accounts.add(election["block_account"], key)
+        self._update_sizes()
+
+    def _update_sizes(self) -> None:
+        search_entries.labels("hash").set(len(self.hashes))
+        search_entries.labels("account").set(len(self.accounts))
+
+    def add_hashes(self, block_hashes: Iterable[str]) -> None:
+        for block_hash in block_hashes:
+            self.hashes.add(block_hash)
+        self._update_sizes()
+
+    def add_block_info(self, block_info: Dict[str, Any]) -> None:
+        """Index the accounts on both sides of each block in a blocks_info response."""
+        for block_hash, info in (block_info or {}).get("blocks", {}).items():
+            contents = info.get("contents", {})
+            key = self.hashes.add(block_hash)
+            self.accounts.add(contents.get("account"), key)
+            if info.get("subtype") == "send":
+                self.accounts.add(contents.get("link_as_account"), key)
+            elif info.get("source_account") not in (None, "", "0"):
+                self.accounts.add(info.get("source_account"), key)
+        self._update_sizes()
+
+    def search(self, query: str, limit: int) -> Optional[Dict[str, Any]]:
+        """Look up a hash prefix or an account, None if the query is neither."""
+        query = query.strip()
+        if ACCOUNT.match(query):
+            elections, total = self.accounts.search(query, limit)
+            return {"type": "account", "elections": elections, "total": total}
+        if HASH_PREFIX.match(query):
+            elections, total = self.hashes.search(query.upper(), limit)
+            return {"type": "hash", "elections": elections, "total": total}
+        return None
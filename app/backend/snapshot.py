@@ -0,0 +1,69 @@
+from backend.codec import dumps
+from backend.metrics import registry
+from datetime import datetime
+from typing import Any, Dict, Optional
+from time import perf_counter
+import logging
+import json
+import os
+
+logger = logging.getLogger("Quart")
+
+SNAPSHOT_VERSION = 1
+
+snapshot_seconds = registry.histogram(
+    "state_snapshot_seconds", "Time to write or restore the local state snapshot", ("operation",))
+snapshot_bytes = registry.gauge(
+    "state_snapshot_bytes", "Size of the last state snapshot written")
+snapshot_age_seconds = registry.gauge(
+    "state_snapshot_restored_age_seconds", "Age of the snapshot restored at startup")
+
+
+def encode_snapshot(state: Dict[str, Any]) -> bytes:
+    return dumps({"version": SNAPSHOT_VERSION,
+                  "written_at": int(datetime.now().timestamp() * 1000),
+                  "state": state})
+
+
+def save_snapshot(path: str, data: bytes) -> None:
+    """
+    Write an encoded snapshot to `path` atomically.
+
+    It goes to a temporary file next to `path` first, so a crash while
+    writing leaves the previous snapshot in place.
+    """
+    start = perf_counter()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    snapshot_bytes.set(len(data))
+    snapshot_seconds.labels("save").observe(perf_counter() - start)
+
+
+def load_snapshot(path: str, max_age: int) -> Optional[Dict[str, Any]]:
+    """Read the state saved by save_snapshot, or None if it's missing, unreadable or older than `max_age` seconds."""
+    start = perf_counter()
+    try:
+        with open(path, "rb") as f:
+            # orjson reads 128bit weights back as floats, json keeps them exact
+            snapshot = json.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning(f"Ignoring unreadable state snapshot {path}: {exc}")
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring state snapshot {path} with version {snapshot.get('version')}")
+        return None
+    age = datetime.now().timestamp() - snapshot.get("written_at", 0) / 1000
+    if age > max_age:
+        logger.info(f"Ignoring state snapshot {path}, it is {int(age)}s old")
+        return None
+
+    snapshot_age_seconds.set(age)
+    snapshot_seconds.labels("load").observe(perf_counter() - start)
+    return snapshot["state"]
@@ -0,0 +1,301 @@
+from backend.metrics import registry, event_loop_lag_seconds, event_loop_lag_current
+from asyncio import CancelledError, create_task, get_running_loop, sleep as aio_sleep
+from asyncio.tasks import _current_tasks
+from contextvars import ContextVar
+from inspect import CO_COROUTINE
+from time import monotonic, time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+import os
+import sys
+import threading
+
+logger = logging.getLogger("Quart")
+
+ALWAYS = "always"          # restart whenever the loop ends, loops aren't supposed to return
+ON_FAILURE = "on_failure"  # restart after an exception, a normal return means done
+NEVER = "never"
+
+RUNNING = "running"
+IDLE = "idle"
+BACKOFF = "backoff"
+STALLED = "stalled"
+FAILED = "failed"
+FINISHED = "finished"
+
+# Frames from this directory are preferred when naming what blocked the loop
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+task_up = registry.gauge(
+    "supervisor_task_up", "1 while a supervised loop is running or idle", ("task",))
+task_restarts = registry.counter(
+    "supervisor_task_restarts_total", "Restarts of supervised loops", ("task", "reason"))
+event_loop_blocked = registry.counter(
+    "event_loop_blocked_total", "Event loop stalls over the block threshold, by the supervised loop running",
+    ("loop",))
+
+_supervised: ContextVar[Optional["SupervisedTask"]] = ContextVar("supervised_task", default=None)
+
+
+def heartbeat() -> None:
+    """Tell the supervisor the calling loop made progress, a no-op outside supervised loops."""
+    task = _supervised.get()
+    if task is not None:
+        task.beat()
+
+
+def idle() -> None:
+    """The calling loop is legitimately waiting (e.g. for leadership), pause its deadline."""
+    task = _supervised.get()
+    if task is not None:
+        task.state = IDLE
+
+
+class SupervisedTask:
+    def __init__(self, name: str, factory: Callable[[], Awaitable[Any]], restart: str,
+                 deadline: Optional[float], critical: bool, backoff_max: float):
+        self.name = name
+        self.factory = factory
+        self.restart = restart
+        # Longest time between heartbeats while running, None disables the check
+        self.deadline = deadline
+        self.critical = critical
+        self.backoff_max = backoff_max
+        self.state = RUNNING
+        self.restarts = 0
+        self.backoff = 1
+        self.last_error = None
+        self.last_beat = monotonic()
+        self.started = monotonic()
+        # The supervising task and the loop it currently runs
+        self.task = None
+        self.run = None
+
+    def beat(self) -> None:
+        self.last_beat = monotonic()
+        if self.state == IDLE:
+            self.state = RUNNING
+
+    @property
+    def overdue(self) -> bool:
+        return (self.deadline is not None and self.state == RUNNING
+                and monotonic() - self.last_beat > self.deadline)
+
+    @property
+    def healthy(self) -> bool:
+        # A single restart is fine, a loop that keeps crashing at maximum backoff isn't
+        crash_looping = self.state == BACKOFF and self.backoff >= self.backoff_max
+        return self.state not in (STALLED, FAILED) and not crash_looping and not self.overdue
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "state": STALLED if self.overdue else self.state,
+            "critical": self.critical,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+            "heartbeat_age": round(monotonic() - self.last_beat, 3),
+            "deadline": self.deadline,
+        }
+
+
+class Supervisor:
+    """
+    Runs the background loops and keeps them alive.
+
+    A loop that raises is restarted with exponential backoff (1s up to
+    `backoff_max`, reset once it ran for a minute) according to its restart
+    policy. Loops report progress with `heartbeat()`; one that misses its
+    deadline is cancelled and restarted, which gets it out of a hung await.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self.tasks: Dict[str, SupervisedTask] = {}
+        self._watchdog = None
+
+    def start(self, name: str, factory: Callable[[], Awaitable[Any]], restart: str = ALWAYS,
+              deadline: float = None, critical: bool = True, backoff_max: float = 30) -> SupervisedTask:
+        supervised = self.tasks[name] = SupervisedTask(name, factory, restart, deadline, critical, backoff_max)
+        supervised.task = create_task(self._supervise(supervised), name=f"supervise-{name}")
+        if self._watchdog is None:
+            self._watchdog = create_task(self._watch(), name="supervisor")
+        return supervised
+
+    async def _supervise(self, supervised: SupervisedTask) -> None:
+        _supervised.set(supervised)
+        while True:
+            supervised.state = RUNNING
+            supervised.started = supervised.last_beat = monotonic()
+            task_up.labels(supervised.name).set(1)
+            # The loop runs as a child task, so a missed deadline can cancel
+            # it without cancelling the supervision around it
+            run = supervised.run = create_task(supervised.factory(), name=supervised.name)
+            try:
+                await run
+                reason = "returned"
+                logger.warning(f"Supervised loop {supervised.name} returned")
+            except CancelledError:
+                if not run.cancelled() or supervised.state != STALLED:
+                    run.cancel()
+                    task_up.labels(supervised.name).set(0)
+                    raise
+                reason = "deadline"
+                supervised.last_error = f"no heartbeat for {supervised.deadline}s"
+            except Exception as exc:
+                reason = "error"
+                supervised.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception(f"Supervised loop {supervised.name} failed")
+            task_up.labels(supervised.name).set(0)
+
+            if supervised.restart == NEVER or (supervised.restart == ON_FAILURE and reason == "returned"):
+                supervised.state = FINISHED if reason == "returned" else FAILED
+                return
+            if monotonic() - supervised.started > 60:
+                supervised.backoff = 1
+            supervised.state = BACKOFF
+            supervised.restarts += 1
+            task_restarts.labels(supervised.name, reason).inc()
+            logger.warning(f"Restarting {supervised.name} in {supervised.backoff}s ({reason})")
+            await aio_sleep(supervised.backoff)
+            supervised.backoff = min(supervised.backoff * 2, supervised.backoff_max)
+
+    async def _watch(self) -> None:
+        while True:
+            await aio_sleep(self.check_interval)
+            for supervised in self.tasks.values():
+                if supervised.overdue:
+                    logger.warning(f"Supervised loop {supervised.name} missed its "
+                                   f"{supervised.deadline}s deadline, restarting it")
+                    supervised.state = STALLED
+                    supervised.run.cancel()
+
+    @property
+    def healthy(self) -> bool:
+        return all(supervised.healthy for supervised in self.tasks.values() if supervised.critical)
+
+    def describe(self) -> Dict[str, Any]:
+        return {name: supervised.describe() for name, supervised in self.tasks.items()}
+
+    async def stop(self) -> None:
+        for supervised in self.tasks.values():
+            supervised.task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        for supervised in self.tasks.values():
+            try:
+                await supervised.task
+            except (CancelledError, Exception):
+                pass
+
+
+def describe_frame(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.relpath(code.co_filename, APP_ROOT)}:{frame.f_lineno})"
+
+
+class LoopLagSampler:
+    """
+    Measures event loop lag from a thread, so a blocked loop is seen while
+    it is still blocked.
+
+    Every `interval` seconds the thread schedules a callback on the loop and
+    waits for it. If it hasn't run after `block_threshold` seconds, the
+    thread reads the loop thread's stack with sys._current_frames and
+    records the running task, the innermost coroutine (of our own code if
+    there is one) and the frame that blocked the loop. Metrics are only touched from the loop,
+    labelled by the supervised loop the task belongs to ("other" for request
+    handlers and anything else) to keep the series bounded.
+    """
+
+    def __init__(self, interval: float = 0.5, block_threshold: float = 0.25):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.current_lag = 0.0
+        self.last_block: Optional[Dict[str, Any]] = None
+        self._loop = None
+        self._loop_thread_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._loop = get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-lag-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _observe(self, lag: float) -> None:
+        self.current_lag = lag
+        event_loop_lag_seconds.observe(lag)
+        event_loop_lag_current.set(lag)
+
+    def _blocked(self, block: Dict[str, Any]) -> None:
+        self.last_block = block
+        event_loop_blocked.labels(block["loop"]).inc()
+        logger.warning(f"Event loop blocked for {block['seconds']}s in task {block['task']}: "
+                       f"{block['coroutine']}, at {block['frame']}")
+
+    def _culprit(self) -> Dict[str, Any]:
+        task = _current_tasks.get(self._loop)
+        frames = []
+        frame = sys._current_frames().get(self._loop_thread_id)
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        # Innermost first: the coroutine that made the blocking call, ours if possible
+        coroutines = [frame for frame in frames if frame.f_code.co_flags & CO_COROUTINE]
+        ours = [frame for frame in frames if frame.f_code.co_filename.startswith(APP_ROOT)]
+        coroutine = next((frame for frame in coroutines if frame in ours), coroutines[0] if coroutines else None)
+        blocking = ours[0] if ours else frames[0] if frames else None
+        return {
+            "task": task.get_name() if task is not None else "none",
+            "loop": self._loop_name(task),
+            "coroutine": describe_frame(coroutine) if coroutine else None,
+            "frame": describe_frame(blocking) if blocking else None,
+        }
+
+    @staticmethod
+    def _loop_name(task) -> str:
+        if task is None:
+            return "none"
+        if task.get_name() in supervisor.tasks:
+            return task.get_name()
+        # Tasks started by a supervised loop inherit its context (Task.get_context is 3.12+)
+        get_context = getattr(task, "get_context", None)
+        supervised = get_context().get(_supervised) if get_context is not None else None
+        return supervised.name if supervised is not None else "other"
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            ran = threading.Event()
+            sent = monotonic()
+
+            def callback():
+                ran.set()
+                self._observe(max(0.0, monotonic() - sent))
+
+            try:
+                self._loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                # The loop is closed
+                return
+            if not ran.wait(self.block_threshold):
+                block = self._culprit()
+                while not ran.wait(1):
+                    if self._stop.is_set():
+                        return
+                block["seconds"] = round(monotonic() - sent, 3)
+                block["at"] = round(time(), 3)
+                self._loop.call_soon_threadsafe(self._blocked, block)
+            self._stop.wait(self.interval)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"current_lag": round(self.current_lag, 4), "last_block": self.last_block}
+
+
+supervisor = Supervisor()
+loop_lag_sampler = LoopLagSampler()
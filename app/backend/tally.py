@@ -0,0 +1,90 @@
+from typing import Any, Dict, Tuple
+from os import getenv
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, tallies fall back to plain Python
+    np = None
+
+# Weights are summed in units of 10^24 raw (a millionth of a nano). That keeps
+# every sum well inside float64's exact integer range, so the vectorized
+# result matches the exact integer tally up to the dropped sub-unit remainder.
+WEIGHT_UNIT = 10 ** 24
+VOTE_TYPES = {"normal": 0, "final": 1}
+# Below this many votes per batch the array setup costs more than it saves,
+# see benchmarks.tally_crossover to measure the crossover on a given host.
+TALLY_VECTORIZED_MIN_VOTES = int(getenv("TALLY_VECTORIZED_MIN_VOTES", 5000))
+
+
+def tally_weights_python(elections: Dict[str, Any], online_reps: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+    """{block_hash: (normal_weight, final_weight)} counting each rep once per vote type."""
+    tallies = {}
+    for block_hash, election in elections.items():
+        weights = [0, 0]
+        seen = (set(), set())
+        for vote in election.get("votes", {}).get("detail", []):
+            type_index = VOTE_TYPES[vote["type"]]
+            account = vote["account"]
+            if account in seen[type_index]:
+                continue
+            seen[type_index].add(account)
+            weights[type_index] += online_reps.get(account, {}).get("votingweight") or 0
+        tallies[block_hash] = (weights[0], weights[1])
+    return tallies
+
+
+def tally_weights_vectorized(elections: Dict[str, Any], online_reps: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+    """
+    Same result as tally_weights_python, computed in one batched pass.
+
+    Every vote becomes an (election, rep, vote type) row of integer arrays,
+    duplicate rows are dropped after a sort and the rep weights are summed
+    per (election, vote type) with a single bincount. Reading the vote dicts
+    is still a Python loop, so this wins on large batches only.
+    """
+    # Offline reps are mapped below zero and carry no weight
+    rep_index = {account: index for index, account in enumerate(online_reps)}
+    rep_weights = np.fromiter(((rep.get("votingweight") or 0) // WEIGHT_UNIT for rep in online_reps.values()),
+                              dtype=np.float64, count=len(online_reps))
+
+    hashes = list(elections)
+    details = [elections[block_hash].get("votes", {}).get("detail", []) for block_hash in hashes]
+    tallies = {block_hash: (0, 0) for block_hash in hashes}
+
+    # One pass over the votes packs rep and vote type into a single code
+    codes = np.array([rep_index.get(vote["account"], -1) * 2 + VOTE_TYPES[vote["type"]]
+                      for detail in details for vote in detail], dtype=np.int64)
+    election_rows = np.repeat(np.arange(len(hashes), dtype=np.int64),
+                              np.fromiter(map(len, details), dtype=np.int64, count=len(details)))
+    online = codes >= 0
+    codes, election_rows = codes[online], election_rows[online]
+    if not len(codes):
+        return tallies
+
+    # Sorting (election, rep, type) keys lets us drop repeated votes
+    num_codes = 2 * len(online_reps)
+    keys = np.sort(election_rows * num_codes + codes)
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    codes = keys % num_codes
+    buckets = (keys // num_codes) * 2 + codes % 2
+    sums = np.bincount(buckets, weights=rep_weights[codes // 2], minlength=len(hashes) * 2)
+
+    sums = sums.astype(np.int64).tolist()
+    for election_number, block_hash in enumerate(hashes):
+        tallies[block_hash] = (sums[election_number * 2] * WEIGHT_UNIT,
+                               sums[election_number * 2 + 1] * WEIGHT_UNIT)
+    return tallies
+
+
+def count_votes(elections: Dict[str, Any]) -> int:
+    return sum(len(election.get("votes", {}).get("detail", ())) for election in elections.values())
+
+
+def tally_weights(elections: Dict[str, Any], online_reps: Dict[str, Any],
+                  min_vectorized_votes: int = None) -> Dict[str, Tuple[int, int]]:
+    """Tally a batch with whichever engine is faster for its size."""
+    if min_vectorized_votes is None:
+        min_vectorized_votes = TALLY_VECTORIZED_MIN_VOTES
+    if np is None or not online_reps or count_votes(elections) < min_vectorized_votes:
+        return tally_weights_python(elections, online_reps)
+    return tally_weights_vectorized(elections, online_reps)
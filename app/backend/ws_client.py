@@ -1,11 +1,23 @@
-from backend.data_processor import process_data_for_send
+from backend.data_processor import process_data_for_send, retally_overview
+from backend.rpc_client import get_reps_version, snapshot_reps, restore_reps
 from backend.ws_processor import process_message
-from nanows.api import NanoWebSocket
 from backend.helpers import MessageCounter
 from backend.elections import ElectionHandler
 from backend.overview import OverviewHandler
+from backend.lifecycle import ElectionLifecycle
+from backend.leader import LeaderLease
+from backend.ws_failover import NodeListener
+from backend.ingest import PriorityIngest
+from backend.rep_votes import RepVoteIndex
+from backend.search import SearchIndex
 from backend.cache_service import MemcacheCache
-from asyncio import Lock, sleep as aio_sleep
+from backend.snapshot import encode_snapshot, save_snapshot, load_snapshot
+from backend.supervisor import heartbeat, idle
+from backend.metrics import (aggregation_tick_seconds, aggregation_stage_seconds,
+                             aggregation_delta_elections, aggregation_delta_votes)
+from asyncio import Lock, gather, to_thread, sleep as aio_sleep
+from urllib.parse import urlparse
+from time import perf_counter
 from os import getenv
 
 import logging
@@ -15,75 +27,346 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Quart")
 
 WS_URL = getenv("WS_URL")
+# Comma separated list of node websockets, optionally named: "node1=ws://a:7078,ws://b:7078"
+WS_URLS = getenv("WS_URLS")
+# Keep a second, subscribed connection per node to fail over to without a gap
+WS_HOT_STANDBY = getenv("WS_HOT_STANDBY", "false").lower() in ("1", "true", "yes")
+WS_FAILOVER_OVERLAP = float(getenv("WS_FAILOVER_OVERLAP", 2))
+# Decode raw frames with orjson and keep only the fields we ingest, "false" uses nanows' decoding
+WS_RAW_FRAMES = getenv("WS_RAW_FRAMES", "true").lower() in ("1", "true", "yes")
 MEMCACHE_HOST = getenv("MEMCACHE_HOST")
 MEMCACHE_PORT = getenv("MEMCACHE_PORT")
+ELECTION_LATE_VOTE_WINDOW = int(getenv("ELECTION_LATE_VOTE_WINDOW", 120))
+ELECTION_STALE_AFTER = int(getenv("ELECTION_STALE_AFTER", 900))
+ELECTION_RETENTION = int(getenv("ELECTION_RETENTION", 86400))
+ELECTION_MAX_TOMBSTONES = int(getenv("ELECTION_MAX_TOMBSTONES", 500000))
+LIFECYCLE_SWEEP_INTERVAL = 10
+LEADER_LEASE_TTL = int(getenv("LEADER_LEASE_TTL", 6))
+INSTANCE_ID = getenv("INSTANCE_ID")
+MERGE_SHARDS = int(getenv("MERGE_SHARDS", 1))
+# "binary" or "json", both formats are always readable so it can be switched at any time
+ELECTION_RECORD_FORMAT = getenv("ELECTION_RECORD_FORMAT", "binary")
+ELECTION_RECORD_COMPRESS_MIN_BYTES = int(getenv("ELECTION_RECORD_COMPRESS_MIN_BYTES", 16384))
+# "segments" appends each tick's votes to a log next to the record, "records" rewrites the whole record
+ELECTION_STORAGE = getenv("ELECTION_STORAGE", "segments")
+ELECTION_SEGMENT_COMPACT_AFTER = int(getenv("ELECTION_SEGMENT_COMPACT_AFTER", 32))
+# Well under memcached's 1 MB item limit, past which appends to a log fail
+ELECTION_SEGMENT_COMPACT_BYTES = int(getenv("ELECTION_SEGMENT_COMPACT_BYTES", 512 * 1024))
+# Elections whose assembled record the leader keeps to merge without reading them back
+ELECTION_SEGMENT_CACHED_RECORDS = int(getenv("ELECTION_SEGMENT_CACHED_RECORDS", 2000))
+# Vote queue depth past which votes are shed, see PriorityIngest
+INGEST_OVERLOAD_DEPTH = int(getenv("INGEST_OVERLOAD_DEPTH", 5000))
+INGEST_MAX_QUEUE = int(getenv("INGEST_MAX_QUEUE", 100000))
+INGEST_DEFER_WEIGHT_PERCENT = float(getenv("INGEST_DEFER_WEIGHT_PERCENT", 0.1))
+# Recent votes kept per representative for /api/rep/<account>/votes
+REP_VOTES_PER_REP = int(getenv("REP_VOTES_PER_REP", 1000))
+REP_VOTES_MAX_REPS = int(getenv("REP_VOTES_MAX_REPS", 5000))
+# Bounds of the search index, about 100 bytes per election
+SEARCH_MAX_ELECTIONS = int(getenv("SEARCH_MAX_ELECTIONS", 1000000))
+SEARCH_MAX_ACCOUNTS = int(getenv("SEARCH_MAX_ACCOUNTS", 200000))
+SEARCH_PER_ACCOUNT = int(getenv("SEARCH_PER_ACCOUNT", 100))
+# Local file for warm restarts, snapshotting is off when unset
+SNAPSHOT_PATH = getenv("SNAPSHOT_PATH")
+SNAPSHOT_INTERVAL = int(getenv("SNAPSHOT_INTERVAL", 30))
+SNAPSHOT_MAX_AGE = int(getenv("SNAPSHOT_MAX_AGE", 3600))
 
 
+def parse_ws_endpoints(value):
+    endpoints = {}
+    for entry in filter(None, (part.strip() for part in (value or "").split(","))):
+        source, _, url = entry.partition("=") if "=" in entry.split("://")[0] else ("", "", entry)
+        source = source or urlparse(url).hostname or url
+        if source in endpoints:
+            source = f"{source}-{len(endpoints)}"
+        endpoints[source] = url
+    return endpoints
+
+
+WS_ENDPOINTS = parse_ws_endpoints(WS_URLS or WS_URL)
+
 election_cache = MemcacheCache(
-    host=MEMCACHE_HOST, port=MEMCACHE_PORT, prefix="el_")
+    host=MEMCACHE_HOST, port=MEMCACHE_PORT, prefix="el_",
+    binary_records=ELECTION_RECORD_FORMAT == "binary",
+    compress_min_bytes=ELECTION_RECORD_COMPRESS_MIN_BYTES)
 overview_cache = MemcacheCache(
     host=MEMCACHE_HOST, port=MEMCACHE_PORT, prefix="ov_")
+leader_cache = MemcacheCache(
+    host=MEMCACHE_HOST, port=MEMCACHE_PORT, prefix="ld_")
 
-election_handler = ElectionHandler(election_cache)
+election_handler = ElectionHandler(election_cache, shards=MERGE_SHARDS,
+                                   segments=ELECTION_STORAGE == "segments",
+                                   compact_after=ELECTION_SEGMENT_COMPACT_AFTER,
+                                   compact_bytes=ELECTION_SEGMENT_COMPACT_BYTES,
+                                   cached_records=ELECTION_SEGMENT_CACHED_RECORDS)
 overview_handler = OverviewHandler(overview_cache)
+lifecycle = ElectionLifecycle(election_cache,
+                              late_vote_window=ELECTION_LATE_VOTE_WINDOW,
+                              stale_after=ELECTION_STALE_AFTER,
+                              retention=ELECTION_RETENTION,
+                              max_tombstones=ELECTION_MAX_TOMBSTONES,
+                              store=election_handler)
+rep_votes = RepVoteIndex(per_rep=REP_VOTES_PER_REP, max_reps=REP_VOTES_MAX_REPS)
+search_index = SearchIndex(max_elections=SEARCH_MAX_ELECTIONS, max_accounts=SEARCH_MAX_ACCOUNTS,
+                           per_account=SEARCH_PER_ACCOUNT)
+# Only the lease holder ingests and aggregates, other instances serve reads
+leader_lease = LeaderLease(leader_cache, ttl=LEADER_LEASE_TTL, instance_id=INSTANCE_ID)
 
 elections_temp = {}
 election_results_lock = Lock()
+# Snapshot state held back until this instance holds the lease, see apply_restored_state
+restored_pending = {}
+restored_overview = {}
+# Elections sealed by the sweeper, taken out of the unconfirmed index by the next tick
+sealed_since_tick = set()
+
+
+async def ingest_message(message, source):
+    await process_message(message, elections_temp, lifecycle, source, rep_votes)
+
+
+ingest = PriorityIngest(ingest_message, election_results_lock,
+                        max_queue=INGEST_MAX_QUEUE,
+                        overload_depth=INGEST_OVERLOAD_DEPTH,
+                        defer_weight_percent=INGEST_DEFER_WEIGHT_PERCENT)
 
 current_hash = None
+# Overview hash last read from the cache, for instances that don't aggregate
+followed_hash = None
+# Weight snapshot the live overview entries were last tallied with
+tallied_snapshot = 0
+
+merge_seconds = aggregation_stage_seconds.labels("merge")
+transform_seconds = aggregation_stage_seconds.labels("transform")
+overview_seconds = aggregation_stage_seconds.labels("overview")
+retally_seconds = aggregation_stage_seconds.labels("retally")
 
 
 async def get_election_details(transaction_hash):
-    return await election_cache.get(transaction_hash)
+    election = (await election_handler.load([transaction_hash])).get(transaction_hash)
+    if election:
+        election["lifecycle"] = lifecycle.describe(transaction_hash)
+    return election
 
 
 async def get_election_overview():
+    global followed_hash
     # Return a subset of the available data to improve frontend speed
     processed_elections = await overview_handler.retrieve_election_data(
         num_confirmed=50, num_unconfirmed=100)
 
-    return current_hash, processed_elections
+    if leader_lease.is_leader:
+        return current_hash, processed_elections
+    followed_hash = await overview_handler.retrieve_overview_hash()
+    return followed_hash, processed_elections
+
+
+def get_overview_version():
+    """Hash of the current overview without a cache round trip, None before the first aggregation."""
+    return current_hash if leader_lease.is_leader else followed_hash
+
+
+async def get_overview_page(status, limit, cursor=None):
+    return await overview_handler.retrieve_page(status, limit, cursor)
+
+
+def get_rep_votes(account, limit, before=None):
+    return rep_votes.votes(account, limit, before)
+
+
+def search_elections(query, limit):
+    return search_index.search(query, limit)
+
+
+def index_block_info(block_info):
+    search_index.add_block_info(block_info)
+
+
+async def retally_live_elections():
+    """Bring unconfirmed overview entries up to date after online weights changed."""
+    global current_hash, tallied_snapshot
+    snapshot = get_reps_version()
+    start = perf_counter()
+    overview = await overview_handler.retrieve_unconfirmed_elections()
+    elections = await election_handler.load(overview.keys())
+    retallied = await retally_overview(overview, elections)
+    if retallied:
+        current_hash = await overview_handler.process_and_cache_elections(retallied)
+    retally_seconds.observe(perf_counter() - start)
+    tallied_snapshot = snapshot
+    logger.info(f"Re-tallied {len(retallied)} live elections for weight snapshot {snapshot}")
 
 
 async def aggregate_election_overview():
-    global elections_temp, current_hash
+    global elections_temp
     while True:
-        async with election_results_lock:
-            elections_delta = elections_temp
+        if not leader_lease.is_leader:
             elections_temp = {}
+            # Another instance merges meanwhile, what we last wrote goes stale
+            election_handler.forget()
+            idle()
+            await leader_lease.wait_for_leadership()
 
-        updated_elections = await election_handler.merge_elections(elections_delta)
+        await apply_restored_state()
+        await aggregate_tick()
+        heartbeat()
+        await aio_sleep(0.45)
 
-        # View Transformer
-        processed_update_elections = await process_data_for_send(updated_elections)
 
-        # View Aggregator
-        if processed_update_elections:
-            current_hash = await overview_handler.process_and_cache_elections(processed_update_elections)
+async def aggregate_tick():
+    global elections_temp
+    async with election_results_lock:
+        elections_delta = elections_temp
+        elections_temp = {}
+    await aggregate_delta(elections_delta)
 
-        await aio_sleep(0.45)
 
+async def aggregate_delta(elections_delta):
+    global current_hash, sealed_since_tick
+    if sealed_since_tick:
+        # Done here rather than in the sweeper, the tick rewrites the index
+        sealed, sealed_since_tick = sealed_since_tick, set()
+        await overview_handler.drop_unconfirmed(sealed)
+    if tallied_snapshot != get_reps_version():
+        await retally_live_elections()
 
-async def run_nano_ws_listener():
-    # This processes all the incoming websocket messages and puts them into elections_temp
-    counter = MessageCounter(logger=logger)
+    tick_start = perf_counter()
+    aggregation_delta_elections.observe(len(elections_delta))
+    search_index.add_elections(elections_delta)
+    aggregation_delta_votes.observe(sum(
+        election["votes"]["normal"] + election["votes"]["final"] for election in elections_delta.values()))
+
+    updated_elections = await election_handler.merge_elections(
+        elections_delta, expire=lifecycle.record_expire)
+    lifecycle.track(updated_elections)
+    merge_done = perf_counter()
+    merge_seconds.observe(merge_done - tick_start)
+
+    # View Transformer
+    processed_update_elections = await process_data_for_send(updated_elections)
+    transform_done = perf_counter()
+    transform_seconds.observe(transform_done - merge_done)
+
+    # View Aggregator
+    if processed_update_elections:
+        current_hash = await overview_handler.process_and_cache_elections(processed_update_elections)
+    tick_done = perf_counter()
+    overview_seconds.observe(tick_done - transform_done)
+    aggregation_tick_seconds.observe(tick_done - tick_start)
+
+
+async def flush_pending_elections():
+    """Merge what the listeners buffered since the last tick, so a deploy loses no votes."""
+    if leader_lease.is_leader:
+        await ingest.drain()
+        await aggregate_tick()
+
+
+async def snapshot_state():
+    if not SNAPSHOT_PATH:
+        return
+    overview = await overview_handler.retrieve_election_data(
+        num_confirmed=50, num_unconfirmed=100)
+    # Encoded under the lock, the listeners keep mutating the pending deltas
+    async with election_results_lock:
+        pending = {block_hash: {**election, "votes": {key: value for key, value in election["votes"].items()
+                                                       if key != "_index"}}
+                   for block_hash, election in elections_temp.items()}
+        # Restored deltas not applied yet, a follower must not lose them either
+        for block_hash, election in restored_pending.items():
+            pending.setdefault(block_hash, election)
+        data = encode_snapshot({
+            "pending": pending,
+            "reps": snapshot_reps(),
+            "lifecycle": lifecycle.snapshot(),
+            "overview": overview,
+        })
+    await to_thread(save_snapshot, SNAPSHOT_PATH, data)
+
+
+async def restore_state():
+    """Load the last snapshot so the first overview after a restart uses real weights and quorum."""
+    global restored_pending, restored_overview
+    if not SNAPSHOT_PATH:
+        return
+    state = await to_thread(load_snapshot, SNAPSHOT_PATH, SNAPSHOT_MAX_AGE)
+    if not state:
+        return
+
+    restore_reps(state.get("reps", {}))
+    lifecycle.restore(state.get("lifecycle", {}))
+    # Everything the lifecycle still tracks, sealed elections included, is searchable again
+    search_index.add_hashes(list(lifecycle.elections) + list(lifecycle.tombstones))
+    # Applying the deltas writes the shared overview, which only the lease holder
+    # may do, so they wait for the aggregation loop to get the lease
+    restored_pending = state.get("pending", {})
+    restored_overview = state.get("overview", {})
+    logger.info(f"Restored state snapshot: {len(restored_pending)} pending elections, "
+                f"{len(restored_overview)} overview entries")
+
+
+async def apply_restored_state():
+    """Merge the snapshot's pending deltas and refill the overview, once we hold the lease."""
+    global restored_pending, restored_overview
+    if not leader_lease.is_leader or not (restored_pending or restored_overview):
+        return
+    pending, overview = restored_pending, restored_overview
+    restored_pending, restored_overview = {}, {}
+    try:
+        # The overview normally outlives us in memcache, only refill it if memcache restarted too
+        if overview and not await overview_handler.retrieve_overview_hash():
+            await overview_handler.process_and_cache_elections(overview)
+        if pending:
+            await aggregate_delta(pending)
+    except Exception as exc:
+        logger.warning(f"Applying the restored state snapshot failed: {exc}")
+    logger.info(f"Applied restored state: {len(pending)} pending elections, {len(overview)} overview entries")
+
+
+async def run_state_snapshots():
+    if not SNAPSHOT_PATH:
+        return
     while True:
+        await aio_sleep(SNAPSHOT_INTERVAL)
         try:
-            # nano_ws = NanoWebSocket(url="wss://proxy.nanobrowse.com/ws")
-            nano_ws = NanoWebSocket(url=WS_URL)
-            await nano_ws.connect()
-            # await nano_ws.subscribe_new_unconfirmed_block()
-            await nano_ws.subscribe_vote()
-            await nano_ws.subscribe_started_election()
-            await nano_ws.subscribe_confirmation(include_block=False)
-            await nano_ws.subscribe_stopped_election()
-
-            async for message in nano_ws.receive_messages():
-                counter.increment()
-                async with election_results_lock:
-                    await process_message(message, elections_temp)
+            await snapshot_state()
         except Exception as exc:
-            logging.warn(
-                f"Websocket closed with Exception : {exc}\n Reconnecting...")
-            # attemp reconnect after 1 second (while true)
-            await aio_sleep(1)
+            logger.warning(f"State snapshot failed: {exc}")
+        heartbeat()
+
+
+async def run_lifecycle_sweeper():
+    while True:
+        if not leader_lease.is_leader:
+            idle()
+            await leader_lease.wait_for_leadership()
+        try:
+            sealed_since_tick.update(await lifecycle.sweep())
+        except Exception as exc:
+            logger.warning(f"Lifecycle sweep failed: {exc}")
+        heartbeat()
+        await aio_sleep(LIFECYCLE_SWEEP_INTERVAL)
+
+
+async def run_nano_ws_listeners():
+    # One listener per node, all feeding elections_temp. Votes are only tagged
+    # with their source when there is more than one node to compare.
+    tag_sources = len(WS_ENDPOINTS) > 1
+    await gather(ingest.run(), *(run_nano_ws_listener(url, source if tag_sources else None)
+                   for source, url in WS_ENDPOINTS.items()))
+
+
+async def run_nano_ws_listener(url=WS_URL, source=None):
+    # This processes all the incoming websocket messages and puts them into elections_temp
+    counter = MessageCounter(logger=logger, source=source)
+
+    async def handle(message):
+        counter.increment(message.get("topic"))
+        ingest.submit(message, source)
+
+    listener = NodeListener(url, handle, source=source or urlparse(url).hostname,
+                            hot_standby=WS_HOT_STANDBY,
+                            overlap=WS_FAILOVER_OVERLAP,
+                            raw_frames=WS_RAW_FRAMES,
+                            wait_until_enabled=leader_lease.wait_for_leadership,
+                            is_enabled=lambda: leader_lease.is_leader)
+    await listener.run()
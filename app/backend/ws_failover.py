@@ -0,0 +1,190 @@
+from backend.metrics import registry
+from backend.ws_frames import receive_frames
+from nanows.api import NanoWebSocket
+from asyncio import gather, sleep as aio_sleep
+from collections import deque
+from time import monotonic
+import logging
+import random
+
+logger = logging.getLogger("Quart")
+
+GAP_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+ws_disconnects = registry.counter(
+    "ws_disconnects_total", "Node websocket connections that dropped", ("source", "slot"))
+ws_failovers = registry.counter(
+    "ws_failovers_total", "Promotions of the standby connection to primary", ("source",))
+ws_gap_seconds = registry.histogram(
+    "ws_gap_seconds", "Time without any connection feeding the pipeline", ("source",), buckets=GAP_BUCKETS)
+ws_messages_lost_estimate = registry.counter(
+    "ws_messages_lost_estimate_total", "Messages estimated lost during gaps, from the recent message rate", ("source",))
+ws_replayed = registry.counter(
+    "ws_standby_replayed_total", "Buffered standby messages replayed on promotion", ("source", "result"))
+
+
+def fingerprint(message):
+    """Identity of a node message that is the same on every connection to that node."""
+    msg = message.get("message") or {}
+    topic = message.get("topic")
+    if topic == "vote":
+        return (topic, msg.get("account"), msg.get("timestamp"), tuple(msg.get("blocks", ())))
+    return (topic, msg.get("hash"))
+
+
+class NodeListener:
+    """
+    Feeds the messages of one node websocket into `handle`.
+
+    With `hot_standby` a second, already subscribed connection to the same node
+    runs alongside the primary and keeps the last `overlap` seconds of messages.
+    When the primary drops, the standby is promoted at once and its buffer is
+    replayed, skipping messages the primary already delivered. Dropped
+    connections reconnect with exponential backoff. With `raw_frames` the
+    frames are decoded by backend.ws_frames instead of nanows' json.loads.
+    """
+
+    def __init__(self, url, handle, source=None, hot_standby=False, overlap=2.0,
+                 wait_until_enabled=None, is_enabled=None,
+                 min_backoff=0.5, max_backoff=30.0, raw_frames=True):
+        self.url = url
+        self.handle = handle
+        self.source = source or "default"
+        self.hot_standby = hot_standby
+        self.overlap = overlap
+        self.wait_until_enabled = wait_until_enabled
+        self.is_enabled = is_enabled or (lambda: True)
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.raw_frames = raw_frames
+
+        self.slots = ["primary", "standby"] if hot_standby else ["primary"]
+        self.active = None
+        self.connected = set()
+        self.buffers = {slot: deque() for slot in self.slots}
+        # Fingerprints delivered within the overlap window, for dedup on promotion
+        self.recent = deque()
+        self.recent_fingerprints = {}
+        self.gap_started = None
+
+        # Messages per second, used to estimate what a gap cost us
+        self.rate = 0.0
+        self._rate_count = 0
+        self._rate_started = monotonic()
+
+        self._gap = ws_gap_seconds.labels(self.source)
+        self._lost = ws_messages_lost_estimate.labels(self.source)
+        self._failovers = ws_failovers.labels(self.source)
+
+    async def run(self):
+        await gather(*(self._connection_loop(slot) for slot in self.slots))
+
+    async def _subscribe(self, nano_ws):
+        await nano_ws.connect()
+        # await nano_ws.subscribe_new_unconfirmed_block()
+        await nano_ws.subscribe_vote()
+        await nano_ws.subscribe_started_election()
+        await nano_ws.subscribe_confirmation(include_block=False)
+        await nano_ws.subscribe_stopped_election()
+
+    async def _connection_loop(self, slot):
+        backoff = self.min_backoff
+        while True:
+            if self.wait_until_enabled:
+                await self.wait_until_enabled()
+            planned = False
+            try:
+                nano_ws = NanoWebSocket(url=self.url)
+                await self._subscribe(nano_ws)
+                backoff = self.min_backoff
+                self.connected.add(slot)
+                if self.active is None:
+                    await self._promote(slot)
+
+                messages = receive_frames(nano_ws) if self.raw_frames else nano_ws.receive_messages()
+                async for message in messages:
+                    if not self.is_enabled():
+                        planned = True
+                        await nano_ws.disconnect()
+                        break
+                    if self.active == slot:
+                        await self._deliver(message)
+                    else:
+                        self._buffer(slot, message)
+            except Exception as exc:
+                logger.warning(f"Websocket {self.source} ({slot}) closed with Exception : {exc}")
+            finally:
+                if slot in self.connected and not planned:
+                    ws_disconnects.labels(self.source, slot).inc()
+                self.connected.discard(slot)
+                self.buffers[slot].clear()
+                if self.active == slot:
+                    await self._fail_over(slot)
+
+            await aio_sleep(backoff * random.uniform(0.8, 1.2))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _deliver(self, message):
+        if self.hot_standby:
+            now = monotonic()
+            key = fingerprint(message)
+            self.recent.append((now, key))
+            self.recent_fingerprints[key] = self.recent_fingerprints.get(key, 0) + 1
+            self._trim_recent(now)
+        self._update_rate()
+        await self.handle(message)
+
+    def _buffer(self, slot, message):
+        now = monotonic()
+        buffer = self.buffers[slot]
+        buffer.append((now, message))
+        while buffer and buffer[0][0] < now - self.overlap:
+            buffer.popleft()
+
+    def _trim_recent(self, now):
+        while self.recent and self.recent[0][0] < now - self.overlap:
+            _, key = self.recent.popleft()
+            remaining = self.recent_fingerprints[key] - 1
+            if remaining:
+                self.recent_fingerprints[key] = remaining
+            else:
+                del self.recent_fingerprints[key]
+
+    def _update_rate(self):
+        self._rate_count += 1
+        elapsed = monotonic() - self._rate_started
+        if elapsed >= 1.0:
+            self.rate = 0.7 * self.rate + 0.3 * (self._rate_count / elapsed)
+            self._rate_count = 0
+            self._rate_started = monotonic()
+
+    async def _fail_over(self, slot):
+        self.active = None
+        if not self.is_enabled():
+            return
+        standby = next((other for other in self.connected if other != slot), None)
+        self.gap_started = monotonic()
+        if standby is not None:
+            self._failovers.inc()
+            logger.warning(f"Websocket {self.source}: promoting standby connection")
+            await self._promote(standby)
+
+    async def _promote(self, slot):
+        self.active = slot
+        if self.gap_started is not None:
+            gap = monotonic() - self.gap_started
+            self._gap.observe(gap)
+            if not self.buffers[slot]:
+                self._lost.inc(gap * self.rate)
+            self.gap_started = None
+
+        # Replay what the standby saw during the overlap window that the old
+        # primary didn't deliver before it dropped
+        buffer, self.buffers[slot] = self.buffers[slot], deque()
+        self._trim_recent(monotonic())
+        for _, message in buffer:
+            if fingerprint(message) in self.recent_fingerprints:
+                ws_replayed.labels(self.source, "duplicate").inc()
+                continue
+            ws_replayed.labels(self.source, "replayed").inc()
+            await self._deliver(message)
@@ -0,0 +1,87 @@
+from backend.metrics import registry
+from typing import Any, Dict, Optional, Union
+from inspect import signature
+from websockets.exceptions import ConnectionClosed
+import orjson
+
+# Raw websocket frames are routed on their topic before they are parsed.
+# Votes are almost every frame, start with VOTE_PREFIX and are parsed whole
+# with orjson: picking fields out in Python costs more than orjson spends
+# on the ones we don't read. So do small frames, parsing them is cheaper
+# than searching them. Larger frames are routed with a bytes search for
+# "topic" (the node writes it first) and topics we don't ingest are dropped
+# unparsed. Cutting the block body off confirmations subscribed with
+# include_block was measured slower than orjson parsing it, see
+# benchmarks.ws_decode.
+
+INGEST_TOPICS = ("vote", "started_election", "stopped_election", "confirmation")
+INGEST_TOPIC_BYTES = frozenset(topic.encode() for topic in INGEST_TOPICS)
+VOTE_PREFIX = b'{"topic":"vote"'
+TOPIC_MARKER = b'"topic":"'
+# Below this orjson parses a frame about as fast as it is searched (~1µs), see benchmarks.ws_decode
+ROUTE_MIN_BYTES = 2048
+# How far into the frame "topic" may start, past that the frame is parsed to find it
+TOPIC_SEARCH_BYTES = 64
+
+frames_skipped = registry.counter(
+    "ws_frames_skipped_total", "Websocket frames dropped before decoding, by topic", ("topic",))
+
+
+def frame_topic(frame: bytes) -> Optional[bytes]:
+    start = frame.find(TOPIC_MARKER, 0, TOPIC_SEARCH_BYTES)
+    if start < 0:
+        return None
+    start += len(TOPIC_MARKER)
+    end = frame.find(b'"', start)
+    return frame[start:end] if end > 0 else None
+
+
+_skipped = {}
+
+
+def _skip(topic: Optional[str]) -> None:
+    counter = _skipped.get(topic)
+    if counter is None:
+        counter = _skipped[topic] = frames_skipped.labels(topic or "none")
+    counter.inc()
+
+
+def decode_frame(frame: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+    """Decode a node websocket frame, None for frames we don't ingest."""
+    if isinstance(frame, str):
+        frame = frame.encode()
+    if len(frame) >= ROUTE_MIN_BYTES and not frame.startswith(VOTE_PREFIX):
+        topic = frame_topic(frame)
+        if topic is not None and topic not in INGEST_TOPIC_BYTES:
+            _skip(topic.decode(errors="replace"))
+            return None
+
+    # Acks and frames laid out differently end up here too
+    message = orjson.loads(frame)
+    if not isinstance(message, dict) or message.get("topic") not in INGEST_TOPICS:
+        _skip(message.get("topic") if isinstance(message, dict) else None)
+        return None
+    return message
+
+
+async def _raw_frames(websocket):
+    # Newer websockets can hand over text frames as bytes, skipping a UTF-8 decode and re-encode
+    if "decode" in signature(websocket.recv).parameters:
+        while True:
+            yield await websocket.recv(decode=False)
+    else:
+        async for frame in websocket:
+            yield frame
+
+
+async def receive_frames(nano_ws):
+    """NanoWebSocket.receive_messages on raw frames decoded with decode_frame."""
+    if not nano_ws.websocket:
+        raise ConnectionError("WebSocket connection is not established.")
+    try:
+        async for frame in _raw_frames(nano_ws.websocket):
+            message = decode_frame(frame)
+            if message is not None:
+                yield message
+    except ConnectionClosed:
+        await nano_ws.disconnect()
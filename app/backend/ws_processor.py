@@ -1,41 +1,92 @@
+from backend.metrics import registry
+from os import getenv
 
+# Store every rebroadcast copy of a vote in votes.raw next to the deduplicated detail
+KEEP_RAW_VOTES = getenv("KEEP_RAW_VOTES", "false").lower() in ("1", "true", "yes")
 
-async def process_message(message, election_results):
+votes_ingested = registry.counter(
+    "votes_ingested_total", "Votes received per block hash, including rebroadcasts")
+votes_deduplicated = registry.counter(
+    "votes_deduplicated_total", "Rebroadcast votes folded into an existing (rep, vote type) entry")
+
+
+async def process_message(message, election_results, lifecycle=None, source=None, rep_votes=None):
     topic = message.get("topic")
     msg = message.get("message")
     msg_time = int(message.get("time"))
 
     if topic == "vote":
-        _process_vote_message(msg, election_results, msg_time)
+        _process_vote_message(msg, election_results, msg_time, lifecycle, source, rep_votes)
     elif topic in ["started_election", "stopped_election", "confirmation"]:
-        _process_event_message(msg, election_results, msg_time, topic)
+        _process_event_message(msg, election_results, msg_time, topic, lifecycle)
 
 
-def _process_vote_message(msg, election_results, msg_time):
+def _process_vote_message(msg, election_results, msg_time, lifecycle=None, source=None, rep_votes=None):
     account = msg.get("account")
     timestamp = msg.get("timestamp")
     vote_type = "final" if timestamp == "18446744073709551615" else "normal"
 
     for block_hash in msg.get("blocks", []):
+        # The rep index also wants late votes on sealed elections
+        if rep_votes is not None:
+            rep_votes.record(account, block_hash, vote_type, msg_time)
+        # Sealed elections only count late votes on their tombstone
+        if lifecycle and not lifecycle.accept(block_hash):
+            continue
         _initialise_block_hash(election_results, block_hash, msg_time)
+        votes = election_results[block_hash]['votes']
+
+        votes_ingested.inc()
 
-        # Increment vote count
-        election_results[block_hash]['votes'][vote_type] += 1
+        if KEEP_RAW_VOTES:
+            votes.setdefault('raw', []).append({
+                "type": vote_type,
+                "time": msg_time,
+                "account": account
+            })
+
+        # Rebroadcasts of the same vote only update the existing detail entry
+        index = votes.setdefault('_index', {})
+        existing = index.get((account, vote_type))
+        if existing is not None:
+            existing["time"] = min(existing["time"], msg_time)
+            existing["last_time"] = max(existing["last_time"], msg_time)
+            sources = existing.get("sources")
+            if source is not None and sources is not None and source not in sources:
+                # Another node's copy of a vote already counted, only its arrival is kept
+                # to compare vantage points
+                sources[source] = msg_time
+            else:
+                votes[vote_type] += 1
+                existing["count"] += 1
+            votes_deduplicated.inc()
+            continue
+
+        votes[vote_type] += 1
 
         # Add vote detail
-        election_results[block_hash]['votes']['detail'].append({
+        vote = {
             "type": vote_type,
             "time": msg_time,
-            "account": account
-        })
+            "account": account,
+            "count": 1,
+            "last_time": msg_time
+        }
+        if source is not None:
+            vote["sources"] = {source: msg_time}
+        index[(account, vote_type)] = vote
+        detail = votes['detail']
+        detail.append(vote)
 
-        # Sort vote details by time
-        election_results[block_hash]['votes']['detail'].sort(
-            key=lambda x: x['time'])
+        # Keep vote details sorted by time, messages mostly arrive in order
+        if len(detail) > 1 and detail[-2]['time'] > msg_time:
+            detail.sort(key=lambda x: x['time'])
 
 
-def _process_event_message(msg, election_results, msg_time, topic):
+def _process_event_message(msg, election_results, msg_time, topic, lifecycle=None):
     block_hash = msg.get("hash")
+    if lifecycle and not lifecycle.accept(block_hash):
+        return
     _initialise_block_hash(election_results, block_hash, msg_time)
 
     if topic == "started_election":
@@ -51,11 +102,22 @@ def _process_event_message(msg, election_results, msg_time, topic):
         election_results[block_hash]['is_active'] = False
         election_results[block_hash]['is_confirmed'] = True
         election_results[block_hash]['amount'] = msg.get("amount")
-        election_results[block_hash]["first_confirmed"] = msg_time
+        if msg.get("account"):
+            # For the search index, the block's own account
+            election_results[block_hash]['block_account'] = msg.get("account")
+        # Several nodes may report the same confirmation
+        first_confirmed = election_results[block_hash]["first_confirmed"]
+        if first_confirmed is None or msg_time < first_confirmed:
+            election_results[block_hash]["first_confirmed"] = msg_time
 
 
 def _initialise_block_hash(election_results, block_hash, msg_time):
-    if block_hash not in election_results:
+    election = election_results.get(block_hash)
+    if election is not None:
+        # Events are ingested ahead of queued votes, so arrival order isn't time order
+        if msg_time < election["first_seen"]:
+            election["first_seen"] = msg_time
+    else:
         election_results[block_hash] = {
             "votes": {
                 "normal": 0,
@@ -0,0 +1,86 @@
+"""
+Compare encoding records that carry 128-bit weights as ints (orjson fails
+and the stdlib json fallback runs) with the codec's decimal string weights.
+
+Covers the overview entries (cache writes, broadcast, overview hash) and the
+election detail summary with every online rep.
+
+    python -m benchmarks.codec_bench --elections 500
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend import codec, rpc_client
+from backend.data_processor import election_formatter, process_data_for_send
+from benchmarks.tally_crossover import build_elections
+from benchmarks.traffic import load_fixture
+
+
+def legacy_dumps(obj):
+    try:
+        return codec.orjson.dumps(obj)
+    except TypeError:
+        return json.dumps(obj).encode("utf-8")
+
+
+def int_weights(entries, *fields):
+    """The same records with the weights as ints, like before the codec."""
+    return {key: {**entry, **{field: int(entry[field]) for field in fields if field in entry}}
+            for key, entry in entries.items()}
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def compare(name, repeat, legacy_func, legacy_obj, codec_func, codec_obj):
+    legacy_s = best_of(repeat, legacy_func, legacy_obj)
+    codec_s = best_of(repeat, codec_func, codec_obj)
+    return {
+        "payload": name,
+        "legacy_ms": round(legacy_s * 1000, 3),
+        "codec_ms": round(codec_s * 1000, 3),
+        "speedup": round(legacy_s / codec_s, 2) if codec_s else None,
+        "legacy_bytes": len(legacy_func(legacy_obj)),
+        "codec_bytes": len(codec_func(codec_obj)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the JSON codec on records with large weights")
+    parser.add_argument("--elections", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    online_reps, quorum = load_fixture()
+    rpc_client.online_reps = online_reps
+    rpc_client.confirmation_quorum = quorum
+
+    store = asyncio.run(build_elections(online_reps, args.elections, 4))
+    overview = asyncio.run(process_data_for_send(store))
+    legacy_overview = int_weights(overview, "normal_weight", "final_weight")
+
+    block_hash = next(iter(store))
+    detail = election_formatter({}, store[block_hash], online_reps)
+    legacy_detail = {**detail, "summary": int_weights(detail["summary"], "weight")}
+
+    results = [
+        compare("overview", args.repeat, legacy_dumps, legacy_overview, codec.dumps, overview),
+        compare("overview_hash", args.repeat,
+                lambda obj: json.dumps(obj, sort_keys=True).encode(), legacy_overview,
+                codec.dumps_sorted, overview),
+        compare("election_detail", args.repeat, legacy_dumps, legacy_detail, codec.dumps, detail),
+    ]
+    print(json.dumps({"elections": len(overview), "online_reps": len(online_reps),
+                      "codec_fallbacks": codec.codec_fallbacks.value, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
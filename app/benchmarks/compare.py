@@ -0,0 +1,62 @@
+"""
+Compare two pipeline benchmark reports and flag regressions.
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# metric -> True if a higher value is better
+METRICS = {
+    "throughput_per_s": True,
+    "p50_tick_ms": False,
+    "p99_tick_ms": False,
+    "alloc_bytes": False,
+    "peak_rss_kb": False,
+}
+
+
+def compare(before, after, threshold):
+    regressions = []
+    rows = []
+    for stage, after_stats in after["stages"].items():
+        before_stats = before["stages"].get(stage, {})
+        for metric, higher_is_better in METRICS.items():
+            old, new = before_stats.get(metric), after_stats.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = change < -threshold if higher_is_better else change > threshold
+            rows.append((stage, metric, old, new, change, worse))
+            if worse:
+                regressions.append((stage, metric))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two pipeline benchmark reports")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="allowed change in percent before flagging a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    if before.get("meta", {}).get("messages") != after.get("meta", {}).get("messages"):
+        print("warning: reports were generated with different traffic parameters")
+
+    rows, regressions = compare(before, after, args.threshold)
+    for stage, metric, old, new, change, worse in rows:
+        flag = "REGRESSION" if worse else ""
+        print(f"{stage:<10} {metric:<18} {old:>14} {new:>14} {change:>+8.1f}% {flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Report how many votes ingest-time deduplication folds away.
+
+Replays a recorded feed (see benchmarks.record_feed) or, without --feed, a
+synthetic vote storm, and compares the deduplicated vote detail with the raw
+stream of every rebroadcast copy.
+
+    python -m benchmarks.dedup_report --feed feed.jsonl
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import orjson
+
+from backend import rpc_client, ws_processor
+from backend.cache_service import InMemoryCache
+from backend.data_processor import process_data_for_send
+from backend.elections import ElectionHandler
+from backend.ws_processor import process_message
+from benchmarks.traffic import VoteStorm, load_fixture
+
+TICK_MS = 450
+
+
+def load_feed(path):
+    """Split a recorded feed into aggregation ticks by message time."""
+    ticks = []
+    current, tick_end = [], None
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            message = orjson.loads(line)
+            msg_time = int(message.get("time", 0))
+            if tick_end is None:
+                tick_end = msg_time + TICK_MS
+            if msg_time >= tick_end:
+                ticks.append(current)
+                current, tick_end = [], msg_time + TICK_MS
+            current.append(message)
+    if current:
+        ticks.append(current)
+    return ticks
+
+
+async def replay(ticks):
+    handler = ElectionHandler(InMemoryCache())
+    merge_s = transform_s = 0.0
+    for messages in ticks:
+        elections_temp = {}
+        for message in messages:
+            await process_message(message, elections_temp)
+
+        start = time.perf_counter()
+        updated = await handler.merge_elections(elections_temp)
+        merge_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        await process_data_for_send(updated)
+        transform_s += time.perf_counter() - start
+    return handler.cache.store, merge_s, transform_s
+
+
+def summarise(store):
+    copies = unique = detail_bytes = raw_bytes = 0
+    for election in store.values():
+        votes = election["votes"]
+        copies += votes["normal"] + votes["final"]
+        unique += len(votes["detail"])
+        detail_bytes += len(orjson.dumps(votes["detail"]))
+        raw_bytes += len(orjson.dumps(votes.get("raw", [])))
+    return copies, unique, detail_bytes, raw_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the vote deduplication ratio")
+    parser.add_argument("--feed", default=None, help="JSON lines file recorded with benchmarks.record_feed")
+    parser.add_argument("--elections", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    online_reps, quorum = load_fixture()
+    rpc_client.online_reps = online_reps
+    rpc_client.confirmation_quorum = quorum
+
+    if args.feed:
+        ticks = load_feed(args.feed)
+    else:
+        ticks = VoteStorm(online_reps, elections=args.elections, ticks=args.ticks).generate()
+
+    # The raw stream is only kept for the size comparison, merge and transform
+    # timings are taken from the default deduplicated run.
+    ws_processor.KEEP_RAW_VOTES = False
+    store, merge_s, transform_s = asyncio.run(replay(ticks))
+    ws_processor.KEEP_RAW_VOTES = True
+    raw_store, _, _ = asyncio.run(replay(ticks))
+
+    copies, unique, detail_bytes, _ = summarise(store)
+    _, _, _, raw_bytes = summarise(raw_store)
+
+    print(json.dumps({
+        "source": args.feed or "synthetic",
+        "messages": sum(len(messages) for messages in ticks),
+        "elections": len(store),
+        "vote_copies": copies,
+        "unique_votes": unique,
+        "dedup_ratio": round(copies / unique, 2) if unique else None,
+        "raw_detail_bytes": raw_bytes,
+        "dedup_detail_bytes": detail_bytes,
+        "size_reduction": round(raw_bytes / detail_bytes, 2) if detail_bytes else None,
+        "merge_ms": round(merge_s * 1000, 3),
+        "transform_ms": round(transform_s * 1000, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Measure how much CPU-bound work on the event loop delays vote ingestion.
+
+A probe stands in for the websocket reader: it wakes up every millisecond
+and records how late it was. Meanwhile `--clients` concurrent requests
+keep formatting election detail pages, and an aggregator transforms a
+large tick (process_data_for_send) and orders a large overview every
+0.45s. Runs once per executor kind with the offload thresholds of
+backend.executor and reports the probe's lateness percentiles and the work
+done:
+
+    python -m benchmarks.ingest_jitter --seconds 5 --clients 4
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend import rpc_client
+from backend.data_processor import build_overview_entries, election_formatter, election_votes
+from backend.executor import CpuExecutor, CPU_BATCH_VOTES, CPU_OFFLOAD_MIN_ENTRIES, CPU_OFFLOAD_MIN_VOTES
+from backend.overview import order_overview
+from backend.tally import count_votes
+from benchmarks.pipeline import percentile
+from benchmarks.tally_crossover import build_elections
+from benchmarks.traffic import load_fixture
+
+PROBE_INTERVAL = 0.001
+
+
+async def probe(until, lateness):
+    while time.perf_counter() < until:
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lateness.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def detail_client(executor, until, election, online_reps, served):
+    while time.perf_counter() < until:
+        await executor.run(election_formatter, {}, election, online_reps,
+                           size=len(election["votes"]["detail"]), min_size=CPU_OFFLOAD_MIN_VOTES)
+        served.append(1)
+        # Yield like a request handler writing its response
+        await asyncio.sleep(0)
+
+
+async def aggregator(executor, until, tick, overview, online_reps, quorum_delta, ticks):
+    while time.perf_counter() < until:
+        await executor.map_batches(build_overview_entries, tick, online_reps, quorum_delta, 1,
+                                   size_of=election_votes, batch_size=CPU_BATCH_VOTES,
+                                   min_size=CPU_OFFLOAD_MIN_VOTES)
+        await executor.run(order_overview, overview, size=len(overview), min_size=CPU_OFFLOAD_MIN_ENTRIES)
+        ticks.append(1)
+        await asyncio.sleep(0.45)
+
+
+async def measure(kind, workers, seconds, clients, election, tick, overview, online_reps, quorum_delta):
+    executor = CpuExecutor(kind, workers)
+    await executor.start()
+    lateness, served, ticks = [], [], []
+    until = time.perf_counter() + seconds
+    await asyncio.gather(probe(until, lateness),
+                         aggregator(executor, until, tick, overview, online_reps, quorum_delta, ticks),
+                         *(detail_client(executor, until, election, online_reps, served)
+                           for _ in range(clients)))
+    executor.shutdown()
+    lateness_ms = [value * 1000 for value in lateness]
+    return {
+        "executor": kind,
+        "probe_wakeups": len(lateness),
+        "p50_lateness_ms": round(percentile(lateness_ms, 50), 3),
+        "p99_lateness_ms": round(percentile(lateness_ms, 99), 3),
+        "max_lateness_ms": round(max(lateness_ms, default=0), 3),
+        "detail_pages_per_s": round(len(served) / seconds, 1),
+        "aggregation_ticks": len(ticks),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure ingest jitter under concurrent detail page load")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--tick-elections", type=int, default=2000,
+                        help="elections in the aggregated tick")
+    parser.add_argument("--overview", type=int, default=10000, help="entries in the ordered overview")
+    parser.add_argument("--executors", default="inline,thread,process")
+    args = parser.parse_args(argv)
+
+    online_reps, quorum = load_fixture()
+    rpc_client.online_reps = online_reps
+    rpc_client.confirmation_quorum = quorum
+    quorum_delta = int(quorum["quorum_delta"])
+    tick = asyncio.run(build_elections(online_reps, args.tick_elections, 8))
+    # The election with the most votes makes the heaviest page
+    election = max(tick.values(), key=lambda election: len(election["votes"]["detail"]))
+    entries = list(build_overview_entries(tick, online_reps, quorum_delta, 1).values())
+    overview = {"%064X" % number: entries[number % len(entries)] for number in range(args.overview)}
+
+    results = [asyncio.run(measure(kind, args.workers, args.seconds, args.clients, election, tick, overview,
+                                   online_reps, quorum_delta))
+               for kind in args.executors.split(",")]
+    print(json.dumps({"page_votes": len(election["votes"]["detail"]), "tick_votes": count_votes(tick),
+                      "overview_entries": len(overview), "online_reps": len(online_reps),
+                      "clients": args.clients, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
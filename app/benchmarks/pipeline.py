@@ -0,0 +1,206 @@
+"""
+End-to-end benchmark of the ingest and aggregation pipeline.
+
+Replays a synthetic vote storm through the real stages
+
+    process_message -> ElectionHandler.merge_elections
+    -> process_data_for_send -> OverviewHandler.update_overview_data
+
+and reports throughput, tick latency percentiles, allocations and peak RSS per
+stage as JSON. Run from the app directory:
+
+    python -m benchmarks.pipeline --output bench.json
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from backend import rpc_client
+from backend.cache_service import InMemoryCache, MemcacheCache
+from backend.data_processor import process_data_for_send
+from backend.elections import ElectionHandler
+from backend.overview import OverviewHandler
+from backend.ws_processor import process_message
+from benchmarks.traffic import VoteStorm, load_fixture
+
+STAGES = ["ingest", "merge", "transform", "overview"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_kb():
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def create_caches(memcache):
+    if memcache:
+        host, _, port = memcache.partition(":")
+        port = int(port or 11211)
+        return (MemcacheCache(host=host, port=port, prefix="bench_el_"),
+                MemcacheCache(host=host, port=port, prefix="bench_ov_"))
+    return InMemoryCache(), InMemoryCache()
+
+
+class StageRecorder:
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.stages = {stage: {"ticks_ms": [], "items": 0, "alloc_bytes": 0,
+                               "alloc_peak_bytes": 0, "peak_rss_kb": 0}
+                       for stage in STAGES}
+
+    def start(self):
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            self._alloc_start = tracemalloc.get_traced_memory()[0]
+        return time.perf_counter()
+
+    def stop(self, stage, started, items):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self.stages[stage]
+        stats["ticks_ms"].append(elapsed_ms)
+        stats["items"] += items
+        if self.trace_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            stats["alloc_bytes"] += max(0, current - self._alloc_start)
+            stats["alloc_peak_bytes"] = max(stats["alloc_peak_bytes"], peak - self._alloc_start)
+        stats["peak_rss_kb"] = peak_rss_kb()
+
+
+async def replay(ticks, memcache, recorder):
+    election_cache, overview_cache = create_caches(memcache)
+    election_handler = ElectionHandler(election_cache)
+    overview_handler = OverviewHandler(overview_cache)
+
+    for messages in ticks:
+        elections_temp = {}
+
+        started = recorder.start()
+        for message in messages:
+            await process_message(message, elections_temp)
+        recorder.stop("ingest", started, len(messages))
+
+        started = recorder.start()
+        updated_elections = await election_handler.merge_elections(elections_temp)
+        recorder.stop("merge", started, len(elections_temp))
+
+        started = recorder.start()
+        processed_update_elections = await process_data_for_send(updated_elections)
+        recorder.stop("transform", started, len(updated_elections))
+
+        started = recorder.start()
+        if processed_update_elections:
+            merged_overview = await overview_handler.retrieve_election_data()
+            await overview_handler.update_overview_data(merged_overview, processed_update_elections)
+        recorder.stop("overview", started, len(processed_update_elections))
+
+
+def summarise(timing, allocations):
+    report = {}
+    for stage in STAGES:
+        stats = timing.stages[stage]
+        total_s = sum(stats["ticks_ms"]) / 1000
+        report[stage] = {
+            "items": stats["items"],
+            "throughput_per_s": round(stats["items"] / total_s, 1) if total_s else None,
+            "total_ms": round(total_s * 1000, 3),
+            "p50_tick_ms": round(percentile(stats["ticks_ms"], 50), 3),
+            "p99_tick_ms": round(percentile(stats["ticks_ms"], 99), 3),
+            "max_tick_ms": round(max(stats["ticks_ms"], default=0), 3),
+            "peak_rss_kb": stats["peak_rss_kb"],
+        }
+        if allocations:
+            alloc = allocations.stages[stage]
+            report[stage]["alloc_bytes"] = alloc["alloc_bytes"]
+            report[stage]["alloc_peak_bytes"] = alloc["alloc_peak_bytes"]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--elections", type=int, default=6000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--final-ratio", type=float, default=0.5,
+                        help="share of votes on mature elections that are final votes")
+    parser.add_argument("--late-ratio", type=float, default=0.05,
+                        help="probability per rep and tick of voting on already confirmed elections")
+    parser.add_argument("--rebroadcast", type=int, default=2,
+                        help="maximum number of duplicate copies per vote")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--memcache", default=None,
+                        help="host:port of a local memcached, defaults to InMemoryCache")
+    parser.add_argument("--no-alloc", action="store_true",
+                        help="skip the tracemalloc pass")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    online_reps, quorum = load_fixture()
+    rpc_client.online_reps = online_reps
+    rpc_client.confirmation_quorum = quorum
+
+    storm = VoteStorm(online_reps, elections=args.elections, ticks=args.ticks,
+                      final_ratio=args.final_ratio, late_ratio=args.late_ratio,
+                      rebroadcast=args.rebroadcast, seed=args.seed)
+    ticks = storm.generate()
+
+    # Timings and allocations are measured in separate passes over the same
+    # traffic, tracemalloc would otherwise distort the latencies.
+    timing = StageRecorder()
+    asyncio.run(replay(ticks, args.memcache, timing))
+
+    allocations = None
+    if not args.no_alloc:
+        allocations = StageRecorder(trace_allocations=True)
+        tracemalloc.start()
+        asyncio.run(replay(ticks, args.memcache, allocations))
+        tracemalloc.stop()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "cache": "memcache" if args.memcache else "memory",
+            "elections": args.elections,
+            "ticks": args.ticks,
+            "messages": sum(len(messages) for messages in ticks),
+            "reps": len(online_reps),
+            "final_ratio": args.final_ratio,
+            "late_ratio": args.late_ratio,
+            "rebroadcast": args.rebroadcast,
+            "seed": args.seed,
+        },
+        "stages": summarise(timing, allocations),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
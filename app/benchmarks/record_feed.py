@@ -0,0 +1,40 @@
+"""
+Record the node websocket feed to a JSON lines file for offline analysis.
+
+    python -m benchmarks.record_feed --url ws://localhost:7078 --messages 100000 --output feed.jsonl
+"""
+import argparse
+import asyncio
+
+import orjson
+from nanows.api import NanoWebSocket
+
+
+async def record(url, messages, output):
+    nano_ws = NanoWebSocket(url=url)
+    await nano_ws.connect()
+    await nano_ws.subscribe_vote()
+    await nano_ws.subscribe_started_election()
+    await nano_ws.subscribe_confirmation(include_block=False)
+    await nano_ws.subscribe_stopped_election()
+
+    written = 0
+    with open(output, "wb") as f:
+        async for message in nano_ws.receive_messages():
+            f.write(orjson.dumps(message) + b"\n")
+            written += 1
+            if written >= messages:
+                break
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record the node websocket feed")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--output", default="feed.jsonl")
+    args = parser.parse_args(argv)
+    asyncio.run(record(args.url, args.messages, args.output))
+
+
+if __name__ == "__main__":
+    main()
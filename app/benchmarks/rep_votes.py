@@ -0,0 +1,75 @@
+"""
+Measure the per-representative recent votes index.
+
+Replays a synthetic vote storm through process_message with and without
+the index and reports the ingest cost it adds per vote. Then answers "the
+last 500 votes of the busiest rep" from the index and by scanning every
+election record's vote detail, which is what it took before:
+
+    python -m benchmarks.rep_votes --elections 2000 --ticks 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend.rep_votes import RepVoteIndex
+from backend.ws_processor import process_message
+from benchmarks.traffic import VoteStorm, load_fixture
+
+
+async def replay(ticks, rep_votes):
+    elections = {}
+    start = time.perf_counter()
+    for messages in ticks:
+        for message in messages:
+            await process_message(message, elections, rep_votes=rep_votes)
+    return elections, time.perf_counter() - start
+
+
+def scan(elections, account, limit):
+    votes = [(vote["time"], block_hash, vote["type"]) for block_hash, election in elections.items()
+             for vote in election["votes"]["detail"] if vote["account"] == account]
+    votes.sort(reverse=True)
+    return votes[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-representative recent votes index")
+    parser.add_argument("--elections", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--per-rep", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    online_reps, _ = load_fixture()
+    ticks = VoteStorm(online_reps, elections=args.elections, ticks=args.ticks, seed=args.seed).generate()
+    votes = sum(len(message["message"]["blocks"]) for messages in ticks for message in messages
+                if message["topic"] == "vote")
+
+    _, plain_seconds = asyncio.run(replay(ticks, None))
+    rep_votes = RepVoteIndex(per_rep=args.per_rep)
+    elections, indexed_seconds = asyncio.run(replay(ticks, rep_votes))
+
+    account = max(rep_votes.reps, key=lambda rep: rep_votes.reps[rep].next_seq)
+    start = time.perf_counter()
+    page = rep_votes.votes(account, args.limit)
+    index_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    scanned = scan(elections, account, args.limit)
+    scan_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        "votes": votes,
+        "reps": len(rep_votes.reps),
+        "elections": len(elections),
+        "ingest_ns_per_vote": round(plain_seconds / votes * 1e9),
+        "ingest_ns_per_vote_indexed": round(indexed_seconds / votes * 1e9),
+        "lookup": {"limit": args.limit, "returned": len(page["votes"]), "scanned": len(scanned),
+                   "index_ms": round(index_ms, 3), "scan_ms": round(scan_ms, 3)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
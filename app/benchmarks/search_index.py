@@ -0,0 +1,85 @@
+"""
+Measure the search index at millions of elections.
+
+Inserts `--elections` random block hashes one by one like the aggregation
+does (with `--accounts` block accounts and `--max-elections` as the
+bound, evicting the oldest past it), then times hash prefix lookups of
+several lengths and account lookups, and reports insert cost, the slowest
+insert and the memory the index took:
+
+    python -m benchmarks.search_index --elections 2000000
+"""
+import argparse
+import gc
+import json
+import random
+import resource
+import time
+
+from backend.search import SearchIndex
+from benchmarks.pipeline import percentile
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def time_lookups(search, queries, limit):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query, limit)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return {"p50_us": round(percentile(timings, 50), 1), "p99_us": round(percentile(timings, 99), 1),
+            "max_us": round(max(timings), 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the election search index")
+    parser.add_argument("--elections", type=int, default=2000000)
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--max-elections", type=int, default=0,
+                        help="index bound, smaller than --elections to include evictions")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    accounts = ["nano_1" + "".join(rng.choice("13456789abcdefghijkmnopqrstuwxyz") for _ in range(59))
+                for _ in range(args.accounts)]
+    hashes = ["%064X" % rng.getrandbits(256) for _ in range(args.elections)]
+    gc.collect()
+
+    index = SearchIndex(max_elections=args.max_elections or args.elections, max_accounts=args.accounts)
+    rss_before = rss_mb()
+    slowest = 0.0
+    # Collector pauses show up on whatever allocates at the time, keep them out of the slowest insert
+    gc.disable()
+    start = time.perf_counter()
+    for number, block_hash in enumerate(hashes):
+        insert_start = time.perf_counter()
+        index.add_elections({block_hash: {"block_account": accounts[number % len(accounts)]}})
+        slowest = max(slowest, time.perf_counter() - insert_start)
+    insert_seconds = time.perf_counter() - start
+    gc.enable()
+    rss_after = rss_mb()
+
+    results = {}
+    for length in (4, 8, 16, 64):
+        queries = [rng.choice(hashes)[:length] for _ in range(args.lookups)]
+        results[f"hash_prefix_{length}"] = time_lookups(index.search, queries, args.limit)
+    results["account"] = time_lookups(index.search, [rng.choice(accounts) for _ in range(args.lookups)], args.limit)
+
+    print(json.dumps({
+        "elections": len(index.hashes),
+        "accounts": len(index.accounts),
+        "insert_us_avg": round(insert_seconds / args.elections * 1e6, 2),
+        "slowest_insert_ms": round(slowest * 1000, 2),
+        "index_rss_mb": round(rss_after - rss_before),
+        "lookups": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
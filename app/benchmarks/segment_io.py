@@ -0,0 +1,105 @@
+"""
+Compare the cache traffic of rewriting whole election records every tick
+with appending the tick's delta to segment logs.
+
+Replays a synthetic vote storm through process_message and merge_elections
+with both layouts and reports the bytes written and read, as they would be
+encoded for memcached. Run from the app directory:
+
+    python -m benchmarks.segment_io --elections 2000 --ticks 40
+"""
+import argparse
+import asyncio
+import json
+
+from backend.cache_service import FRAME_LENGTH, SEGMENT_COMPRESS_MIN_BYTES, InMemoryCache
+from backend.elections import ElectionHandler
+from backend.record_format import encode_record
+from backend.ws_processor import process_message
+from benchmarks.traffic import VoteStorm, load_fixture
+
+
+def encoded_size(value):
+    if isinstance(value, list):
+        return sum(FRAME_LENGTH.size + len(encode_record(item, SEGMENT_COMPRESS_MIN_BYTES)) for item in value)
+    return len(encode_record(value))
+
+
+class CountingCache(InMemoryCache):
+    """InMemoryCache that adds up the encoded size of everything written and read."""
+
+    def __init__(self):
+        super().__init__()
+        self.written = 0
+        self.read = 0
+
+    async def get_multi(self, keys):
+        values = await super().get_multi(keys)
+        self.read += sum(encoded_size(value) for value in values.values())
+        return values
+
+    async def gets_multi(self, keys):
+        values = await super().gets_multi(keys)
+        self.read += sum(encoded_size(value) for value, _ in values.values())
+        return values
+
+    async def add(self, key, value, expire=0):
+        self.written += encoded_size(value)
+        return await super().add(key, value, expire)
+
+    async def cas(self, key, value, token, expire=0):
+        self.written += encoded_size(value)
+        return await super().cas(key, value, token, expire)
+
+    async def append(self, key, items, expire=0):
+        self.written += encoded_size(items)
+        return await super().append(key, items, expire)
+
+
+async def replay(ticks, segments, compact_after):
+    cache = CountingCache()
+    handler = ElectionHandler(cache, segments=segments, compact_after=compact_after)
+    for messages in ticks:
+        elections_temp = {}
+        for message in messages:
+            await process_message(message, elections_temp)
+        await handler.merge_elections(elections_temp)
+    hashes = [key for key in cache.store if ":" not in key]
+    return cache, await handler.load(hashes)
+
+
+def votes_of(elections):
+    return {block_hash: (election["votes"]["normal"], election["votes"]["final"],
+                         sorted((vote["account"], vote["type"], vote["count"]) for vote in election["votes"]["detail"]))
+            for block_hash, election in elections.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cache traffic of election record layouts")
+    parser.add_argument("--elections", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=40)
+    parser.add_argument("--lifetime", type=int, default=20, help="ticks until an election confirms")
+    parser.add_argument("--compact-after", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    online_reps, _ = load_fixture()
+    ticks = VoteStorm(online_reps, elections=args.elections, ticks=args.ticks,
+                      lifetime=args.lifetime, seed=args.seed).generate()
+
+    records_cache, records = asyncio.run(replay(ticks, False, args.compact_after))
+    segments_cache, segments = asyncio.run(replay(ticks, True, args.compact_after))
+
+    print(json.dumps({
+        "elections": len(records),
+        "ticks": len(ticks),
+        "messages": sum(len(messages) for messages in ticks),
+        "records": {"written_bytes": records_cache.written, "read_bytes": records_cache.read},
+        "segments": {"written_bytes": segments_cache.written, "read_bytes": segments_cache.read},
+        "write_reduction": round(records_cache.written / max(segments_cache.written, 1), 1),
+        "identical": votes_of(records) == votes_of(segments),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
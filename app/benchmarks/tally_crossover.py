@@ -0,0 +1,83 @@
+"""
+Find the batch size where the vectorized weight tally beats the Python one.
+
+Builds election batches of growing size from a synthetic vote storm, times
+both tally engines on each and reports the smallest vote count at which the
+vectorized engine wins. Use the result for TALLY_VECTORIZED_MIN_VOTES.
+
+    python -m benchmarks.tally_crossover --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend import tally
+from backend.elections import ElectionHandler
+from backend.cache_service import InMemoryCache
+from backend.tally import count_votes, tally_weights_python, tally_weights_vectorized
+from backend.ws_processor import process_message
+from benchmarks.traffic import VoteStorm, load_fixture
+
+BATCH_SIZES = (10, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+async def build_elections(online_reps, elections, ticks):
+    handler = ElectionHandler(InMemoryCache())
+    for messages in VoteStorm(online_reps, elections=elections, ticks=ticks).generate():
+        elections_temp = {}
+        for message in messages:
+            await process_message(message, elections_temp)
+        await handler.merge_elections(elections_temp)
+    return handler.cache.store
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the tally engine crossover batch size")
+    parser.add_argument("--ticks", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if tally.np is None:
+        raise SystemExit("numpy is not installed, only the Python tally is available")
+
+    online_reps, _ = load_fixture()
+    store = asyncio.run(build_elections(online_reps, max(BATCH_SIZES), args.ticks))
+    hashes = list(store)
+
+    results = []
+    crossover = None
+    for size in BATCH_SIZES:
+        batch = {block_hash: store[block_hash] for block_hash in hashes[:size]}
+        python_s = best_of(args.repeat, tally_weights_python, batch, online_reps)
+        vectorized_s = best_of(args.repeat, tally_weights_vectorized, batch, online_reps)
+        votes = count_votes(batch)
+        if crossover is None and vectorized_s < python_s:
+            crossover = votes
+        results.append({
+            "elections": len(batch),
+            "votes": votes,
+            "python_ms": round(python_s * 1000, 3),
+            "vectorized_ms": round(vectorized_s * 1000, 3),
+            "speedup": round(python_s / vectorized_s, 2) if vectorized_s else None,
+        })
+
+    print(json.dumps({
+        "online_reps": len(online_reps),
+        "current_min_votes": tally.TALLY_VECTORIZED_MIN_VOTES,
+        "crossover_votes": crossover,
+        "batches": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import json
+import os
+import random
+
+FINAL_VOTE_TIMESTAMP = "18446744073709551615"
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "online_reps.json")
+
+
+def load_fixture(path=FIXTURE_PATH):
+    with open(path) as f:
+        fixture = json.load(f)
+    return fixture["online_reps"], fixture["quorum"]
+
+
+class VoteStorm:
+    """
+    Generates synthetic node websocket traffic shaped like a spam wave.
+
+    Representatives vote with a probability that grows with their weight, reps
+    rebroadcast their votes, elections move from normal to final votes and get
+    confirmed, and a share of votes arrives after the election was confirmed.
+    """
+
+    def __init__(self, online_reps,
+                 elections=5000,
+                 ticks=40,
+                 tick_ms=450,
+                 final_ratio=0.5,
+                 late_ratio=0.05,
+                 rebroadcast=2,
+                 hashes_per_vote=8,
+                 lifetime=3,
+                 seed=1):
+        self.rng = random.Random(seed)
+        self.reps = list(online_reps.keys())
+        total_weight = sum(rep["votingweight"] for rep in online_reps.values())
+        # The biggest reps (nearly) always vote, the long tail only sometimes.
+        self.vote_probability = {
+            account: min(1.0, 0.2 + 20 * rep["votingweight"] / total_weight)
+            for account, rep in online_reps.items()
+        }
+        self.elections = elections
+        self.ticks = ticks
+        self.tick_ms = tick_ms
+        self.final_ratio = final_ratio
+        self.late_ratio = late_ratio
+        self.rebroadcast = rebroadcast
+        self.hashes_per_vote = hashes_per_vote
+        # Ticks from an election's start to its confirmation
+        self.lifetime = lifetime
+        self.start_ms = 1_700_000_000_000
+
+    def _hash(self):
+        return "%064X" % self.rng.getrandbits(256)
+
+    def _vote(self, account, blocks, final, msg_time):
+        return {
+            "topic": "vote",
+            "time": str(msg_time),
+            "message": {
+                "account": account,
+                "timestamp": FINAL_VOTE_TIMESTAMP if final else str(msg_time),
+                "blocks": blocks,
+            },
+        }
+
+    def _event(self, topic, block_hash, msg_time):
+        message = {"hash": block_hash}
+        if topic == "confirmation":
+            message["amount"] = str(self.rng.getrandbits(100))
+        return {"topic": topic, "time": str(msg_time), "message": message}
+
+    def generate(self):
+        """Return a list of ticks, each tick being the list of messages that arrive within it."""
+        new_per_tick = max(1, self.elections // max(1, self.ticks // 2))
+        live = []  # [block_hash, age_in_ticks]
+        confirmed = []
+        created = 0
+        ticks = []
+
+        for tick in range(self.ticks):
+            tick_start = self.start_ms + tick * self.tick_ms
+            messages = []
+
+            while created < self.elections and len(live) < new_per_tick * 3 and created < (tick + 1) * new_per_tick:
+                block_hash = self._hash()
+                live.append([block_hash, 0])
+                messages.append(self._event("started_election", block_hash,
+                                            tick_start + self.rng.randrange(self.tick_ms)))
+                created += 1
+
+            for account in self.reps:
+                if self.rng.random() > self.vote_probability[account]:
+                    continue
+                candidates = [entry for entry in live if self.rng.random() < 0.5]
+                for offset in range(0, len(candidates), self.hashes_per_vote):
+                    batch = candidates[offset:offset + self.hashes_per_vote]
+                    final = self.rng.random() < self.final_ratio * min(1.0, batch[0][1] / 2)
+                    msg_time = tick_start + self.rng.randrange(self.tick_ms)
+                    blocks = [block_hash for block_hash, _ in batch]
+                    for copy in range(1 + self.rng.randrange(self.rebroadcast + 1)):
+                        messages.append(self._vote(account, blocks, final, msg_time + copy))
+
+                if confirmed and self.rng.random() < self.late_ratio:
+                    late = self.rng.sample(confirmed, min(len(confirmed), self.hashes_per_vote))
+                    messages.append(self._vote(account, late, True,
+                                               tick_start + self.rng.randrange(self.tick_ms)))
+
+            still_live = []
+            for entry in live:
+                entry[1] += 1
+                if entry[1] >= self.lifetime:
+                    messages.append(self._event("confirmation", entry[0],
+                                                tick_start + self.tick_ms - 1))
+                    confirmed.append(entry[0])
+                else:
+                    still_live.append(entry)
+            live = still_live
+
+            messages.sort(key=lambda m: int(m["time"]))
+            ticks.append(messages)
+
+        return ticks
@@ -0,0 +1,134 @@
+"""
+Compare the per-message cost of decoding node websocket frames.
+
+Serializes a synthetic vote storm the way the node writes it (votes with
+signature, sequence and duration, confirmations optionally with their
+block body, plus acks, telemetry and optionally new_unconfirmed_block
+frames we don't ingest) and times:
+
+    stdlib        json.loads of every text frame, what nanows' receive_messages does
+    orjson        orjson.loads of every text frame
+    frames        backend.ws_frames.decode_frame of text frames
+    frames_bytes  decode_frame of frames received as bytes (websockets >= 13)
+
+Run from the app directory:
+
+    python -m benchmarks.ws_decode --ticks 20 --include-block --unconfirmed-blocks
+"""
+import argparse
+import json
+import random
+import time
+
+import orjson
+
+from backend.ws_frames import decode_frame
+from benchmarks.traffic import VoteStorm, load_fixture
+
+
+def block_body(rng, message):
+    return {
+        "type": "state", "account": message["account"], "previous": "%064X" % rng.getrandbits(256),
+        "representative": message["account"], "balance": str(rng.getrandbits(100)),
+        "link": "%064X" % rng.getrandbits(256), "link_as_account": message["account"],
+        "signature": "%0128X" % rng.getrandbits(512), "work": "%016x" % rng.getrandbits(64),
+        "subtype": "send",
+    }
+
+
+def node_frame(rng, message, accounts, include_block):
+    msg = message["message"]
+    if message["topic"] == "vote":
+        msg = {"account": msg["account"], "signature": "%0128X" % rng.getrandbits(512),
+               "sequence": str(rng.getrandbits(32)), "timestamp": msg["timestamp"],
+               "duration": "16", "blocks": msg["blocks"], "type": "vote"}
+    elif message["topic"] == "confirmation":
+        msg = {"account": rng.choice(accounts), "amount": msg["amount"], "hash": msg["hash"],
+               "confirmation_type": "active_quorum"}
+        if include_block:
+            msg["block"] = block_body(rng, msg)
+            msg["election_info"] = {"duration": "412", "time": message["time"], "tally": "1", "final": "1",
+                                    "blocks": "1", "voters": "80", "request_count": "1"}
+    return json.dumps({"topic": message["topic"], "time": message["time"], "message": msg},
+                      separators=(",", ":"))
+
+
+def build_frames(ticks, online_reps, include_block, unconfirmed_blocks, seed):
+    rng = random.Random(seed)
+    accounts = list(online_reps)
+    frames = []
+    for messages in ticks:
+        for message in messages:
+            frames.append((message["topic"], node_frame(rng, message, accounts, include_block)))
+            if unconfirmed_blocks and message["topic"] == "started_election":
+                block = block_body(rng, {"account": rng.choice(accounts)})
+                frames.append(("new_unconfirmed_block", json.dumps(
+                    {"topic": "new_unconfirmed_block", "time": message["time"], "message": block},
+                    separators=(",", ":"))))
+        frames.append(("ack", '{"ack":"subscribe","time":"1700000000000"}'))
+        frames.append(("telemetry", json.dumps({"topic": "telemetry", "time": "1700000000000", "message": {
+            "block_count": "190000000", "peer_count": "200", "node_id": "node_" + "1" * 60}},
+            separators=(",", ":"))))
+    return frames
+
+
+def time_decoder(decode, frames, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, frame in frames:
+            decode(frame)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark websocket frame decoding")
+    parser.add_argument("--elections", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--include-block", action="store_true", help="confirmations carry their block body")
+    parser.add_argument("--unconfirmed-blocks", action="store_true",
+                        help="add a new_unconfirmed_block frame per election, which isn't ingested")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    online_reps, _ = load_fixture()
+    ticks = VoteStorm(online_reps, elections=args.elections, ticks=args.ticks, seed=args.seed).generate()
+    frames = build_frames(ticks, online_reps, args.include_block, args.unconfirmed_blocks, args.seed)
+
+    raw_frames = [(topic, frame.encode()) for topic, frame in frames]
+    decoders = {
+        "stdlib": (json.loads, frames),
+        "orjson": (orjson.loads, frames),
+        "frames": (decode_frame, frames),
+        "frames_bytes": (decode_frame, raw_frames),
+    }
+    results = {}
+    for name, (decode, inputs) in decoders.items():
+        seconds = time_decoder(decode, inputs, args.repeat)
+        results[name] = {"ns_per_frame": round(seconds / len(frames) * 1e9),
+                         "frames_per_s": round(len(frames) / seconds)}
+        per_topic = {}
+        for topic in ("vote", "confirmation", "telemetry", "new_unconfirmed_block"):
+            subset = [entry for entry in inputs if entry[0] == topic]
+            if subset:
+                per_topic[topic] = round(time_decoder(decode, subset, args.repeat) / len(subset) * 1e9)
+        results[name]["ns_per_topic"] = per_topic
+
+    counts = {}
+    for topic, _ in frames:
+        counts[topic] = counts.get(topic, 0) + 1
+    print(json.dumps({
+        "frames": len(frames),
+        "by_topic": counts,
+        "bytes_per_frame": round(sum(len(frame) for _, frame in frames) / len(frames)),
+        "include_block": args.include_block,
+        "results": results,
+        "speedup_vs_stdlib": round(results["stdlib"]["ns_per_frame"] / results["frames_bytes"]["ns_per_frame"], 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
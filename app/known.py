@@ -56,7 +56,7 @@ known = {
     "nano_16dfypzq1715b1k5pgwu33aookam63htrmc3cqo9is34mobxe8qsofyb55tb": "PrometheusNode",
     "nano_16k5pimotz9zehjk795wa4qcx54mtusk8hc5mdsjgy57gnhbj3hj6zaib4ic": "NanoWallet Bot",
     "nano_18bpu81x4oyqsjjsyaeb7ek4rag1bw8gerhaiumookzc4t5prrm4d7zg56ww": "Nano Node London",
-    "nano_18shbirtzhmkf7166h39nowj9c9zrpufeg75bkbyoobqwf1iu3srfm9eo3pz": "1. High Performance Server \ud83d\ude80 - DE",
+    "nano_18shbirtzhmkf7166h39nowj9c9zrpufeg75bkbyoobqwf1iu3srfm9eo3pz": "1. High Performance Server \U0001f680 - DE",
     "nano_1a7sn7t8tiifhn6iquejmgtr3jjkyzmxrgxgwqjj73tgfpns8eq6ji7ixnpo": "earth",
     "nano_1akg48n55nk59m6fnjywoxzih5nx7eujfa7ffy4ykas5haeuhf6xmk5un13a": "Mike's Rep",
     "nano_1anrzcuwe64rwxzcco8dkhpyxpi8kd7zsjc1oeimpc3ppca4mrjtwnqposrs": "Nano Foundation #7",
@@ -156,7 +156,7 @@ known = {
     "nano_1qgfm1zr84r4d18am1z51xno3tkmxohsnfhzicznedxad9o4aymq1h8izqtq": "node1.nano-node.space",
     "nano_1ywcdyz7djjdaqbextj4wh1db3wykze5ueh9wnmbgrcykg3t5k1se7zyjf95": "Nanollet",
     "nano_3qbfwb33bepckmarrxmujsqu6q9ddimyxxbq3hjfabn711gnue5kmixktaox": "kdcrypto",
-    "nano_3u7d5iohy14swyhxhgfm9iq4xa9yibhcgnyj697uwhicp14dhx4woik5e9ek": "NANO Skynode \ud83c\udfd4\ufe0f",
+    "nano_3u7d5iohy14swyhxhgfm9iq4xa9yibhcgnyj697uwhicp14dhx4woik5e9ek": "NANO Skynode \U0001f3d4\ufe0f",
     "nano_1aqkrayihxzdahoxpjrg8o6mxgxfzq46hhcdm1u48w3qexsakx7pzzhjn3fc": "DERP",
     "nano_3o7uzba8b9e1wqu5ziwpruteyrs3scyqr761x7ke6w1xctohxfh5du75qgaj": "NANO TipBot",
     "nano_3ncnueds3ghkjco43d89636ep39ysz6eik4arujf55gu39i7g184t9yq6obd": "NanoPea",
@@ -170,13 +170,13 @@ known = {
     "nano_1mateo6t67q96ou911cbagcmrbx43ouxenc6873why7z8i1ys89r3xhtphyk": "BrainBlocks",
     "nano_1jnatu97dka1h49zudxtpxxrho3j591jwu5bzsn7h1kzn3gwit4kejak756y": "Ty",
     "nano_3zk8p6cs13cpeokxo8zeanf55oow6idq3j4we5xnw96j6o8bk9htaqwjb8me": "NanoThings",
-    "nano_3akecx3appfbtf6xrzb3qu9c1himzze46uajft1k5x3gkr9iu3mw95noss6i": "\ud83c\udf31 Deutscher Nano Knoten",
+    "nano_3akecx3appfbtf6xrzb3qu9c1himzze46uajft1k5x3gkr9iu3mw95noss6i": "\U0001f331 Deutscher Nano Knoten",
     "nano_3deiw6qqeexmumxhzh4ufp88uyqrid8iftu4iyw9r96pakk8g4desthmw1h4": "VanNano Node",
     "nano_16d3mdshcfqayyx8rd9ioimjiicrma743qpd86ohfs9kdzgejmnba1zifo8m": "UAI Node",
     "nano_1gsrmu4qc7cfbhun3ds113nn1eajwwzjj8qjzaeh39p4kwxpk1xw76h1d3yz": "Nano Nouts Node",
     "nano_15apzscarrjcizgze4c4w8hc7mgb84i43odwrf16cgrwia3pud9j3pibp89q": "WIMPZ",
     "nano_3ctr5b19pmzewbzp5bm3b7jdkno9zzs8yfn3zpt75uhyrcraigg4mt6ur341": "UK Nano Node",
-    "nano_1hzoje373eapce4ses7xsx539suww5555hi9q8i8j7hpbayzxq4c4nn91hr8": "Please change rep - Norway Node \ud83c\uddf3\ud83c\uddf4 will go offline!",
+    "nano_1hzoje373eapce4ses7xsx539suww5555hi9q8i8j7hpbayzxq4c4nn91hr8": "Please change rep - Norway Node \U0001f1f3\U0001f1f4 will go offline!",
     "nano_14h5oqrex1mftuogqskm4fyiu3hkkufdmdd5gejcfhc1na5mmhfcx4grdezb": "Nonna [old]",
     "nano_3kqdiqmqiojr1aqqj51aq8bzz5jtwnkmhb38qwf3ppngo8uhhzkdkn7up7rp": "ARaiNode",
     "nano_3nnogsx1u7ye6snntq9fi1aakb489dsk94zyex8fdd5ioubmhep3o9sr7zsk": "CHANGE YOUR REP - Libertarian Node",
@@ -197,7 +197,7 @@ known = {
     "nano_1p8f4yknaebnu8obu75xnip6e3frkma1f6biimmmpo79cknq55emckkxir1a": "",
     "nano_3nbx9jeskdqqrzw7jxueu1s9s5jpprmdkitm9gipbjnjqi1e5eheuz3ia1o9": "node.tuitio.eu",
     "nano_14zi3mgrhw79rhhmqij3cfeofoup9it61jnbmw4ky48m5tsxwsnwgo4i5umi": "Lostchimp's Nano Node - Eastern Canada 24/7",
-    "nano_1oenixj4qtpfcembga9kqwggkb87wooicfy5df8nhdywrjrrqxk7or4gz15b": "Redeemfor.me \ud83d\udecd\ufe0f\ud83d\uded2 \u2014  Luckynano.com \ud83c\udfb0\ud83d\udcb0",
+    "nano_1oenixj4qtpfcembga9kqwggkb87wooicfy5df8nhdywrjrrqxk7or4gz15b": "Redeemfor.me \U0001f6cd\ufe0f\U0001f6d2 \u2014  Luckynano.com \U0001f3b0\U0001f4b0",
     "nano_3uip1jmeo4irjuua9xiyosq6fkgogwd6bf5uqopb1m6mfq6g3n8cna6h3tuk": "BitGrail Trustee",
     "nano_17azjiiq1h4wzrgt843ftziugrp4zi59o8yfu4513b46brmw7izqqawtxfk7": "Nodes Only!",
     "nano_3yo7a3b7zgxr3ynm98a5jtnxr61tap5c9ea4xooszngicaukzh5xtrfjhns3": "Nanite Node",
@@ -211,11 +211,11 @@ known = {
     "nano_3rht6xfrrk54b78ero7334rr3srpqrj6asq4qudmzhk5ahthaw5osgjipwk1": "",
     "nano_1nx8kh7ajp4ydxiye6bgfmyop37pdh7k54z5g3ajm7kooqhqsaszu9qb6mdh": "<0174 nano node",
     "nano_3afmp9hx6pp6fdcjq96f9qnoeh1kiqpqyzp7c18byaipf48t3cpzmfnhc1b7": "Node will shut down January 2025",
-    "nano_3tta9pdxr4djdcm6r3c7969syoirj3dunrtynmmi8n1qtxzk9iksoz1gxdrh": "humblenano.africa \ud83c\uddff\ud83c\udde6",
+    "nano_3tta9pdxr4djdcm6r3c7969syoirj3dunrtynmmi8n1qtxzk9iksoz1gxdrh": "humblenano.africa \U0001f1ff\U0001f1e6",
     "nano_169mbaurcje5huiqk8x6tzuz3ae7m1bbp73ydr5ugeo43iknt5fqzoo545wb": "",
     "nano_3hzacq8o4m7mo67hrakftsyqkgietrqoftczdq17qwf5wbck7r44rmbimbas": "",
     "nano_3cabinnshnxnhdsabnk1ntfzjut948iys61wf4duxphbrm6mzwaauyebtu1y": "Binary Cabin",
-    "nano_3uaydiszyup5zwdt93dahp7mri1cwa5ncg9t4657yyn3o4i1pe8sfjbimbas": "NANO Voting \ud83c\udf0d [2018-2023]",
+    "nano_3uaydiszyup5zwdt93dahp7mri1cwa5ncg9t4657yyn3o4i1pe8sfjbimbas": "NANO Voting \U0001f30d [2018-2023]",
     "nano_1rbe96g1t3aj4shgcekpw1fqcmrufcjbbydd3tawi4rztmgehmk6ddqxfbpn": "rdestenay's node",
     "nano_1ana4iizmxbcok13dcf6dujmw46kznjonx1i5to85azie7aqss9qwt3q78w4": "ThrowAwayLouisa",
     "nano_3xhpjaartrxkemqdn3jyxxcyef3jb69w993qpa15w9pbkrdi9jnaejxpd76y": "",
@@ -225,18 +225,18 @@ known = {
     "nano_34g61tkogh89nd6nfd7ueogq6ksczqb9h9wpctsaejhef5cq65m9jjwzwsdj": "NANODEMO",
     "nano_3ugf6qizc5ifacbt7po8nsgp378uas3yfgf4kh6oifipgz96pwibh3penk8e": "NANODEMO",
     "nano_1natrium1o3z5519ifou7xii8crpxpk8y65qmkih8e8bpsjri651oza8imdd": "Natrium",
-    "nano_36y9jqqw7jwt4igaef9g8oge3gxa4t7miufz5iaefxy11rd7y3wiz5xfwxnz": "Nanode Brasil \ud83c\udde7\ud83c\uddf7 - Node em processo de desligamento!",
+    "nano_36y9jqqw7jwt4igaef9g8oge3gxa4t7miufz5iaefxy11rd7y3wiz5xfwxnz": "Nanode Brasil \U0001f1e7\U0001f1f7 - Node em processo de desligamento!",
     "nano_1bxqm6nsm55s64rgf8f5k9m795hda535to6y15ik496goatakpupjfqzokfc": "hotio",
     "nano_1e6e41up4x5e4jke6wy4k6nnuagagspfx4tjafghub6cw46ueimqt657nx4a": "NANOODLE - Please switch to a different rep - NanoQuake is suggested",
     "nano_1bj5cf9hkgkcspmn15day8cyn3hyaciufbba4rqmbnkmbdpjdmo9pwyatjoi": "Huobi Representative",
-    "nano_3chartsi6ja8ay1qq9xg3xegqnbg1qx76nouw6jedyb8wx3r4wu94rxap7hg": "Nano Charts \ud83d\udcca",
+    "nano_3chartsi6ja8ay1qq9xg3xegqnbg1qx76nouw6jedyb8wx3r4wu94rxap7hg": "Nano Charts \U0001f4ca",
     "nano_1rqqh1m14ip1mhadxwxx7bfh33q9u8mmq68eeg9cr1ku7ffdtp7kx479gdt6": "Matto_Nano",
     "nano_377jmnwfo6ma4h96ohwb85kurupjw4scy3h63z5p8jfiyqwmarqopp4hoekj": "Binance Cold Wallet (inactive)",
     "nano_3decyj8e1kpzrthikh79x6dwhn8ei81grennibmt43mcm9o8fgxqd8t46whj": "Mercatox",
     "nano_1h31pb3b4puzuy9ijc4yucce73gewd3bm3zpugiq46sbwsnzw8cge6hxnfzb": "Mercatox Cold Wallet",
     "nano_3ry9c4zysjrt6oa7b757ftt9dgzw48nfizymzi89fcoe1i6mjtqmi5554mij": "Mercatox Hot Wallet",
     "nano_1y4eqxgmxktjdar5jeyd81sjhgctaepcjdq1x8xsex7n8ftwkff3h83qwphe": "nano_1y4eqxgmxktjdar5jeyd81sjhgctaepcjdq1x8xsex7n8ftwkff3h83qwphe",
-    "nano_3hjo1cehsxrssawmpew98u4ug8bxy4ppht5ch647zpuscdgedfy1xh4yga7z": "Finland Green \ud83d\udc9a (Offline - Switch Rep)",
+    "nano_3hjo1cehsxrssawmpew98u4ug8bxy4ppht5ch647zpuscdgedfy1xh4yga7z": "Finland Green \U0001f49a (Offline - Switch Rep)",
     "nano_3moomoo77b45d1jug8szecomeqnmwgjbue1xaxz95s5338jsp77eho166jd1": "MooMoo Node",
     "nano_3srg9c9g48dxa4dqahsoqhpc7ek1phqyzy5oprtycbt76p4tcb5tzdbu6qdx": "Odroid Master",
     "nano_1nrh1gifirxb6xgu19jqrw93rcaddd6jxutzho613tmu4danhjba7wayadsa": "Organon",
@@ -269,7 +269,7 @@ known = {
     "nano_374qyw8xwyie1hhws4cfo1fbrkis44dd6aputrujmrteeexcyag4ej84kkni": "Nano Tipper Z",
     "nano_3fag65tdi77u3rwnwmamqcj1siibrzeff9r9jeggqfr8rrqricjaeyen7zdg": "Wirex",
     "nano_3zm73whyh8dh867r6ex6i836zih9z7mxmpjpe1hduzdg4aeo6p9zinofnzig": "",
-    "nano_3strnmn7h9b7oghxa6h9ckrpf5r454fsobpicixps6xwiwc5q4hat7wjbpqz": "nano.strnmn.me \ud83c\udf3f",
+    "nano_3strnmn7h9b7oghxa6h9ckrpf5r454fsobpicixps6xwiwc5q4hat7wjbpqz": "nano.strnmn.me \U0001f33f",
     "nano_1jo3i37tc9nwhttm9xkuc4mqerppn6m76654yjm76am3c1xg64kxtzatm4wm": "Cabbit Node",
     "nano_3ngt59dc7hbsjd1dum1bw9wbb87mbtuj4qkwcruididsb5rhgdt9zb4w7kb9": "Wirex",
     "nano_3etu5saj6smqu9cjnre7ibwkj1969641qbdbcokqhgrtorgp13bnkkycy4ck": "The Tiny Terrible Box",
@@ -277,12 +277,12 @@ known = {
     "nano_14j9mn5sfh1mnuxsis1rkordnjtgjgcwzzja8q593w7rb7kjispbepyrx398": "/biz/ Node",
     "nano_1tpqncif5ep6txhowgyhyemza3sbwm5r5rcq7dtetxey1aucbiy4bhhwbeud": "antennano",
     "nano_3e5g57yf7esaum7xogein4mbjhpxhby5513odxynqzc3c6kgsmhks6ituhe7": "NanoQuake Brazil",
-    "nano_37ortkby6k68z8tkk8g63ndbp8wjbmofhn56oyxb4rm6s3x51pkpiwcnpgmq": "\u04fe Makonode \ud83e\udd88",
+    "nano_37ortkby6k68z8tkk8g63ndbp8wjbmofhn56oyxb4rm6s3x51pkpiwcnpgmq": "\u04fe Makonode \U0001f988",
     "nano_1nanoftwk6741wmdznzangwm8prq95spu3zntb5gwpjdk8qd3p8eu5bxoehc": "nanohodlr",
     "nano_1eeiwmnsq6fdhy1m35og1dzt7kdnci8wny3kn771638dfrrgg49so7k1mg7i": "Nanocean",
     "nano_1fto538ugwfuydonky5zo8xjju9myzctcwnmuzcegcc8ch1pob7jf8yqws78": "RIP",
     "nano_34jodkgq6dko31s4hj7a18kf6ax8ax8n6c98eb5jqq56s9kt7bi9g4fidwbx": "NanoQuake South America",
-    "nano_1j78msn5omp8jrjge8txwxm4x3smusa1cojg7nuk8fdzoux41fqeeogg5aa1": "NanoBrasil \ud83c\udde7\ud83c\uddf7",
+    "nano_1j78msn5omp8jrjge8txwxm4x3smusa1cojg7nuk8fdzoux41fqeeogg5aa1": "NanoBrasil \U0001f1e7\U0001f1f7",
     "nano_1d43z1tja4jr5wss6mzoqk36rwc1fos8jcfy5zxefdpifogq65br1pjzfn74": "NodeGasm",
     "nano_1brgmbzx8a5xw3dkkheoz6ia6q6kgjudayy3ydfmngmpa3iq5hfbx989y6kb": "lmt",
     "nano_11fcfe11a6asgtkpxgetssahioq6qrycznkwgzxe1t6mukyiednyh396fapr": "fcfe",
@@ -295,7 +295,7 @@ known = {
     "nano_1bananobjcrqugm87e8p3kxkhy7d1bzkty53n889iyunm83cp14rb9fin78p": "Banano Airdrop",
     "nano_3ing74j39b544e9w4yrur9fzuwges71ddo83ahgskzhzaa3ytzr7ra3jfsgi": "Huobi",
     "nano_1wprcq13ubo7quxcj555qu5kmtsueo4u4ohp6qn4fqb43pycb3m7ddee9z3s": "zoronga",
-    "nano_3sendnudez9x8zkaid5k17g474f9dc4fuopggzojwop9sbc5isgwah5gbx9n": "SendNudes \ud83d\udc40",
+    "nano_3sendnudez9x8zkaid5k17g474f9dc4fuopggzojwop9sbc5isgwah5gbx9n": "SendNudes \U0001f440",
     "nano_154x3tic7k35d47te4qt58x9938ynj5yrpx4u78k57kwmxtam9gd5yj6epmh": "FreeNanoFaucet.com (Old Address)",
     "nano_1e6ti3ar4qhxsqeswembd9dnehw4xo9egpatp6uj64c4m9bybey5jkazs4o9": "/r/MillionaireMakers",
     "nano_1zqyo39yn6j67duwoopg3wpiihpmq87i5dfewrqejjf8nuats5op3nwyku7s": "Vitor Nano Wallet",
@@ -308,8 +308,8 @@ known = {
     "nano_3kwppxjcggzs65fjh771ch6dbuic3xthsn5wsg6i5537jacw7m493ra8574x": "FreeNanoFaucet.com",
     "nano_1pnisy4cuunkg7xhzopeb8z4pxjhrk6paiq35mebo6kmz5phfmak8j6m5ss6": "Russian Node",
     "nano_1196e7yi1ewazrtjazquherxxt65hyata3erkx7d5w14z7xaw3dca4u8zssp": "nano.wang",
-    "nano_3zapp5z141qpjipsb1jnjdmk49jwqy58i6u6wnyrh6x7woajeyme85shxewt": "Nalli | [Fast \ud83d\udca8 - Dedicated \ud83d\udcbb - Green \ud83c\udf40]",
-    "nano_1jtx5p8141zjtukz4msp1x93st7nh475f74odj8673qqm96xczmtcnanos1o": "NanOslo \ud83d\udc2f",
+    "nano_3zapp5z141qpjipsb1jnjdmk49jwqy58i6u6wnyrh6x7woajeyme85shxewt": "Nalli | [Fast \U0001f4a8 - Dedicated \U0001f4bb - Green \U0001f340]",
+    "nano_1jtx5p8141zjtukz4msp1x93st7nh475f74odj8673qqm96xczmtcnanos1o": "NanOslo \U0001f42f",
     "nano_3ktybzzy14zxgb6osbhcc155pwk7osbmf5gbh5fo73bsfu9wuiz54t1uozi1": "Kappture",
     "nano_3gpu18tjh8ky4jrjkruszz9ta8m34bqh3yoz41nrhnkxues3hpt4c56zfdmf": "06 - Nvidia Quadro P400 GPU Test",
     "nano_3power3gwb43rs7u9ky3rsjp6fojftejceexfkf845sfczyue4q3r1hfpr3o": "NF - The architect of Nano's ruin.  // nanotps.com",
@@ -335,7 +335,7 @@ known = {
     "nano_3x4ui45q1cw8hydmfdn4ec5ijsdqi4ryp14g4ayh71jcdkwmddrq7ca9xzn9": "Binance Cold Wallet",
     "nano_3f6jh49tfzumu5iuc8xbw53hrfoq1wjb5bxxr5ds85ja1wfmoja1j5qp3pez": "My Nano Ninja Donations",
     "nano_37imps4zk1dfahkqweqa91xpysacb7scqxf3jqhktepeofcxqnpx531b3mnt": "Kraken",
-    "nano_1xckpezrhg56nuokqh6t1stjca67h37jmrp9qnejjkfgimx1msm9ehuaieuq": "Flying Amigos \ud83c\uddee\ud83c\uddf3",
+    "nano_1xckpezrhg56nuokqh6t1stjca67h37jmrp9qnejjkfgimx1msm9ehuaieuq": "Flying Amigos \U0001f1ee\U0001f1f3",
     "nano_1u4hkewun9kkqg7k776x851d1eridbqozi64hahy8x37zbbmow3nhg9dcrzs": "Blank",
     "nano_1chngrepnja6patkegbrqjitjtg5h7tyeri5ea1g6f7rzoiees5pu8y6z9ya": "RepAlert: Please change your representative",
     "nano_1magnumr5yu6j7btpa4hwzg15n9dfxrernca7cmacj86agfkn1hx4933cpo1": "Magnum Wallet",
@@ -355,14 +355,14 @@ known = {
     "nano_1mikerow9bqzyqo4ejra6ugr1srerq1egwmacerquch3dz1wry7mkrz4768m": "mikerow",
     "nano_1mgoedmx8xaucrfgoc5ae5wac1jue4dtb8u5t6mme9qazhtqijn1q8y74dt8": "PagCripto.com.br Hot Wallet",
     "nano_3ewhro1uzpbgjztkc5t3yawcqw7mz4acp519m4b7qw14t58t67gndaxswxad": "PagCripto.com.br Representative",
-    "nano_3n7ky76t4g57o9skjawm8pprooz1bminkbeegsyt694xn6d31c6s744fjzzz": "humblenano.io \ud83d\udd25",
-    "nano_318uu1tsbios3kp4dts5b6zy1y49uyb88jajfjyxwmozht8unaxeb43keork": "ScandiNode \ud83c\udf10 Green, fast & capable! ",
+    "nano_3n7ky76t4g57o9skjawm8pprooz1bminkbeegsyt694xn6d31c6s744fjzzz": "humblenano.io \U0001f525",
+    "nano_318uu1tsbios3kp4dts5b6zy1y49uyb88jajfjyxwmozht8unaxeb43keork": "ScandiNode \U0001f310 Green, fast & capable! ",
     "nano_1ggr15hft4t1shtud5uzhwnka6unj3cwguifnr38mz8x6juujxksqea1y7qf": "TetraLoom.com",
     "nano_1stxiuoja9jjxztxbr1dbd4g5ycowe9xtewzu7exykq9nnufck9u9himzz4u": "NANOCE.NET LOL#2",
     "nano_11ij7xby45sps4ubxacdrzikyzik8bjjocur8wjhur6g81zg7ddbayk1yqcf": "NANOCE.NET OFFICIAL",
     "nano_3iqegcnu1fwcd77ya7dx68hqsec8xe3t94ek84d3r78qp6qi1rbucrdyh6to": "ICO-BIT",
-    "nano_1bko7zpcow7w6e11az8tnxdnyszgkt61miwuo9i9pom3czdzxqknpiuc7tdb": "jserv \ud83c\uddf9\ud83c\uddfc\ud83d\udc27",
-    "nano_3rrk1gj39tfda4i5193o4txtxczbru4yhe7hbr771wwiqskhitguxi9m4kzn": "BiiLabs.io \ud83c\uddf9\ud83c\uddfc",
+    "nano_1bko7zpcow7w6e11az8tnxdnyszgkt61miwuo9i9pom3czdzxqknpiuc7tdb": "jserv \U0001f1f9\U0001f1fc\U0001f427",
+    "nano_3rrk1gj39tfda4i5193o4txtxczbru4yhe7hbr771wwiqskhitguxi9m4kzn": "BiiLabs.io \U0001f1f9\U0001f1fc",
     "nano_3j3dtp68ubnibm78un7ge7jqn9hr9a8g4xf94tg1nosn9818pw44cee7noku": "NanoPaint",
     "nano_34pgx911dk5e164ny6mgt4cuiw9cpcjqcshqh9y99nrnbjdmw91snsoxb4z1": "nanomanjaro",
     "nano_38ke8rkfpfne8simc1tw5on8oynnd56dbirs7ksk5dbzk36zizic1uf7ubha": "nano-italiano",
@@ -389,7 +389,7 @@ known = {
     "nano_135a4boekhir8btsobsarjd6qoo4tq5p88jqoqeehcsnix1ug9fzpcfjgnkc": "Onion Faucet",
     "nano_11xde6z6xprnzbzzrdwa6wkup3oud465h83anjcw9q8x3ac65yohzcw76sjo": "MRJUNE Official",
     "nano_1p1joy8di75yyokr4ye8itxmo7ukpjj9thp7fmo5kxx7fou5ot6ybnbwb9wo": "Bitfortip | Tip NANO as an incentive | Earn NANO for being helpful",
-    "nano_3z1z144ggdujyypjmrm9dn37a5jimur6g5poshxzz5ryr6jjf8hufjgq16yr": "\ud83d\udcb0nano.bet\ud83d\udcb0",
+    "nano_3z1z144ggdujyypjmrm9dn37a5jimur6g5poshxzz5ryr6jjf8hufjgq16yr": "\U0001f4b0nano.bet\U0001f4b0",
     "nano_38kzmypcpdseukxpdzxzfha18dduit9g5je6rh14u4g1jfkb4bokn33pw7a9": "Inactive",
     "nano_13papktzyxpymju49xr6zcdmu99yrfzm1fxar766goahpmwtztnm91bcp7zb": "Inactive2",
     "nano_3qhrboqjgi9wk7x37y3kdaywagkn9g5wp6ggfzab4hxdp6bhnbz3o9e4dgsh": "Nendly.com Faucet",
@@ -400,11 +400,11 @@ known = {
     "nano_1n747n7fgebsk93khx6fkrj9wmjkgho6zsmb1m7men39uz4pafmmimhob7y7": "Hostpath",
     "nano_1oc8ericjtoro9jkyz3x76hnpe65hgri79wm4jxjh43o18ihnhbwdh6pswmg": "rhinobob node <3 SETTING UP ANOTHER NODE SOON!",
     "nano_3wpxyzqb9dfz5sp7ycx1k7qotpfuyqmnge3urmf3mdae1q3gebfwkub9yrku": "NANOstradamus",
-    "nano_1exffxawj4c6sn1qacbt1y1unpnfi55sppa56wjaecy955kmifyg9z1waqpk": "Ltr \ud83c\udde8\ud83c\uddf1",
+    "nano_1exffxawj4c6sn1qacbt1y1unpnfi55sppa56wjaecy955kmifyg9z1waqpk": "Ltr \U0001f1e8\U0001f1f1",
     "nano_1kaiak5dbaaqpenb7nshqgq9tehgb5wy9y9ju9ehunexzmkzmzphk8yw8r7u": "Kaiak",
     "nano_1cn5txk67c4j9dojaw5tswruwg8yre5kqqzthah6wmycw53oya4b8xmmzei1": "StarD",
     "nano_3g6ue89jij6bxaz3hodne1c7gzgw77xawpdz4p38siu145u3u17c46or4jeu": "Madora",
-    "nano_1fe17w13stn8rqos3nxmupoez9sne4pc4njmr1fbz9nci6obnng6jatton5q": "nano-no.de \ud83c\udf0d\ud83d\ude80\ud83c\udf11",
+    "nano_1fe17w13stn8rqos3nxmupoez9sne4pc4njmr1fbz9nci6obnng6jatton5q": "nano-no.de \U0001f30d\U0001f680\U0001f311",
     "nano_1tyd79peyzk4bs5ok1enb633dqsrxou91k7y4zzo1oegw4s75bokmj1pey4s": "Apollo Faucet",
     "nano_1my1snode8rwccjxkckjirj65zdxo6g5nhh16fh6sn7hwewxooyyesdsmii3": "My1s Nano Node",
     "nano_1oo6are9fetyyp61h139rfhmj8fk9t16y7xqg1bndrgaex8xjmprfd8su4ep": "465 Digital Investments - Node 2",
@@ -457,9 +457,9 @@ known = {
     "nano_17oc98sqccfqqfah8jggkziu8i6ar8biq7syxqcd6e1sagje11gts88gfj95": "Binance US Hot Wallet",
     "nano_3jyt9ye4yerydg91twwgxo7edke84a7cbjtomq4bg7uh5anqwiture4h1saa": "Huobi Hot Wallet #2",
     "nano_19qo4gtzpoyqf6zzezbcuazcsxtqtdin5qbtk8jkoz4fdmq4ssagn3u1odhz": "TRUSTABLE - NN2",
-    "nano_1aoxwfsmu6wazes9jq4xu695jx5txa3qrrfsrg4w4uk35bhmxkn378fwebng": "1.NANONODE.FR \ud83c\uddeb\ud83c\uddf7",
-    "nano_1ota8bpwwawmc8ksdz4ezzrb3afbdeipk1n7rbeguhm4muy1r649uzw5moon": "Moonstruck.dev \ud83c\udf19",
-    "nano_34zuxqdsucurhjrmpc4aixzbgaa4wjzz6bn5ryn56emc9tmd3pnxjoxfzyb6": "Nano Germany \ud83c\udde9\ud83c\uddea",
+    "nano_1aoxwfsmu6wazes9jq4xu695jx5txa3qrrfsrg4w4uk35bhmxkn378fwebng": "1.NANONODE.FR \U0001f1eb\U0001f1f7",
+    "nano_1ota8bpwwawmc8ksdz4ezzrb3afbdeipk1n7rbeguhm4muy1r649uzw5moon": "Moonstruck.dev \U0001f319",
+    "nano_34zuxqdsucurhjrmpc4aixzbgaa4wjzz6bn5ryn56emc9tmd3pnxjoxfzyb6": "Nano Germany \U0001f1e9\U0001f1ea",
     "nano_3r59fzdyn5x6zeqhaszaxiioqwxx3bqyy9czn1i35po9ghemezncq5dmzqtg": "James's Nano Node",
     "nano_1u7anedrbmqx4gr8x44r6k4egg9nhi75yb1qsz63e5ykhz3mx3r3jw463r3t": "PixelStix",
     "nano_3jr5fts8w1dphx9tq9omwmysafdi1htrwfah8od6tyn4ew1ci6d5whhzrxg6": "Eter Nano",
@@ -469,7 +469,7 @@ known = {
     "nano_1center16ci77qw5w69ww8sy4i4bfmgfhr81ydzpurm91cauj11jn6y3uc5y": "nanocenter",
     "nano_3o5oeefdnrha7x7styp1tnmefen7fnrooy4jgnfb1otws54yf7uqfuxmojoy": "scoin.cool",
     "nano_1gfceuca6iwc7yzwep9eib8jr3eimm5s5eac4gg3uzqmidgkanjik3r6bnaw": "Baghdad Node",
-    "nano_11pb5aa6uirs9hoqsg4swnzyehoiqowj94kdpthwkhwufmtd6a11xx35iron": " \ud83d\udd10 IronClad \ud83d\udd10 \u27a1 Reliable node built to last",
+    "nano_11pb5aa6uirs9hoqsg4swnzyehoiqowj94kdpthwkhwufmtd6a11xx35iron": " \U0001f510 IronClad \U0001f510 \u27a1 Reliable node built to last",
     "nano_1q874t5zdc3jgehuncd7onx1wwzimissqu1dz18jsumbf7zqobiujjikb5we": "Nano !",
     "nano_3ae611binaeq5dxtmiekc6uy9efetkxxc6oqieu87p83eea3ow18juf9w3a6": "NanoPocket.app",
     "nano_3yi69k84wefw4cxouepnfaproqmy9zgcpghzi6rp889yecwoqe3f69kdoi7k": "FWDMe Donations",
@@ -487,7 +487,7 @@ known = {
     "nano_18xwtze8sgprtd1jg917uaersr1nqwubqqsw5kabk1yygjsbwy3jb44d9bkz": "Coinbattles.co",
     "nano_3ebzgpfeziniz3wttyh7dqui86oqzcsiggmakxft9xegqn8afkfwfd3jfukm": "Yowie and Joker",
     "nano_3gemumguyg57s13pwgpusbgtt4h9u4eymxcuignqu71yofhzzm9rz1r16hoc": "My Nano Node",
-    "nano_14mp1ua4oi45rxosft3d8qe4g6a1u1srma59jg85ax6s8zuwhi4yzgdnqhz3": "NanoSG (Node - Deckard Cain) \ud83c\uddf8\ud83c\uddec",
+    "nano_14mp1ua4oi45rxosft3d8qe4g6a1u1srma59jg85ax6s8zuwhi4yzgdnqhz3": "NanoSG (Node - Deckard Cain) \U0001f1f8\U0001f1ec",
     "nano_3pnanopr3d5g7o45zh3nmdkqpaqxhhp3mw14nzr41smjz8xsrfyhtf9xac77": "PlayNANO Representative",
     "nano_3zx7rus19yr5qi5zmkawnzo5ehxr7i73xqghhondhfrzftgstgk4gxbubwfq": "Nanorlando City Node",
     "nano_1sw898hgeexgrsq8x16wdadwdrs3obn418z6x98parb5tymz879mu89qndju": "VINO Community Rep",
@@ -495,7 +495,7 @@ known = {
     "nano_1crpaybw8jip7fm98fzfxnjajb55ty76oyzmpfwe9s66u4aod37tm3kxba8q": "CRPay",
     "nano_1ry7kqi1msam7ay8qreo1mddc6ga6hg4s5tsqgtqhdhbxxwgcuo5mwfno379": "CLOSEDNODE",
     "nano_3ykue9bbgi9f7w1dq8qe7b3zhdkmh6wjotdo4eu45yktgyn1um69sfb8nni6": "Nanocoin.ch",
-    "nano_1green78j5hwgr5w4b9i6rhi7dn3o6t3k45xrfermjpsi9ghxsz6b1n5fc81": "nanogreen.dev \ud83c\udf41",
+    "nano_1green78j5hwgr5w4b9i6rhi7dn3o6t3k45xrfermjpsi9ghxsz6b1n5fc81": "nanogreen.dev \U0001f341",
     "nano_1obpr1fmojfd8ajnb9fmcdt1rh3kgtfsde8kwypoq89zrxuwrm7uy6uamspp": "xrt0x",
     "nano_1u1d4sss7mo7sd59whyroqnskse4izyyg76mqaidhnngayj7zo331aqfx4d8": "Nano Node Netherlands",
     "nano_39gwh6ci76qpeqhsebg98nn75xour7komga39r9qn6mrmg99yajo4d7nrurw": "The Crypto Umbrella",
@@ -524,7 +524,7 @@ known = {
     "nano_1euitamof57xomi17pe7d7dyutg1g4kcdac7xh9zdk93ut5iy5wpendzg151": "Divye Kapoor Personal Account",
     "nano_37y6iq8m1zx9inwkkcgqh34kqsihzpjfwgp9jir8xpb9jrcwhkmoxpo61f4o": "Nano.to/Development",
     "nano_1a1ibabafmk5kfj9umz5wfxjmd4g8t454z9s9wtej3wy7bmqumnrxmjfm5w9": "Alibaba",
-    "nano_15gfawgrsc6tkkm5p1gy749tkibchu73st1ojs3knz6rd3ejfcgt7rj5cmx9": "VF Validierung \ud83c\udde9\ud83c\uddea",
+    "nano_15gfawgrsc6tkkm5p1gy749tkibchu73st1ojs3knz6rd3ejfcgt7rj5cmx9": "VF Validierung \U0001f1e9\U0001f1ea",
     "nano_1i6pixerf1dneyf1buji83qpgubebf9u8hg7h4q1o5am7ijbi4caa453u8tp": "markkawika",
     "nano_3dgaog3iao3winq3u4cjr86ecu9j4tgc99wd4poqu1y6yfmxwh94f6bo18qf": "zvex",
     "nano_3a4wdp9kjwjuge5c8io17hf4pqrhzd3kjr8j3ymuyo4jq3ia6x5uu9ioh3oh": "NANO.TO - US-1",
@@ -535,7 +535,7 @@ known = {
     "nano_1name191y1bqcbh5r9xz4a9gk1r54aerf7rd4ngubwr8gckojxosjfch53bx": "Nano.to/Usernames",
     "nano_1reason1q976g9wkrt69nux7konww46ux73c7xzm7jrm3w4kqdtigym6btq3": "Nano.to/Reps",
     "nano_3yp6obwmmkx81e8oika38m9w9fps3o3fwwxbcattnxkcxhmqkpmn5zpyemoy": "Minecon724",
-    "nano_3gxo1dh5x6bai7dngpiy5sngnehx1qodr4acw8s1xowag6im7dba1iyswk58": "NANO IS INEVITABLE\ud83e\udd66\ud83e\udd66\ud83e\udd66",
+    "nano_3gxo1dh5x6bai7dngpiy5sngnehx1qodr4acw8s1xowag6im7dba1iyswk58": "NANO IS INEVITABLE\U0001f966\U0001f966\U0001f966",
     "nano_3po1yrun1qrproqtq699p748ymduwp856qsk64x4yftca7onp5t1t81mxeeu": "Polyrun",
     "nano_1whhyu6rwyxkw54qmpdozf348mpk5f3z67ufkcm738oxwrwkfbsyh3srufuu": "Mind Dragon",
     "nano_1jo7b3g3t9wqosrf7dxh9zibkigtwkw5cbqs53p1g8j74bwkq8ayjt374o1m": "Magical Cat",